@@ -1,27 +1,101 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Header, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from bson import ObjectId
+import asyncio
 import time
 import logging
 
+from app.core.config import settings
 from app.core.database import get_database
-from app.core.deps import get_current_active_user
+from app.core.deps import get_current_active_user, get_stream_user
+from app.core.responses import FastJSONResponse, dumps
 from app.models.schemas import AnalysisRequest, AnalysisType, SurveyStatus
 from app.models.user import User
+from app.services.ingestion import preprocess_answers
 from app.services.llm_service import LLMService
+from app.services.participants import (
+    SegmentError,
+    load_participant_table,
+    resolve_segment,
+)
 from app.services.preprocessing import DataPreprocessor
+from app.services.progress import (
+    TERMINAL_STATUSES,
+    ProgressReporter,
+    apply_update,
+    load_status,
+    progress_broker,
+)
+from app.services.response_store import (
+    get_simple_responses,
+    question_response_loader,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
+
+# Results change only when a new analysis is stored (or an old one is
+# patched, which bumps its "version"), so clients may keep them but must
+# revalidate with If-None-Match
+RESULTS_CACHE_CONTROL = "private, no-cache"
+
 llm_service = LLMService()
 preprocessor = DataPreprocessor()
 
 
-async def perform_analysis_task(survey_id: str, analysis_types: List[AnalysisType], db):
-    """Background task to perform analysis - supports both simple and structured surveys"""
+async def _segment_processed_data(
+    db, survey: Dict[str, Any], segment: Dict[str, Any]
+) -> Dict[str, Dict[str, Any]]:
+    """Per-question responses of the participants matching a segment
+
+    The segment is resolved against the bitmap indexes built at ingest, and
+    the matching participants' answers are preprocessed like at upload.
+    """
+    processed_data = survey.get("processed_data", {})
+    mask = await resolve_segment(db, survey, segment)
+    table = await load_participant_table(db, survey, list(processed_data))
+
+    def build():
+        segment_preprocessor = preprocessor.memoized()
+        segment_data = {}
+        for question_id, data in processed_data.items():
+            answers = table.answers(question_id, mask)
+            cleaned = (
+                preprocess_answers(
+                    data.get("question_type"), answers, segment_preprocessor
+                )
+                if answers
+                else []
+            )
+            if cleaned:
+                segment_data[question_id] = {
+                    "question_text": data["question_text"],
+                    "question_type": data.get("question_type", "open_ended"),
+                    "responses": cleaned,
+                    "response_count": len(cleaned),
+                }
+        return segment_data
+
+    return await asyncio.to_thread(build), int(mask.sum())
+
+
+async def perform_analysis_task(
+    survey_id: str,
+    analysis_types: List[AnalysisType],
+    db,
+    segment: Optional[Dict[str, Any]] = None,
+):
+    """Background task to perform analysis - supports both simple and structured surveys
+
+    With a ``segment`` filter (structured surveys only), only the responses
+    of the matching participants are analyzed, and the segment is stored
+    with the result; it does not become the survey's latest analysis.
+    """
 
+    reporter = ProgressReporter(db, survey_id)
     try:
         # Get survey data
         survey = await db.surveys.find_one({"_id": ObjectId(survey_id)})
@@ -32,24 +106,21 @@ async def perform_analysis_task(survey_id: str, analysis_types: List[AnalysisTyp
         survey_type = survey.get("survey_type", "simple")
 
         # Update status to processing with initial progress
-        await db.surveys.update_one(
-            {"_id": ObjectId(survey_id)},
+        await reporter.update(
             {
-                "$set": {
-                    "status": SurveyStatus.PROCESSING.value,
-                    "progress": {
-                        "step": "initializing",
-                        "message": "Starting analysis...",
-                        "current_question": 0,
-                        "total_questions": (
-                            len(survey.get("questions", []))
-                            if survey_type == "structured"
-                            else 1
-                        ),
-                        "percentage": 0,
-                        "last_updated": datetime.utcnow(),
-                    },
-                }
+                "status": SurveyStatus.PROCESSING.value,
+                "progress": {
+                    "step": "initializing",
+                    "message": "Starting analysis...",
+                    "current_question": 0,
+                    "total_questions": (
+                        len(survey.get("questions", []))
+                        if survey_type == "structured"
+                        else 1
+                    ),
+                    "percentage": 0,
+                    "last_updated": datetime.utcnow(),
+                },
             },
         )
         start_time = time.time()
@@ -67,16 +138,29 @@ async def perform_analysis_task(survey_id: str, analysis_types: List[AnalysisTyp
             if not processed_data:
                 raise Exception("No processed data found for structured survey")
 
+            response_loader = question_response_loader(db, survey)
+            total_responses = survey.get("total_responses", 0)
+            if segment:
+                processed_data, participants = await _segment_processed_data(
+                    db, survey, segment
+                )
+                if not processed_data:
+                    raise Exception("No valid responses in the selected segment")
+                response_loader = None
+                total_responses = sum(
+                    data["response_count"] for data in processed_data.values()
+                )
+                result_data.update(
+                    {"segment": segment, "segment_participants": participants}
+                )
+
             # Update progress: starting structured analysis
-            await db.surveys.update_one(
-                {"_id": ObjectId(survey_id)},
+            await reporter.update(
                 {
-                    "$set": {
-                        "progress.step": "analyzing_questions",
-                        "progress.message": "Analyzing individual questions...",
-                        "progress.percentage": 10,
-                        "progress.last_updated": datetime.utcnow(),
-                    }
+                    "progress.step": "analyzing_questions",
+                    "progress.message": "Analyzing individual questions...",
+                    "progress.percentage": 10,
+                    "progress.last_updated": datetime.utcnow(),
                 },
             )
 
@@ -89,34 +173,30 @@ async def perform_analysis_task(survey_id: str, analysis_types: List[AnalysisTyp
                     if total_questions > 0
                     else 10
                 )
-                await db.surveys.update_one(
-                    {"_id": ObjectId(survey_id)},
+                await reporter.update(
                     {
-                        "$set": {
-                            "progress.step": step,
-                            "progress.current_question": current_question,
-                            "progress.total_questions": total_questions,
-                            "progress.message": message,
-                            "progress.percentage": percentage,
-                            "progress.last_updated": datetime.utcnow(),
-                        }
+                        "progress.step": step,
+                        "progress.current_question": current_question,
+                        "progress.total_questions": total_questions,
+                        "progress.message": message,
+                        "progress.percentage": percentage,
+                        "progress.last_updated": datetime.utcnow(),
                     },
                 )
 
             structured_result = await llm_service.analyze_structured_survey(
-                processed_data, progress_callback=progress_callback
+                processed_data,
+                progress_callback=progress_callback,
+                response_loader=response_loader,
             )
 
             # Update progress: cross-question analysis
-            await db.surveys.update_one(
-                {"_id": ObjectId(survey_id)},
+            await reporter.update(
                 {
-                    "$set": {
-                        "progress.step": "cross_analysis",
-                        "progress.message": "Generating cross-question insights...",
-                        "progress.percentage": 85,
-                        "progress.last_updated": datetime.utcnow(),
-                    }
+                    "progress.step": "cross_analysis",
+                    "progress.message": "Generating cross-question insights...",
+                    "progress.percentage": 85,
+                    "progress.last_updated": datetime.utcnow(),
                 },
             )
 
@@ -129,25 +209,22 @@ async def perform_analysis_task(survey_id: str, analysis_types: List[AnalysisTyp
                     "total_questions_analyzed": structured_result.get(
                         "total_questions_analyzed", 0
                     ),
-                    "total_responses_analyzed": survey.get("total_responses", 0),
+                    "total_responses_analyzed": total_responses,
                 }
             )
 
         # Handle simple single-question surveys (backward compatible)
         else:
-            responses = survey.get("responses", [])
+            responses = await get_simple_responses(db, survey)
             result_data["total_responses_analyzed"] = len(responses)
 
             # Update progress: analyzing simple survey
-            await db.surveys.update_one(
-                {"_id": ObjectId(survey_id)},
+            await reporter.update(
                 {
-                    "$set": {
-                        "progress.step": "analyzing",
-                        "progress.message": f"Analyzing {len(responses)} responses...",
-                        "progress.percentage": 20,
-                        "progress.last_updated": datetime.utcnow(),
-                    }
+                    "progress.step": "analyzing",
+                    "progress.message": f"Analyzing {len(responses)} responses...",
+                    "progress.percentage": 20,
+                    "progress.last_updated": datetime.utcnow(),
                 },
             )
 
@@ -199,15 +276,12 @@ async def perform_analysis_task(survey_id: str, analysis_types: List[AnalysisTyp
         result_data["processing_time"] = processing_time
 
         # Update progress: finalizing
-        await db.surveys.update_one(
-            {"_id": ObjectId(survey_id)},
+        await reporter.update(
             {
-                "$set": {
-                    "progress.step": "finalizing",
-                    "progress.message": "Finalizing results and preparing visualizations...",
-                    "progress.percentage": 95,
-                    "progress.last_updated": datetime.utcnow(),
-                }
+                "progress.step": "finalizing",
+                "progress.message": "Finalizing results and preparing visualizations...",
+                "progress.percentage": 95,
+                "progress.last_updated": datetime.utcnow(),
             },
         )
 
@@ -215,30 +289,24 @@ async def perform_analysis_task(survey_id: str, analysis_types: List[AnalysisTyp
         analysis_result = await db.analyses.insert_one(result_data)
 
         # Update survey status to completed
-        await db.surveys.update_one(
-            {"_id": ObjectId(survey_id)},
-            {
-                "$set": {
-                    "status": SurveyStatus.COMPLETED.value,
-                    "updated_at": datetime.utcnow(),
-                    "last_analysis_id": str(analysis_result.inserted_id),
-                }
-            },
-        )
+        completed = {
+            "status": SurveyStatus.COMPLETED.value,
+            "updated_at": datetime.utcnow(),
+        }
+        if not segment:
+            completed["last_analysis_id"] = str(analysis_result.inserted_id)
+        await reporter.update(completed)
 
     except Exception as e:
         # Log the error for debugging
         logger.error(f"Analysis failed for survey {survey_id}: {str(e)}", exc_info=True)
 
         # Update status to failed
-        await db.surveys.update_one(
-            {"_id": ObjectId(survey_id)},
+        await reporter.update(
             {
-                "$set": {
-                    "status": SurveyStatus.FAILED.value,
-                    "error": str(e),
-                    "updated_at": datetime.utcnow(),
-                }
+                "status": SurveyStatus.FAILED.value,
+                "error": str(e),
+                "updated_at": datetime.utcnow(),
             },
         )
 
@@ -263,47 +331,106 @@ async def start_analysis(
     if not survey:
         raise HTTPException(status_code=404, detail="Survey not found")
 
+    if survey.get("status") == SurveyStatus.INGESTING.value:
+        raise HTTPException(
+            status_code=409, detail="Survey files are still being ingested"
+        )
+
+    # Optional segment filter: {question_id: value or [values]}
+    segment = (request.options or {}).get("segment") or None
+    segment_participants = None
+    if segment:
+        if not isinstance(segment, dict):
+            raise HTTPException(
+                status_code=400, detail="options.segment must be an object"
+            )
+        try:
+            mask = await resolve_segment(db, survey, segment)
+        except SegmentError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        segment_participants = int(mask.sum())
+        if not segment_participants:
+            raise HTTPException(
+                status_code=400, detail="No participants match the segment"
+            )
+
     # Add background task
     background_tasks.add_task(
-        perform_analysis_task, request.survey_id, request.analysis_types, db
+        perform_analysis_task, request.survey_id, request.analysis_types, db, segment
     )
 
     return {
         "message": "Analysis started",
         "survey_id": request.survey_id,
         "analysis_types": [at.value for at in request.analysis_types],
+        "segment": segment,
+        "segment_participants": segment_participants,
         "status": "processing",
     }
 
 
+def analysis_etag(analysis: Dict[str, Any]) -> str:
+    """Strong ETag of a stored analysis (its ID and edit version)"""
+    return f'"{analysis["_id"]}-{analysis.get("version", 0)}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists the given ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as If-None-Match requires
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
 @router.get("/{survey_id}/results")
 async def get_analysis_results(
     survey_id: str,
+    if_none_match: Optional[str] = Header(None),
     db=Depends(get_database),
     current_user: User = Depends(get_current_active_user),
 ):
-    """Get analysis results for a survey"""
+    """Get analysis results for a survey
+
+    Responses carry an ETag; a request whose If-None-Match holds the current
+    one gets a 304 without the analysis document being loaded.
+    """
 
     # Verify survey belongs to user
-    survey = await db.surveys.find_one(
-        {"_id": ObjectId(survey_id), "user_id": current_user.id}
-    )
+    try:
+        survey = await db.surveys.find_one(
+            {"_id": ObjectId(survey_id), "user_id": current_user.id},
+            projection={"_id": 1},
+        )
+    except:
+        raise HTTPException(status_code=400, detail="Invalid survey ID")
     if not survey:
         raise HTTPException(status_code=404, detail="Survey not found")
 
-    # Get the latest analysis for this survey
+    # Get the latest full-survey analysis (just its version to revalidate);
+    # segment analyses are listed by /all-results
     analysis = await db.analyses.find_one(
-        {"survey_id": survey_id}, sort=[("created_at", -1)]
+        {"survey_id": survey_id, "segment": None},
+        projection={"_id": 1, "version": 1} if if_none_match else None,
+        sort=[("created_at", -1)],
     )
 
     if not analysis:
         raise HTTPException(status_code=404, detail="No analysis found for this survey")
 
-    # Convert ObjectId to string
-    analysis["_id"] = str(analysis["_id"])
-    analysis["created_at"] = analysis["created_at"].isoformat()
+    etag = analysis_etag(analysis)
+    headers = {"ETag": etag, "Cache-Control": RESULTS_CACHE_CONTROL}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
 
-    return analysis
+    if if_none_match:
+        analysis = await db.analyses.find_one({"_id": analysis["_id"]})
+        if not analysis:  # deleted in between
+            raise HTTPException(
+                status_code=404, detail="No analysis found for this survey"
+            )
+
+    return FastJSONResponse(analysis, headers=headers)
 
 
 @router.get("/{survey_id}/all-results")
@@ -322,14 +449,10 @@ async def get_all_analysis_results(
         raise HTTPException(status_code=404, detail="Survey not found")
 
     cursor = db.analyses.find({"survey_id": survey_id}).sort("created_at", -1)
-    results = []
 
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        doc["created_at"] = doc["created_at"].isoformat()
-        results.append(doc)
+    results = await cursor.to_list(length=None)
 
-    return {"analyses": results, "total": len(results)}
+    return FastJSONResponse({"analyses": results, "total": len(results)})
 
 
 @router.delete("/{analysis_id}")
@@ -363,40 +486,97 @@ async def delete_analysis(
     return {"message": "Analysis deleted successfully"}
 
 
+@router.get("/{survey_id}/events")
+async def stream_analysis_events(
+    survey_id: str,
+    request: Request,
+    db=Depends(get_database),
+    current_user: User = Depends(get_stream_user),
+):
+    """Stream status and progress of a survey analysis (Server-Sent Events)
+
+    Each event carries the full status (as returned by /status); the stream
+    ends after a completed or failed status. Pass the access token as the
+    ``token`` query parameter when the client cannot set headers.
+    """
+
+    # Subscribe first so no update is missed between the read and the stream
+    queue = progress_broker.subscribe(survey_id)
+    try:
+        status = await load_status(db, survey_id, current_user.id)
+    except Exception:
+        progress_broker.unsubscribe(survey_id, queue)
+        raise HTTPException(status_code=400, detail="Invalid survey ID")
+    if status is None:
+        progress_broker.unsubscribe(survey_id, queue)
+        raise HTTPException(status_code=404, detail="Survey not found")
+
+    async def events():
+        nonlocal status
+        try:
+            yield _status_event(survey_id, status)
+            while status["status"] not in TERMINAL_STATUSES:
+                try:
+                    update = await asyncio.wait_for(
+                        queue.get(), timeout=settings.PROGRESS_FALLBACK_INTERVAL
+                    )
+                    apply_update(status, update)
+                except asyncio.TimeoutError:
+                    # Quiet: the analysis may be running in another process
+                    if await request.is_disconnected():
+                        return
+                    latest = await load_status(db, survey_id)
+                    if latest is None:
+                        return
+                    if latest == status:
+                        yield ": keep-alive\n\n"
+                        continue
+                    status = latest
+                yield _status_event(survey_id, status)
+        finally:
+            progress_broker.unsubscribe(survey_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _status_event(survey_id: str, status: Dict[str, Any]) -> str:
+    """Server-Sent Event carrying a survey status"""
+    data = dumps({"survey_id": survey_id, **status}).decode("utf-8")
+    return f"data: {data}\n\n"
+
+
 @router.get("/{survey_id}/status")
 async def get_analysis_status(
     survey_id: str,
     db=Depends(get_database),
     current_user: User = Depends(get_current_active_user),
 ):
-    """Get the current status of survey analysis"""
+    """Get the current status of survey analysis
 
-    # Verify survey belongs to user
-    survey = await db.surveys.find_one(
-        {"_id": ObjectId(survey_id), "user_id": current_user.id}
-    )
-    if not survey:
-        raise HTTPException(status_code=404, detail="Survey not found")
-
-    logger.info(f"📡 Status check requested for survey: {survey_id}")
+    Reads only the status fields of the survey, cached for a moment (see
+    progress.load_status).
+    """
 
     try:
-        survey = await db.surveys.find_one({"_id": ObjectId(survey_id)})
+        status = await load_status(db, survey_id, current_user.id)
     except:
         raise HTTPException(status_code=400, detail="Invalid survey ID")
 
-    if not survey:
+    if not status:
         raise HTTPException(status_code=404, detail="Survey not found")
 
-    status_response = {
-        "survey_id": survey_id,
-        "status": survey.get("status"),
-        "progress": survey.get("progress", {}),
-        "updated_at": survey.get("updated_at", datetime.utcnow()).isoformat(),
-    }
-
-    logger.info(
-        f"✅ Status response for {survey_id}: status={status_response['status']}, progress={status_response['progress'].get('percentage', 0)}%"
+    logger.debug(
+        f"Status of {survey_id}: {status['status']}, "
+        f"{(status['progress'] or {}).get('percentage', 0)}%"
     )
 
-    return status_response
+    return {
+        "survey_id": survey_id,
+        "status": status["status"],
+        "progress": status["progress"] or {},
+        "updated_at": status["updated_at"] or datetime.utcnow(),
+    }
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from datetime import datetime
 from app.core.database import get_database
+from app.core.indexes import index_report
 
 router = APIRouter()
 
@@ -12,7 +13,7 @@ async def health_check():
 
 
 @router.get("/health/detailed")
-async def detailed_health_check(db=Depends(get_database)):
+async def detailed_health_check(request: Request, db=Depends(get_database)):
     """Detailed health check with database status"""
     try:
         # Quick ping to verify database connection
@@ -21,11 +22,19 @@ async def detailed_health_check(db=Depends(get_database)):
     except Exception as e:
         db_status = f"error: {str(e)}"
 
+    # Computed per request: $indexStats counters change while the server runs
+    try:
+        indexes = await index_report(db, log=False)
+    except Exception as e:
+        indexes = {"error": str(e)}
+
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
         "service": "LLM Survey Analysis API",
         "database": db_status,
+        "startup_timings": getattr(request.app.state, "startup_timings", None),
+        "indexes": indexes,
     }
 
 
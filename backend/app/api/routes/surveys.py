@@ -1,16 +1,93 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from typing import List
+from fastapi import (
+    APIRouter,
+    UploadFile,
+    File,
+    Form,
+    HTTPException,
+    Depends,
+    BackgroundTasks,
+    Header,
+    Request,
+)
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List
+import asyncio
+import base64
 import csv
-import json
 import io
+import itertools
+import json
+import logging
+import os
+import uuid
+from contextlib import nullcontext
 from datetime import datetime
 from bson import ObjectId
 
+from app.core.config import settings
 from app.core.database import get_database
 from app.core.deps import get_current_active_user
-from app.models.schemas import SurveyUpload, SurveyDocument, SurveyStatus
+from app.core.responses import FastJSONResponse
+from app.models.schemas import (
+    SurveyUpload,
+    SurveyDocument,
+    SurveyStatus,
+    UploadSessionCreate,
+    ResumableUploadFinalize,
+    SegmentQuery,
+    CrosstabRequest,
+)
 from app.models.user import User
+from app.services import upload_sessions
+from app.services.dedup import content_hash, find_duplicate, hash_stream
+from app.services.preview import (
+    PREVIEW_MAX_SAMPLE_BYTES,
+    PREVIEW_SAMPLE_BYTES,
+    preview_upload,
+)
+from app.services.ingestion import (
+    NDJSON_EXTENSIONS,
+    PARQUET_EXTENSIONS,
+    RESPONSE_FILE_EXTENSIONS,
+    SCHEMA_FILE_EXTENSIONS,
+    SPREADSHEET_EXTENSIONS,
+    IngestError,
+    ResponseColumns,
+    build_participant_data,
+    build_processed_data,
+    data_extension,
+    iter_json_records,
+    iter_ndjson_records,
+    iter_parquet_records,
+    iter_response_rows,
+    open_decompressed,
+    strip_compression,
+    parse_schema,
+    open_workbook_rows,
+    run_ingest_job,
+    spool_upload,
+)
+from app.services.participants import (
+    CATEGORICAL,
+    ParticipantTable,
+    SegmentError,
+    load_participant_table,
+    resolve_segment,
+    segment_options,
+)
 from app.services.preprocessing import DataPreprocessor
+from app.services.progress import status_cache
+from app.services.statistics import analyze_closed_question, is_closed_question
+from app.services.response_store import (
+    SIMPLE_QUESTION_ID,
+    delete_responses,
+    insert_survey,
+    iter_responses_from,
+    read_response_page,
+    uses_response_store,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 preprocessor = DataPreprocessor()
@@ -50,8 +127,7 @@ async def upload_survey(
             "updated_at": datetime.utcnow(),
         }
 
-        result = await db.surveys.insert_one(survey_doc)
-        survey_id = str(result.inserted_id)
+        survey_id = await insert_survey(db, survey_doc)
 
         return {
             "survey_id": survey_id,
@@ -78,25 +154,10 @@ async def upload_survey(
                 status_code=400, detail="No structured responses provided"
             )
 
-        # Preprocess each question's responses
-        processed_data = {}
-        for question in survey.questions:
-            if question.is_analyzed:  # Only process questions marked for analysis
-                question_responses = []
-                for response_dict in survey.structured_responses:
-                    if question.question_id in response_dict:
-                        answer = response_dict[question.question_id]
-                        if answer and isinstance(answer, str) and answer.strip():
-                            question_responses.append(answer)
-
-                if question_responses:
-                    cleaned = preprocessor.preprocess_batch(question_responses)
-                    processed_data[question.question_id] = {
-                        "question_text": question.question_text,
-                        "question_type": question.question_type,
-                        "responses": cleaned,
-                        "response_count": len(cleaned),
-                    }
+        # Preprocess each question's responses (only questions marked for analysis)
+        questions = [q.dict() for q in survey.questions]
+        columns = ResponseColumns(questions).extend(survey.structured_responses)
+        processed_data = build_processed_data(questions, columns, preprocessor)
 
         if not processed_data:
             raise HTTPException(
@@ -108,9 +169,10 @@ async def upload_survey(
             "title": survey.title,
             "description": survey.description,
             "survey_type": "structured",
-            "questions": [q.dict() for q in survey.questions],
-            "total_participants": len(survey.structured_responses),
+            "questions": questions,
+            "total_participants": columns.participants,
             "processed_data": processed_data,
+            **build_participant_data(questions, columns),
             "total_responses": sum(
                 data["response_count"] for data in processed_data.values()
             ),
@@ -120,14 +182,13 @@ async def upload_survey(
             "updated_at": datetime.utcnow(),
         }
 
-        result = await db.surveys.insert_one(survey_doc)
-        survey_id = str(result.inserted_id)
+        survey_id = await insert_survey(db, survey_doc)
 
         return {
             "survey_id": survey_id,
             "title": survey.title,
             "survey_type": "structured",
-            "total_participants": len(survey.structured_responses),
+            "total_participants": columns.participants,
             "total_questions": len(survey.questions),
             "analyzed_questions": len(processed_data),
             "total_responses": survey_doc["total_responses"],
@@ -142,25 +203,90 @@ async def upload_survey(
         )
 
 
+def _parse_two_file_upload(
+    schema_file: UploadFile, responses_file: UploadFile, file_size_mb: float
+) -> Dict[str, Any]:
+    """Parse and preprocess a two-file upload (blocking, run in a worker thread)
+
+    Returns ``{"questions", "total_participants", "processed_data",
+    "participant_table", "question_stats"}``.
+    """
+    # Parse schema file (compressed files are decompressed as a stream)
+    schema_stream, schema_name = open_decompressed(
+        schema_file.file, schema_file.filename
+    )
+    questions = parse_schema(schema_stream.read(), schema_name)
+
+    # Parse responses file straight from the upload stream
+    responses_stream, responses_name = open_decompressed(
+        responses_file.file, responses_file.filename
+    )
+    if file_size_mb > 50:
+        logger.info(f"Processing large responses file: {file_size_mb:.1f}MB")
+
+    # Rows are reduced to per-question answer columns as they are parsed
+    columns = ResponseColumns(questions)
+    for response_dict in iter_response_rows(
+        responses_stream, responses_name, questions
+    ):
+        columns.add(response_dict)
+        # Log progress for very large files (every 10,000 rows)
+        if file_size_mb > 100 and columns.participants % 10000 == 0:
+            logger.info(f"Processed {columns.participants} participant responses...")
+
+    if file_size_mb > 50:
+        logger.info(f"Completed processing {columns.participants} total participants")
+
+    if not columns.participants:
+        raise HTTPException(
+            status_code=400, detail="No responses found in responses file"
+        )
+
+    # Process each question's responses
+    processed_data = build_processed_data(questions, columns, preprocessor)
+
+    if not processed_data:
+        raise HTTPException(
+            status_code=400, detail="No valid responses after preprocessing"
+        )
+
+    return {
+        "questions": questions,
+        "total_participants": columns.participants,
+        "processed_data": processed_data,
+        **build_participant_data(questions, columns),
+    }
+
+
 @router.post("/upload-two-file")
 async def upload_two_file_survey(
+    background_tasks: BackgroundTasks,
     schema_file: UploadFile = File(...),
     responses_file: UploadFile = File(...),
     title: str = Form(None),
     description: str = Form(None),
     tags: str = Form(None),
+    async_ingest: bool = Form(False),
+    allow_duplicate: bool = Form(False),
     db=Depends(get_database),
     current_user: User = Depends(get_current_active_user),
 ):
     """Upload survey with separate schema and responses files with optional metadata
 
-    Schema file format (CSV/JSON):
+    Schema file format (CSV/JSON/XLSX):
     - CSV: question_id, question_text, question_type, is_analyzed
     - JSON: [{"question_id": "q1", "question_text": "...", ...}]
+    - XLSX: same columns as CSV, on a sheet named "schema" (or the first sheet)
 
-    Responses file format (CSV/JSON):
+    Responses file format (CSV/JSON/NDJSON/XLSX/Parquet):
     - CSV: participant_id, q1, q2, q3, ...
     - JSON: [{"participant_id": "p1", "q1": "answer", "q2": "answer", ...}]
+    - NDJSON (.jsonl/.ndjson): one {"participant_id": "p1", "q1": "answer", ...} per line
+    - XLSX: same columns as CSV, on a sheet named "responses" (or the first sheet)
+    - Parquet: same columns as CSV (requires pyarrow); only question columns are read
+
+    JSON arrays, NDJSON, XLSX sheets and Parquet files are parsed one participant
+    (or record batch) at a time.
 
     Args:
         schema_file: File containing survey questions/schema
@@ -168,6 +294,12 @@ async def upload_two_file_survey(
         title: Custom title for the survey (optional)
         description: Description of the survey (optional)
         tags: Comma-separated tags (optional)
+        async_ingest: Spool the files and parse them in the background (optional).
+            Returns immediately with a job ID and status "ingesting"; progress is
+            reported through GET /analysis/{survey_id}/status.
+        allow_duplicate: Create a new survey even if this user already uploaded
+            identical files (optional). By default the response links to the
+            existing survey and its latest analysis, with "duplicate": true.
 
     Supports large files (up to 250MB)
     """
@@ -177,150 +309,55 @@ async def upload_two_file_survey(
             status_code=400, detail="Both schema and responses files are required"
         )
 
+    if async_ingest:
+        return await _start_async_ingest(
+            background_tasks,
+            schema_file,
+            responses_file,
+            title,
+            description,
+            tags,
+            allow_duplicate,
+            db,
+            current_user,
+        )
+
     # Check file size limits (250MB max)
     MAX_SIZE = 250 * 1024 * 1024  # 250MB
 
-    # Read files with size checking
-    try:
-        schema_content = await schema_file.read()
-        if len(schema_content) > MAX_SIZE:
+    sizes = {}
+    for label, upload in (("Schema", schema_file), ("Responses", responses_file)):
+        upload.file.seek(0, os.SEEK_END)
+        size = sizes[label] = upload.file.tell()
+        upload.file.seek(0)
+        if size > MAX_SIZE:
             raise HTTPException(
                 status_code=413,
-                detail=f"Schema file too large. Maximum size is 250MB, got {len(schema_content) / (1024*1024):.1f}MB",
+                detail=f"{label} file too large. Maximum size is 250MB, got {size / (1024*1024):.1f}MB",
             )
 
-        responses_content = await responses_file.read()
-        if len(responses_content) > MAX_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"Responses file too large. Maximum size is 250MB, got {len(responses_content) / (1024*1024):.1f}MB",
-            )
-    except MemoryError:
-        raise HTTPException(
-            status_code=413,
-            detail="File too large to process. Please split into smaller files or contact support.",
-        )
+    # Hash the raw files before parsing: identical re-uploads cost nothing
+    survey_hash = content_hash(
+        "two-file",
+        await asyncio.to_thread(hash_stream, schema_file.file),
+        await asyncio.to_thread(hash_stream, responses_file.file),
+    )
+    if not allow_duplicate:
+        duplicate = await find_duplicate(db, current_user.id, survey_hash)
+        if duplicate:
+            return duplicate
 
     try:
-        # Parse schema file
-        schema_ext = schema_file.filename.lower().split(".")[-1]
-        questions = []
-
-        if schema_ext == "csv":
-            # Parse CSV efficiently for large files
-            schema_csv = list(
-                csv.DictReader(io.StringIO(schema_content.decode("utf-8")))
-            )
-            if not schema_csv:
-                raise HTTPException(status_code=400, detail="Schema file is empty")
-
-            for row in schema_csv:
-                questions.append(
-                    {
-                        "question_id": row.get("question_id", row.get("id", "")),
-                        "question_text": row.get(
-                            "question_text", row.get("text", row.get("question", ""))
-                        ),
-                        "question_type": row.get(
-                            "question_type", row.get("type", "open_ended")
-                        ),
-                        "is_analyzed": str(row.get("is_analyzed", "true")).lower()
-                        in ["true", "1", "yes"],
-                    }
-                )
-        elif schema_ext == "json":
-            schema_json = json.loads(schema_content.decode("utf-8"))
-            if isinstance(schema_json, list):
-                questions = schema_json
-            elif isinstance(schema_json, dict) and "questions" in schema_json:
-                questions = schema_json["questions"]
-        else:
-            raise HTTPException(
-                status_code=400, detail="Schema file must be CSV or JSON"
-            )
-
-        if not questions:
-            raise HTTPException(
-                status_code=400, detail="No questions found in schema file"
-            )
-
-        # Parse responses file (already read above with size checking)
-        responses_ext = responses_file.filename.lower().split(".")[-1]
-        structured_responses = []
-
-        # Import logger for large file processing
-        import logging
-
-        logger = logging.getLogger(__name__)
-
-        if responses_ext == "csv":
-            # Log file size for large files
-            file_size_mb = len(responses_content) / (1024 * 1024)
-            if file_size_mb > 50:
-                logger.info(f"Processing large responses file: {file_size_mb:.1f}MB")
-
-            # Decode and parse CSV
-            csv_text = responses_content.decode("utf-8")
-            responses_csv = csv.DictReader(io.StringIO(csv_text))
-
-            # Process rows efficiently
-            row_count = 0
-            for row in responses_csv:
-                response_dict = {}
-                for question in questions:
-                    qid = question["question_id"]
-                    if qid in row and row[qid]:
-                        response_dict[qid] = str(row[qid]).strip()
-                if response_dict:
-                    structured_responses.append(response_dict)
-
-                row_count += 1
-                # Log progress for very large files (every 10,000 rows)
-                if file_size_mb > 100 and row_count % 10000 == 0:
-                    logger.info(f"Processed {row_count} participant responses...")
-
-            if file_size_mb > 50:
-                logger.info(f"Completed processing {row_count} total participants")
-        elif responses_ext == "json":
-            responses_json = json.loads(responses_content.decode("utf-8"))
-            if isinstance(responses_json, list):
-                structured_responses = responses_json
-            elif isinstance(responses_json, dict) and "responses" in responses_json:
-                structured_responses = responses_json["responses"]
-        else:
-            raise HTTPException(
-                status_code=400, detail="Responses file must be CSV or JSON"
-            )
-
-        if not structured_responses:
-            raise HTTPException(
-                status_code=400, detail="No responses found in responses file"
-            )
-
-        # Process each question's responses
-        processed_data = {}
-        for question in questions:
-            if question.get("is_analyzed", True):
-                question_responses = []
-                for response_dict in structured_responses:
-                    if question["question_id"] in response_dict:
-                        answer = response_dict[question["question_id"]]
-                        if answer and isinstance(answer, str) and answer.strip():
-                            question_responses.append(answer)
-
-                if question_responses:
-                    cleaned = preprocessor.preprocess_batch(question_responses)
-                    processed_data[question["question_id"]] = {
-                        "question_text": question["question_text"],
-                        "question_type": question.get("question_type", "open_ended"),
-                        "responses": cleaned,
-                        "response_count": len(cleaned),
-                    }
-
-        if not processed_data:
-            raise HTTPException(
-                status_code=400, detail="No valid responses after preprocessing"
-            )
+        # Decompressing, parsing and preprocessing run in a worker thread so
+        # other requests are served meanwhile
+        parsed = await asyncio.to_thread(
+            _parse_two_file_upload,
+            schema_file,
+            responses_file,
+            sizes["Responses"] / (1024 * 1024),
+        )
+        questions = parsed["questions"]
+        processed_data = parsed["processed_data"]
 
         # Parse tags if provided
         tag_list = []
@@ -330,7 +367,7 @@ async def upload_two_file_survey(
         # Generate friendly title and description only if not provided
         if not title or not title.strip():
             # Use schema filename without extension as base
-            base_name = schema_file.filename.rsplit(".", 1)[0]
+            base_name = strip_compression(schema_file.filename).rsplit(".", 1)[0]
             # Replace common separators with spaces and title-case
             title = base_name.replace("_", " ").replace("-", " ").title()
             print(f"✨ Auto-generated title: {title}")
@@ -339,7 +376,7 @@ async def upload_two_file_survey(
             print(f"✅ Using provided title: {title}")
 
         if not description or not description.strip():
-            description = f"Two-file survey with {len(questions)} questions and {len(structured_responses)} participant responses"
+            description = f"Two-file survey with {len(questions)} questions and {parsed['total_participants']} participant responses"
             print(f"✨ Auto-generated description: {description}")
         else:
             description = description.strip()
@@ -352,26 +389,28 @@ async def upload_two_file_survey(
             "tags": tag_list,
             "survey_type": "structured",
             "questions": questions,
-            "total_participants": len(structured_responses),
+            "total_participants": parsed["total_participants"],
             "processed_data": processed_data,
+            "participant_table": parsed["participant_table"],
+            "question_stats": parsed["question_stats"],
             "total_responses": sum(
                 data["response_count"] for data in processed_data.values()
             ),
+            "content_hash": survey_hash,
             "status": SurveyStatus.PENDING.value,
             "user_id": current_user.id,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
         }
 
-        result = await db.surveys.insert_one(survey_doc)
-        survey_id = str(result.inserted_id)
+        survey_id = await insert_survey(db, survey_doc)
 
         return {
             "survey_id": survey_id,
             "schema_file": schema_file.filename,
             "responses_file": responses_file.filename,
             "survey_type": "structured",
-            "total_participants": len(structured_responses),
+            "total_participants": parsed["total_participants"],
             "total_questions": len(questions),
             "analyzed_questions": len(processed_data),
             "total_responses": survey_doc["total_responses"],
@@ -381,72 +420,472 @@ async def upload_two_file_survey(
 
     except HTTPException:
         raise
+    except IngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing files: {str(e)}")
 
 
-@router.post("/upload-file")
-async def upload_survey_file(
-    file: UploadFile = File(...),
-    title: str = Form(None),
-    description: str = Form(None),
-    tags: str = Form(None),
+async def _start_async_ingest(
+    background_tasks: BackgroundTasks,
+    schema_file: UploadFile,
+    responses_file: UploadFile,
+    title: str,
+    description: str,
+    tags: str,
+    allow_duplicate: bool,
+    db,
+    current_user: User,
+):
+    """Spool two-file upload to disk and schedule the background ingest stage"""
+
+    if data_extension(schema_file.filename) not in SCHEMA_FILE_EXTENSIONS:
+        raise HTTPException(
+            status_code=400, detail=f"{schema_file.filename} must be CSV, JSON or XLSX"
+        )
+    if data_extension(responses_file.filename) not in RESPONSE_FILE_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{responses_file.filename} must be CSV, JSON, NDJSON, XLSX or Parquet",
+        )
+
+    spooled = []
+    try:
+        for upload in (schema_file, responses_file):
+            spooled.append(await spool_upload(upload, settings.INGEST_SPOOL_DIR))
+    except IngestError as e:
+        for path, _, _ in spooled:
+            os.remove(path)
+        raise HTTPException(status_code=413, detail=str(e))
+
+    (schema_path, _, schema_hash), (responses_path, responses_size, responses_hash) = (
+        spooled
+    )
+
+    survey_hash = content_hash("two-file", schema_hash, responses_hash)
+    if not allow_duplicate:
+        duplicate = await find_duplicate(db, current_user.id, survey_hash)
+        if duplicate:
+            os.remove(schema_path)
+            os.remove(responses_path)
+            return duplicate
+
+    return await _create_ingest_job(
+        background_tasks,
+        db,
+        current_user,
+        schema_path,
+        schema_file.filename,
+        responses_path,
+        responses_file.filename,
+        responses_size,
+        survey_hash,
+        title,
+        description,
+        tags,
+    )
+
+
+async def _create_ingest_job(
+    background_tasks: BackgroundTasks,
+    db,
+    current_user: User,
+    schema_path: str,
+    schema_filename: str,
+    responses_path: str,
+    responses_filename: str,
+    responses_size: int,
+    survey_hash: str,
+    title: str,
+    description: str,
+    tags: str,
+):
+    """Create an 'ingesting' survey for spooled files and schedule its ingest job"""
+
+    # Parse tags if provided
+    tag_list = []
+    if tags and tags.strip():
+        tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
+
+    if not title or not title.strip():
+        base_name = strip_compression(schema_filename).rsplit(".", 1)[0]
+        title = base_name.replace("_", " ").replace("-", " ").title()
+    else:
+        title = title.strip()
+
+    generate_description = not description or not description.strip()
+    description = (
+        "Two-file survey (ingesting...)"
+        if generate_description
+        else description.strip()
+    )
+
+    job_id = uuid.uuid4().hex
+    survey_doc = {
+        "title": title,
+        "description": description,
+        "tags": tag_list,
+        "survey_type": "structured",
+        "questions": [],
+        "total_participants": 0,
+        "total_responses": 0,
+        "content_hash": survey_hash,
+        "status": SurveyStatus.INGESTING.value,
+        "ingest_job": {
+            "job_id": job_id,
+            "schema_file": schema_filename,
+            "responses_file": responses_filename,
+            "started_at": datetime.utcnow(),
+        },
+        "progress": {
+            "step": "ingesting",
+            "message": "Upload received, parsing files...",
+            "rows_parsed": 0,
+            "bytes_read": 0,
+            "total_bytes": responses_size,
+            "percentage": 0,
+            "last_updated": datetime.utcnow(),
+        },
+        "user_id": current_user.id,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+    }
+
+    result = await db.surveys.insert_one(survey_doc)
+    survey_id = str(result.inserted_id)
+
+    background_tasks.add_task(
+        run_ingest_job,
+        db,
+        survey_id,
+        schema_path,
+        schema_filename,
+        responses_path,
+        responses_filename,
+        generate_description,
+    )
+
+    return {
+        "survey_id": survey_id,
+        "job_id": job_id,
+        "schema_file": schema_filename,
+        "responses_file": responses_filename,
+        "survey_type": "structured",
+        "status": SurveyStatus.INGESTING.value,
+        "message": "Upload received. Files are being processed in the background.",
+    }
+
+
+@router.post("/preview")
+async def preview_two_file_survey(
+    responses_file: UploadFile = File(...),
+    schema_file: UploadFile = File(None),
+    responses_total_size: int = Form(None),
+    sample_bytes: int = Form(PREVIEW_SAMPLE_BYTES),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Preview a two-file upload from the head of each file
+
+    Reads only the first ``sample_bytes`` (default 64KB, max 1MB) of the
+    schema and responses files and returns the detected delimiter and
+    encoding, the column to question mapping, sample rows and a row count
+    estimated from the byte offset the sample ends at. Nothing is stored.
+
+    Clients can send just the head of a large CSV/JSON/NDJSON responses file
+    (e.g. ``file.slice(0, 64 * 1024)`` in the browser) together with the full
+    file size as ``responses_total_size``. XLSX and Parquet files must be sent
+    whole, since their row index is at the end of the file.
+    """
+
+    if not 1024 <= sample_bytes <= PREVIEW_MAX_SAMPLE_BYTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"sample_bytes must be between 1024 and {PREVIEW_MAX_SAMPLE_BYTES}",
+        )
+    if data_extension(responses_file.filename) not in RESPONSE_FILE_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{responses_file.filename} must be CSV, JSON, NDJSON, XLSX or Parquet",
+        )
+    if (
+        schema_file
+        and data_extension(schema_file.filename) not in SCHEMA_FILE_EXTENSIONS
+    ):
+        raise HTTPException(
+            status_code=400, detail=f"{schema_file.filename} must be CSV, JSON or XLSX"
+        )
+
+    responses_file.file.seek(0, os.SEEK_END)
+    received_size = responses_file.file.tell()
+    responses_file.file.seek(0)
+
+    try:
+        return await asyncio.to_thread(
+            preview_upload,
+            schema_file.file if schema_file else None,
+            schema_file.filename if schema_file else None,
+            responses_file.file,
+            responses_file.filename,
+            max(responses_total_size or 0, received_size),
+            sample_bytes,
+            received_size,
+        )
+    except IngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error previewing files: {str(e)}")
+
+
+@router.post("/uploads")
+async def create_upload_session(
+    request: UploadSessionCreate,
     db=Depends(get_database),
     current_user: User = Depends(get_current_active_user),
 ):
-    """Upload survey from file (CSV, TXT, JSON) with optional metadata
+    """Start a resumable upload for one file
 
-    Args:
-        file: Survey file (CSV, TXT, or JSON)
-        title: Custom title for the survey (optional, defaults to filename)
-        description: Description of the survey (optional)
-        tags: Comma-separated tags (optional)
+    Upload the file as numbered chunks with PUT /uploads/{upload_id}/chunks/{index},
+    then combine a schema upload and a responses upload with POST /uploads/finalize.
     """
 
-    # Debug logging
-    print(f"📥 Received upload - File: {file.filename}")
-    print(f"📝 Title received: {repr(title)}")
-    print(f"📝 Description received: {repr(description)}")
-    print(f"🏷️ Tags received: {repr(tags)}")
+    if data_extension(request.filename) not in RESPONSE_FILE_EXTENSIONS:
+        raise HTTPException(
+            status_code=400, detail="File must be CSV, JSON, NDJSON, XLSX or Parquet"
+        )
 
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No file provided")
+    try:
+        session = await upload_sessions.create_session(
+            db,
+            current_user.id,
+            request.filename,
+            request.total_size,
+            request.chunk_size,
+        )
+    except IngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # Check file extension
-    ext = file.filename.lower().split(".")[-1]
-    if ext not in ["csv", "txt", "json"]:
+    return upload_sessions.session_status(session)
+
+
+@router.get("/uploads/{upload_id}")
+async def get_upload_session(
+    upload_id: str,
+    db=Depends(get_database),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Get upload session state, including the chunks still missing (for resuming)"""
+
+    session = await upload_sessions.get_session(db, upload_id, current_user.id)
+    if not session:
         raise HTTPException(
-            status_code=400,
-            detail="Unsupported file type. Please upload CSV, TXT, or JSON",
+            status_code=404, detail="Upload session not found or expired"
         )
 
-    # Read file content
-    content = await file.read()
+    return upload_sessions.session_status(session)
+
+
+@router.put("/uploads/{upload_id}/chunks/{chunk_index}")
+async def upload_chunk(
+    upload_id: str,
+    chunk_index: int,
+    request: Request,
+    x_chunk_sha256: str = Header(...),
+    db=Depends(get_database),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Upload one chunk of a resumable upload
+
+    The raw request body is the chunk content; the X-Chunk-SHA256 header carries
+    its hex SHA-256 checksum. Chunks may be sent in any order and re-sent safely.
+    """
+
+    session = await upload_sessions.get_session(db, upload_id, current_user.id)
+    if not session:
+        raise HTTPException(
+            status_code=404, detail="Upload session not found or expired"
+        )
 
     try:
-        responses = []
+        session = await upload_sessions.write_chunk(
+            db, session, chunk_index, request.stream(), x_chunk_sha256
+        )
+    except IngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        if ext == "csv":
-            # Parse CSV - supports both simple (single column) and structured (multi-column/multi-question)
-            csv_content = content.decode("utf-8")
-            csv_reader_list = list(csv.DictReader(io.StringIO(csv_content)))
+    return upload_sessions.session_status(session)
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload_session(
+    upload_id: str,
+    db=Depends(get_database),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Abort a resumable upload and discard its chunks"""
+
+    session = await upload_sessions.get_session(db, upload_id, current_user.id)
+    if not session:
+        raise HTTPException(
+            status_code=404, detail="Upload session not found or expired"
+        )
+
+    await upload_sessions.delete_session(db, session)
+
+    return {"message": "Upload session deleted"}
+
+
+@router.post("/uploads/finalize")
+async def finalize_upload_sessions(
+    request: ResumableUploadFinalize,
+    background_tasks: BackgroundTasks,
+    db=Depends(get_database),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Finalize a schema upload and a responses upload into a two-file survey
 
-            if not csv_reader_list:
-                raise HTTPException(status_code=400, detail="CSV file is empty")
+    The assembled files go through the async ingest pipeline; the response
+    matches POST /upload-two-file with async_ingest=true, including linking to
+    an existing survey when the files are identical to an earlier upload.
+    """
+
+    schema_session = await upload_sessions.get_session(
+        db, request.schema_upload_id, current_user.id
+    )
+    responses_session = await upload_sessions.get_session(
+        db, request.responses_upload_id, current_user.id
+    )
+    if not schema_session or not responses_session:
+        raise HTTPException(
+            status_code=404, detail="Upload session not found or expired"
+        )
+
+    for session in (schema_session, responses_session):
+        missing = upload_sessions.missing_chunks(session)
+        if missing:
+            raise HTTPException(
+                status_code=409,
+                detail=f"{session['filename']} is missing {len(missing)} chunk(s)",
+            )
+
+    try:
+        schema_path, _, schema_hash = await upload_sessions.assemble(db, schema_session)
+    except IngestError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        responses_path, responses_size, responses_hash = await upload_sessions.assemble(
+            db, responses_session
+        )
+    except IngestError as e:
+        os.remove(schema_path)
+        await upload_sessions.release_session(db, schema_session)
+        raise HTTPException(status_code=409, detail=str(e))
+
+    # Until the files are accepted the sessions keep their chunks; on any
+    # error they are reopened so the client can fix the request and retry
+    try:
+        # The schema is small: validate it against the responses header now,
+        # rather than failing later in the background ingest job
+        with open(schema_path, "rb") as schema_file:
+            schema_stream, schema_name = open_decompressed(
+                schema_file, schema_session["filename"]
+            )
+            questions = parse_schema(schema_stream.read(), schema_name)
+        header = responses_session["scan"]["header"]
+        if header and not any(q["question_id"] in header for q in questions):
+            raise IngestError(
+                "None of the schema question IDs appear in the responses file header"
+            )
+
+        survey_hash = content_hash("two-file", schema_hash, responses_hash)
+        duplicate = None
+        if not request.allow_duplicate:
+            duplicate = await find_duplicate(db, current_user.id, survey_hash)
+        if duplicate:
+            os.remove(schema_path)
+            os.remove(responses_path)
+            result = duplicate
+        else:
+            result = await _create_ingest_job(
+                background_tasks,
+                db,
+                current_user,
+                schema_path,
+                schema_session["filename"],
+                responses_path,
+                responses_session["filename"],
+                responses_size,
+                survey_hash,
+                request.title,
+                request.description,
+                request.tags,
+            )
+    except Exception as e:
+        for path in (schema_path, responses_path):
+            if os.path.exists(path):
+                os.remove(path)
+        for session in (schema_session, responses_session):
+            await upload_sessions.release_session(db, session)
+        if isinstance(e, IngestError):
+            raise HTTPException(status_code=400, detail=str(e))
+        raise
+
+    for session in (schema_session, responses_session):
+        await upload_sessions.complete_session(db, session)
+    return result
+
+
+def _parse_survey_file(file: UploadFile, ext: str) -> Dict[str, Any]:
+    """Parse a single-file upload (blocking, run in a worker thread)
+
+    Multi-question files are preprocessed as well and returned as
+    ``{"survey_type": "structured", "questions", "total_participants",
+    "processed_data", "participant_table", "question_stats"}``; other files
+    as ``{"survey_type": "simple", "responses"}`` with the raw responses.
+    """
+    responses = []
+
+    # Read straight from the upload stream, decompressing if needed
+    stream, _ = open_decompressed(file.file, file.filename)
+
+    if ext in ["csv"] + SPREADSHEET_EXTENSIONS + PARQUET_EXTENSIONS:
+        # Parse CSV - supports both simple (single column) and structured (multi-column/multi-question)
+        # Rows are read one at a time, straight into answer columns or responses
+        if ext == "csv":
+            text_stream = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+            table = nullcontext((None, csv.DictReader(text_stream)))
+        elif ext in PARQUET_EXTENSIONS:
+            table = nullcontext((None, iter_parquet_records(stream)))
+        else:
+            # Sheet rows read like CSV rows, or schema + responses sheets
+            table = open_workbook_rows(stream)
+
+        survey_type = "simple"
+        with table as (schema_questions, rows):
+            first_row = next(rows, None)
+            if first_row is None:
+                raise HTTPException(
+                    status_code=400, detail=f"{ext.upper()} file is empty"
+                )
+            rows = itertools.chain([first_row], rows)
 
             # Check if this is a multi-question survey (multiple columns)
-            headers = list(csv_reader_list[0].keys())
+            headers = list(first_row.keys())
 
             # If multiple substantive columns, treat as structured survey
             substantive_columns = [
                 h for h in headers if h.strip() and not h.lower().startswith("id")
             ]
 
-            if len(substantive_columns) > 1:
+            if schema_questions:
+                # Workbook with schema and responses sheets
+                survey_type = "structured"
+                questions = schema_questions
+                columns = ResponseColumns(questions).extend(rows)
+
+            elif len(substantive_columns) > 1:
                 # Multi-question survey detected
                 survey_type = "structured"
                 questions = []
-                structured_responses = []
 
                 # Create questions from headers
                 for idx, col in enumerate(substantive_columns):
@@ -460,92 +899,26 @@ async def upload_survey_file(
                     )
 
                 # Extract responses
-                for row in csv_reader_list:
+                columns = ResponseColumns(questions)
+                for row in rows:
                     response_dict = {}
                     for idx, col in enumerate(substantive_columns):
                         if col in row and row[col]:
                             response_dict[f"q_{idx+1}"] = str(row[col]).strip()
                     if response_dict:
-                        structured_responses.append(response_dict)
-
-                # Process structured data
-                processed_data = {}
-                for question in questions:
-                    question_responses = []
-                    for response_dict in structured_responses:
-                        if question["question_id"] in response_dict:
-                            answer = response_dict[question["question_id"]]
-                            if answer:
-                                question_responses.append(answer)
-
-                    if question_responses:
-                        cleaned = preprocessor.preprocess_batch(question_responses)
-                        processed_data[question["question_id"]] = {
-                            "question_text": question["question_text"],
-                            "question_type": question["question_type"],
-                            "responses": cleaned,
-                            "response_count": len(cleaned),
-                        }
+                        columns.add(response_dict)
 
-                # Parse tags if provided
-                tag_list = []
-                if tags and tags.strip():
-                    tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
-
-                # Generate friendly title and description only if not provided
-                if not title or not title.strip():
-                    # Remove file extension and make title-case
-                    base_name = file.filename.rsplit(".", 1)[0]
-                    # Replace common separators with spaces and title-case
-                    title = base_name.replace("_", " ").replace("-", " ").title()
-                    print(f"✨ Auto-generated title: {title}")
-                else:
-                    title = title.strip()
-                    print(f"✅ Using provided title: {title}")
-
-                if not description or not description.strip():
-                    description = f"Survey with {len(questions)} questions and {len(structured_responses)} participant responses"
-                    print(f"✨ Auto-generated description: {description}")
-                else:
-                    description = description.strip()
-                    print(f"✅ Using provided description: {description}")
-
-                # Create structured survey document
-                survey_doc = {
-                    "title": title,
-                    "description": description,
-                    "tags": tag_list,
-                    "survey_type": "structured",
-                    "questions": questions,
-                    "total_participants": len(structured_responses),
-                    "processed_data": processed_data,
-                    "total_responses": sum(
-                        data["response_count"] for data in processed_data.values()
-                    ),
-                    "status": SurveyStatus.PENDING.value,
-                    "user_id": current_user.id,
-                    "created_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow(),
-                }
-
-                result = await db.surveys.insert_one(survey_doc)
-                survey_id = str(result.inserted_id)
-
-                return {
-                    "survey_id": survey_id,
-                    "filename": file.filename,
-                    "survey_type": "structured",
-                    "total_participants": len(structured_responses),
-                    "total_questions": len(questions),
-                    "total_responses": survey_doc["total_responses"],
-                    "status": "uploaded",
-                    "message": f"Multi-question survey with {len(questions)} questions uploaded successfully",
-                }
             else:
                 # Single column/question - simple survey
-                for row in csv_reader_list:
+                for row in rows:
                     # Look for common column names
-                    for col in ["response", "text", "feedback", "comment", "answer"]:
+                    for col in [
+                        "response",
+                        "text",
+                        "feedback",
+                        "comment",
+                        "answer",
+                    ]:
                         if col in [k.lower() for k in row.keys()]:
                             actual_col = [k for k in row.keys() if k.lower() == col][0]
                             responses.append(row[actual_col])
@@ -557,41 +930,188 @@ async def upload_survey_file(
                         else:
                             responses.append(list(row.values())[0])
 
-        elif ext == "txt":
-            # Parse TXT (one response per line)
-            txt_content = content.decode("utf-8")
-            responses = [
-                line.strip() for line in txt_content.split("\n") if line.strip()
-            ]
+        if survey_type == "structured":
+            # Process structured data
+            processed_data = build_processed_data(questions, columns, preprocessor)
 
-        elif ext == "json":
-            # Parse JSON
-            json_content = json.loads(content.decode("utf-8"))
-
-            if isinstance(json_content, list):
-                # List of strings or objects
-                for item in json_content:
-                    if isinstance(item, str):
-                        responses.append(item)
-                    elif isinstance(item, dict):
-                        # Look for response field
-                        for key in ["response", "text", "feedback", "comment"]:
-                            if key in item:
-                                responses.append(item[key])
-                                break
-            elif isinstance(json_content, dict):
-                # Single object with responses array
-                if "responses" in json_content:
-                    responses = json_content["responses"]
+            if not processed_data:
+                raise HTTPException(
+                    status_code=400,
+                    detail="No valid responses after preprocessing",
+                )
 
+            return {
+                "survey_type": "structured",
+                "questions": questions,
+                "total_participants": columns.participants,
+                "processed_data": processed_data,
+                **build_participant_data(questions, columns),
+            }
+
+    elif ext == "txt":
+        # Parse TXT (one response per line)
+        text_stream = io.TextIOWrapper(stream, encoding="utf-8")
+        responses = [line.strip() for line in text_stream if line.strip()]
+
+    else:
+        # Parse JSON array / {"responses": [...]} incrementally, or NDJSON
+        items = (
+            iter_json_records(stream, "responses")
+            if ext == "json"
+            else iter_ndjson_records(stream)
+        )
+
+        # Strings or objects, one at a time
+        for item in items:
+            if isinstance(item, str):
+                responses.append(item)
+            elif isinstance(item, dict):
+                # Look for response field
+                for key in ["response", "text", "feedback", "comment"]:
+                    if key in item:
+                        responses.append(item[key])
+                        break
+
+    return {"survey_type": "simple", "responses": responses}
+
+
+@router.post("/upload-file")
+async def upload_survey_file(
+    file: UploadFile = File(...),
+    title: str = Form(None),
+    description: str = Form(None),
+    tags: str = Form(None),
+    allow_duplicate: bool = Form(False),
+    db=Depends(get_database),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Upload survey from file (CSV, TXT, JSON, XLSX, Parquet) with optional metadata
+
+    Files may be compressed (.gz, .bz2, .xz, .zip, and .zst when zstandard is
+    installed); they are decompressed as a stream while parsing.
+
+    XLSX workbooks with "schema" and "responses" sheets are read like a
+    two-file upload; otherwise the first sheet is read like a CSV file.
+
+    Args:
+        file: Survey file (CSV, TXT, JSON, NDJSON, XLSX or Parquet, optionally
+            compressed). Parquet files are read like CSV files.
+        title: Custom title for the survey (optional, defaults to filename)
+        description: Description of the survey (optional)
+        tags: Comma-separated tags (optional)
+        allow_duplicate: Create a new survey even if this user already uploaded
+            an identical file (optional); see POST /upload-two-file
+    """
+
+    # Debug logging
+    print(f"📥 Received upload - File: {file.filename}")
+    print(f"📝 Title received: {repr(title)}")
+    print(f"📝 Description received: {repr(description)}")
+    print(f"🏷️ Tags received: {repr(tags)}")
+
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+
+    # Check file extension (of the data inside compressed files)
+    ext = data_extension(file.filename)
+    if (
+        ext
+        not in ["csv", "txt", "json"]
+        + NDJSON_EXTENSIONS
+        + SPREADSHEET_EXTENSIONS
+        + PARQUET_EXTENSIONS
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail="Unsupported file type. Please upload CSV, TXT, JSON, NDJSON, XLSX or Parquet",
+        )
+
+    # Hash the raw file before parsing: identical re-uploads cost nothing
+    survey_hash = content_hash("file", await asyncio.to_thread(hash_stream, file.file))
+    if not allow_duplicate:
+        duplicate = await find_duplicate(db, current_user.id, survey_hash)
+        if duplicate:
+            return duplicate
+
+    try:
+        # Decompressing and parsing (and preprocessing multi-question files)
+        # run in a worker thread so other requests are served meanwhile
+        parsed = await asyncio.to_thread(_parse_survey_file, file, ext)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error parsing file: {str(e)}")
 
+    if parsed["survey_type"] == "structured":
+        questions = parsed["questions"]
+        processed_data = parsed["processed_data"]
+
+        # Parse tags if provided
+        tag_list = []
+        if tags and tags.strip():
+            tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
+
+        # Generate friendly title and description only if not provided
+        if not title or not title.strip():
+            # Remove file extension and make title-case
+            base_name = strip_compression(file.filename).rsplit(".", 1)[0]
+            # Replace common separators with spaces and title-case
+            title = base_name.replace("_", " ").replace("-", " ").title()
+            print(f"✨ Auto-generated title: {title}")
+        else:
+            title = title.strip()
+            print(f"✅ Using provided title: {title}")
+
+        if not description or not description.strip():
+            description = f"Survey with {len(questions)} questions and {parsed['total_participants']} participant responses"
+            print(f"✨ Auto-generated description: {description}")
+        else:
+            description = description.strip()
+            print(f"✅ Using provided description: {description}")
+
+        # Create structured survey document
+        survey_doc = {
+            "title": title,
+            "description": description,
+            "tags": tag_list,
+            "survey_type": "structured",
+            "questions": questions,
+            "total_participants": parsed["total_participants"],
+            "processed_data": processed_data,
+            "participant_table": parsed["participant_table"],
+            "question_stats": parsed["question_stats"],
+            "total_responses": sum(
+                data["response_count"] for data in processed_data.values()
+            ),
+            "content_hash": survey_hash,
+            "status": SurveyStatus.PENDING.value,
+            "user_id": current_user.id,
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+        }
+
+        survey_id = await insert_survey(db, survey_doc)
+
+        return {
+            "survey_id": survey_id,
+            "filename": file.filename,
+            "survey_type": "structured",
+            "total_participants": parsed["total_participants"],
+            "total_questions": len(questions),
+            "total_responses": survey_doc["total_responses"],
+            "status": "uploaded",
+            "message": f"Multi-question survey with {len(questions)} questions uploaded successfully",
+        }
+
+    responses = parsed["responses"]
+
     if not responses:
         raise HTTPException(status_code=400, detail="No responses found in file")
 
     # Preprocess responses
-    cleaned_responses = preprocessor.preprocess_batch(responses)
+    cleaned_responses = await asyncio.to_thread(
+        preprocessor.preprocess_batch, responses
+    )
 
     # Parse tags if provided
     tag_list = []
@@ -601,7 +1121,7 @@ async def upload_survey_file(
     # Generate friendly title and description only if not provided
     if not title or not title.strip():
         # Remove file extension and make title-case
-        base_name = file.filename.rsplit(".", 1)[0]
+        base_name = strip_compression(file.filename).rsplit(".", 1)[0]
         # Replace common separators with spaces and title-case
         title = base_name.replace("_", " ").replace("-", " ").title()
         print(f"✨ Auto-generated title: {title}")
@@ -624,14 +1144,14 @@ async def upload_survey_file(
         "survey_type": "simple",
         "total_responses": len(cleaned_responses),
         "responses": cleaned_responses,
+        "content_hash": survey_hash,
         "status": SurveyStatus.PENDING.value,
         "user_id": current_user.id,
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
     }
 
-    result = await db.surveys.insert_one(survey_doc)
-    survey_id = str(result.inserted_id)
+    survey_id = await insert_survey(db, survey_doc)
 
     return {
         "survey_id": survey_id,
@@ -641,32 +1161,136 @@ async def upload_survey_file(
     }
 
 
+# Page size of GET /surveys/{id}/responses
+RESPONSE_PAGE_SIZE = 50
+MAX_RESPONSE_PAGE_SIZE = 1000
+
+# Survey fields read by the segment and cross-tab routes (participant
+# tables are only stored for surveys using the response store)
+SEGMENT_PROJECTION = {"questions": 1, "participant_index": 1}
+
+# Page size of GET /surveys
+SURVEY_PAGE_SIZE = 50
+MAX_SURVEY_PAGE_SIZE = 200
+
+# Fields returned by GET /surveys when ``fields`` is not given
+SURVEY_LIST_FIELDS = [
+    "title",
+    "description",
+    "tags",
+    "survey_type",
+    "total_responses",
+    "total_participants",
+    "question_count",
+    "status",
+    "created_at",
+]
+
+# Fields that may be requested through ``fields``
+SURVEY_LIST_OPTIONAL_FIELDS = ["questions", "updated_at", "progress", "error"]
+
+
+def _encode_survey_cursor(doc: dict) -> str:
+    """Opaque keyset cursor pointing after a survey (created_at, _id)"""
+    key = f"{doc['created_at'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def _decode_survey_cursor(cursor: str) -> dict:
+    """Query filter selecting the surveys listed after a cursor"""
+    try:
+        created_at, survey_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        created_at = datetime.fromisoformat(created_at)
+        survey_id = ObjectId(survey_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": survey_id}},
+        ]
+    }
+
+
 @router.get("/")
 async def get_surveys(
-    db=Depends(get_database), current_user: User = Depends(get_current_active_user)
+    limit: int = SURVEY_PAGE_SIZE,
+    cursor: str = None,
+    fields: str = None,
+    db=Depends(get_database),
+    current_user: User = Depends(get_current_active_user),
 ):
-    """Get all surveys for the current user"""
+    """Get the current user's surveys, newest first, one page at a time
 
-    cursor = db.surveys.find({"user_id": current_user.id}).sort("created_at", -1)
-    surveys = []
+    Args:
+        limit: Surveys per page (max MAX_SURVEY_PAGE_SIZE)
+        cursor: ``next_cursor`` of the previous page
+        fields: Comma-separated fields to return instead of the default
+            lean set (e.g. "title,status,questions")
+    """
 
-    async for doc in cursor:
-        surveys.append(
-            {
-                "survey_id": str(doc["_id"]),
-                "title": doc["title"],
-                "description": doc.get("description"),
-                "tags": doc.get("tags", []),
-                "survey_type": doc.get("survey_type", "simple"),
-                "total_responses": doc["total_responses"],
-                "total_participants": doc.get("total_participants"),
-                "questions": doc.get("questions", []),
-                "status": doc["status"],
-                "created_at": doc["created_at"].isoformat(),
-            }
+    if not 1 <= limit <= MAX_SURVEY_PAGE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit must be between 1 and {MAX_SURVEY_PAGE_SIZE}",
         )
 
-    return {"surveys": surveys, "total": len(surveys)}
+    selected = SURVEY_LIST_FIELDS
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [
+            field
+            for field in selected
+            if field not in SURVEY_LIST_FIELDS + SURVEY_LIST_OPTIONAL_FIELDS
+        ]
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+
+    query = {"user_id": current_user.id}
+    if cursor:
+        query.update(_decode_survey_cursor(cursor))
+
+    # created_at is always projected: it is the cursor key
+    projection = {field: 1 for field in selected if field != "question_count"}
+    projection["created_at"] = 1
+    if "question_count" in selected:
+        projection["question_count"] = {"$size": {"$ifNull": ["$questions", []]}}
+
+    # Served by the (user_id, created_at) index; one extra row tells if more follow
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"created_at": -1, "_id": -1}},
+        {"$limit": limit + 1},
+        {"$project": projection},
+    ]
+    docs = [doc async for doc in db.surveys.aggregate(pipeline)]
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+
+    surveys = []
+    for doc in docs:
+        survey = {"survey_id": doc["_id"]}
+        for field in selected:
+            value = doc.get(field)
+            if field == "survey_type":
+                value = value or "simple"
+            elif field == "tags":
+                value = value or []
+            survey[field] = value
+        surveys.append(survey)
+
+    return FastJSONResponse(
+        {
+            "surveys": surveys,
+            "total": await db.surveys.count_documents({"user_id": current_user.id}),
+            "next_cursor": _encode_survey_cursor(docs[-1]) if has_more else None,
+        }
+    )
 
 
 @router.get("/{survey_id}")
@@ -675,11 +1299,16 @@ async def get_survey(
     db=Depends(get_database),
     current_user: User = Depends(get_current_active_user),
 ):
-    """Get survey details"""
+    """Get survey details (metadata only)
+
+    Responses are not included; page through them with
+    GET /surveys/{id}/responses.
+    """
 
     try:
         doc = await db.surveys.find_one(
-            {"_id": ObjectId(survey_id), "user_id": current_user.id}
+            {"_id": ObjectId(survey_id), "user_id": current_user.id},
+            projection={"responses": 0},
         )
     except:
         raise HTTPException(status_code=400, detail="Invalid survey ID")
@@ -687,23 +1316,255 @@ async def get_survey(
     if not doc:
         raise HTTPException(status_code=404, detail="Survey not found")
 
+    # Older surveys embed each question's responses in processed_data
+    processed_data = {
+        question_id: {key: value for key, value in data.items() if key != "responses"}
+        for question_id, data in doc.get("processed_data", {}).items()
+    }
+
+    return FastJSONResponse(
+        {
+            "survey_id": doc["_id"],
+            "title": doc["title"],
+            "description": doc.get("description"),
+            "tags": doc.get("tags", []),
+            "survey_type": doc.get("survey_type", "simple"),
+            "total_responses": doc["total_responses"],
+            "total_participants": doc.get("total_participants"),
+            "questions": doc.get("questions", []),
+            "processed_data": processed_data,
+            "question_stats": doc.get("question_stats", {}),
+            "segment_options": segment_options(doc.get("participant_index")),
+            "status": doc["status"],
+            "created_at": doc["created_at"],
+            "updated_at": doc["updated_at"],
+        }
+    )
+
+
+@router.get("/{survey_id}/responses")
+async def get_survey_responses(
+    survey_id: str,
+    question_id: str = None,
+    cursor: str = None,
+    limit: int = RESPONSE_PAGE_SIZE,
+    format: str = "json",
+    db=Depends(get_database),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Page through the (preprocessed) responses of one question
+
+    Args:
+        question_id: Question to read (required for structured surveys,
+            omitted for simple surveys)
+        cursor: ``next_cursor`` of the previous page
+        limit: Responses per page (max MAX_RESPONSE_PAGE_SIZE)
+        format: "json" for one page, or "ndjson" to stream every response
+            from the cursor on as {"index", "response"} lines
+    """
+
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+    if not 1 <= limit <= MAX_RESPONSE_PAGE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit must be between 1 and {MAX_RESPONSE_PAGE_SIZE}",
+        )
+    try:
+        start = int(cursor) if cursor else 0
+        if start < 0:
+            raise ValueError
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Question IDs are document keys: reject paths that could not be one
+    if question_id and ("." in question_id or question_id.startswith("$")):
+        raise HTTPException(
+            status_code=400,
+            detail="question_id must be one of the survey's analyzed questions",
+        )
+
+    # Metadata only: the page is read from the response store
+    projection = {"survey_type": 1, "total_responses": 1, "response_storage": 1}
+    if question_id:
+        projection[f"processed_data.{question_id}.response_count"] = 1
+    try:
+        doc = await db.surveys.find_one(
+            {"_id": ObjectId(survey_id), "user_id": current_user.id},
+            projection=projection,
+        )
+    except:
+        raise HTTPException(status_code=400, detail="Invalid survey ID")
+
+    if not doc:
+        raise HTTPException(status_code=404, detail="Survey not found")
+
+    if doc.get("survey_type", "simple") == "structured":
+        processed_data = doc.get("processed_data", {})
+        if question_id not in processed_data:
+            raise HTTPException(
+                status_code=400,
+                detail="question_id must be one of the survey's analyzed questions",
+            )
+        total = processed_data[question_id].get("response_count", 0)
+    else:
+        if question_id:
+            raise HTTPException(
+                status_code=400, detail="Simple surveys have no question_id"
+            )
+        question_id = SIMPLE_QUESTION_ID
+        total = doc.get("total_responses", 0)
+
+    if not uses_response_store(doc):
+        # Older surveys embed responses: read only the requested question's
+        embedded_field = (
+            "responses"
+            if question_id == SIMPLE_QUESTION_ID
+            else f"processed_data.{question_id}.responses"
+        )
+        doc = await db.surveys.find_one(
+            {"_id": doc["_id"]}, projection={embedded_field: 1}
+        )
+
+    if format == "ndjson":
+
+        async def stream():
+            async for index, response in iter_responses_from(
+                db, doc, question_id, start
+            ):
+                yield json.dumps({"index": index, "response": response}) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    responses = await read_response_page(db, doc, question_id, start, limit)
+    end = start + len(responses)
+    return {
+        "survey_id": survey_id,
+        "question_id": None if question_id == SIMPLE_QUESTION_ID else question_id,
+        "responses": responses,
+        "start": start,
+        "total": total,
+        "next_cursor": str(end) if end < total else None,
+    }
+
+
+def _summarize_segment(table: ParticipantTable, questions: List[dict], mask) -> dict:
+    """Answers of the participants in a segment mask, question by question"""
+    summaries = []
+    for question in questions:
+        question_id = question["question_id"]
+        column = table.columns[question_id]
+        answers = table.answers(question_id, mask)
+        summary = {
+            "question_id": question_id,
+            "question_text": question.get("question_text"),
+            "question_type": column["question_type"],
+            "column_kind": column["kind"],
+            "response_count": len(answers),
+        }
+        if column["kind"] == CATEGORICAL:
+            # Categorical open-ended columns are tallied like multiple choice
+            question_type = (
+                column["question_type"]
+                if is_closed_question(column["question_type"])
+                else "multiple_choice"
+            )
+            summary["statistics"] = analyze_closed_question(
+                question.get("question_text", ""), question_type, answers
+            )["statistics"]
+        else:
+            summary["sample_responses"] = answers[:5]
+        summaries.append(summary)
+
     return {
-        "survey_id": str(doc["_id"]),
-        "title": doc["title"],
-        "description": doc.get("description"),
-        "tags": doc.get("tags", []),
-        "survey_type": doc.get("survey_type", "simple"),
-        "total_responses": doc["total_responses"],
-        "total_participants": doc.get("total_participants"),
-        "questions": doc.get("questions", []),
-        "responses": doc.get("responses", []),
-        "processed_data": doc.get("processed_data", {}),
-        "status": doc["status"],
-        "created_at": doc["created_at"].isoformat(),
-        "updated_at": doc["updated_at"].isoformat(),
+        "participants": int(mask.sum()),
+        "total_participants": table.participants,
+        "questions": summaries,
     }
 
 
+@router.post("/{survey_id}/segment")
+async def get_survey_segment(
+    survey_id: str,
+    query: SegmentQuery,
+    db=Depends(get_database),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Summarize the answers of the participants matching a segment filter
+
+    ``segment`` maps question IDs of categorical questions to the accepted
+    value(s), e.g. ``{"q1": ["Python", "Go"], "q4": "Europe"}``. Participants
+    must match every question; multi-select answers match any selected
+    option. The available values are listed in GET /surveys/{id} under
+    ``segment_options``.
+    """
+
+    try:
+        doc = await db.surveys.find_one(
+            {"_id": ObjectId(survey_id), "user_id": current_user.id},
+            projection=SEGMENT_PROJECTION,
+        )
+    except:
+        raise HTTPException(status_code=400, detail="Invalid survey ID")
+
+    if not doc:
+        raise HTTPException(status_code=404, detail="Survey not found")
+
+    questions = [
+        question
+        for question in doc.get("questions", [])
+        if query.question_ids is None or question["question_id"] in query.question_ids
+    ]
+    try:
+        mask = await resolve_segment(db, doc, query.segment)
+        table = await load_participant_table(
+            db, doc, [question["question_id"] for question in questions]
+        )
+        result = await asyncio.to_thread(_summarize_segment, table, questions, mask)
+    except SegmentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"survey_id": survey_id, "segment": query.segment, **result}
+
+
+@router.post("/{survey_id}/crosstab")
+async def get_survey_crosstab(
+    survey_id: str,
+    query: CrosstabRequest,
+    db=Depends(get_database),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Cross-tabulate the answers to two categorical questions
+
+    Counts participants for every pair of options, optionally within a
+    segment (same format as POST /surveys/{id}/segment).
+    """
+
+    try:
+        doc = await db.surveys.find_one(
+            {"_id": ObjectId(survey_id), "user_id": current_user.id},
+            projection=SEGMENT_PROJECTION,
+        )
+    except:
+        raise HTTPException(status_code=400, detail="Invalid survey ID")
+
+    if not doc:
+        raise HTTPException(status_code=404, detail="Survey not found")
+
+    try:
+        mask = await resolve_segment(db, doc, query.segment) if query.segment else None
+        table = await load_participant_table(
+            db, doc, [query.row_question_id, query.column_question_id]
+        )
+        result = await asyncio.to_thread(
+            table.crosstab, query.row_question_id, query.column_question_id, mask
+        )
+    except SegmentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"survey_id": survey_id, "segment": query.segment, **result}
+
+
 @router.delete("/{survey_id}")
 async def delete_survey(
     survey_id: str,
@@ -722,7 +1583,9 @@ async def delete_survey(
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Survey not found")
 
-    # Also delete associated analyses
+    # Also delete associated analyses and stored responses
+    status_cache.invalidate(survey_id)
     await db.analyses.delete_many({"survey_id": survey_id})
+    await delete_responses(db, survey_id)
 
     return {"message": "Survey deleted successfully"}
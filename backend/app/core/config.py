@@ -2,6 +2,7 @@ from pydantic_settings import BaseSettings
 from pydantic import field_validator, model_validator
 from typing import List, Union
 import os
+import tempfile
 
 
 class Settings(BaseSettings):
@@ -37,10 +38,39 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # bcrypt cost factor of new password hashes (2^rounds iterations)
+    BCRYPT_ROUNDS: int = 12
+    # Threads hashing and verifying passwords
+    PASSWORD_HASH_WORKERS: int = 4
+    # Authenticated users are cached this long (seconds) per process
+    USER_CACHE_TTL: float = 60.0
+    # Entries of the user and verified-token caches
+    AUTH_CACHE_SIZE: int = 10000
 
     # File Upload
     MAX_UPLOAD_SIZE: int = 250 * 1024 * 1024  # 250MB (increased for large survey files)
     ALLOWED_EXTENSIONS: List[str] = [".csv", ".txt", ".json"]
+    # Compressed uploads (.gz/.bz2/.xz/.zip/.zst) may expand up to this size
+    MAX_DECOMPRESSED_SIZE: int = 2 * 1024 * 1024 * 1024  # 2GB
+    # Directory where async ingest uploads are spooled before parsing
+    INGEST_SPOOL_DIR: str = os.path.join(tempfile.gettempdir(), "surveypulse-ingest")
+    # Resumable uploads (bytes per chunk)
+    UPLOAD_CHUNK_SIZE: int = 8 * 1024 * 1024  # 8MB
+    UPLOAD_MAX_CHUNK_SIZE: int = 64 * 1024 * 1024  # 64MB
+    # Per-survey columnar response cache (Arrow files, needs pyarrow); empty disables it
+    COLUMN_CACHE_DIR: str = ""
+
+    # Responses larger than this are brotli/gzip compressed (bytes)
+    COMPRESSION_MIN_SIZE: int = 1024
+
+    # Progress updates are written to MongoDB at most this often (seconds);
+    # status changes are always written at once
+    PROGRESS_WRITE_INTERVAL: float = 2.0
+    # Status reads (/status, event stream fallback) are cached this long (seconds)
+    STATUS_CACHE_TTL: float = 2.0
+    # Progress event streams re-read the status from MongoDB after this many
+    # seconds without an in-process event (analyses run by other processes)
+    PROGRESS_FALLBACK_INTERVAL: float = 5.0
 
     # Analysis
     MAX_RESPONSES_PER_BATCH: int = 50
@@ -3,6 +3,7 @@ from pymongo.errors import ConnectionFailure
 import logging
 
 from app.core.config import settings
+from app.core.indexes import ensure_indexes, index_report
 
 logger = logging.getLogger(__name__)
 
@@ -35,20 +36,10 @@ async def connect_to_mongo():
 
 
 async def create_indexes():
-    """Create database indexes"""
+    """Apply the index registry and report missing or unused indexes"""
     try:
-        # Unique index on email for users collection
-        await db.db.users.create_index("email", unique=True)
-        logger.info("Created unique index on users.email")
-
-        # Index on user_id for surveys (for filtering user's surveys)
-        await db.db.surveys.create_index("user_id")
-        logger.info("Created index on surveys.user_id")
-
-        # Index on survey_id for analyses
-        await db.db.analyses.create_index("survey_id")
-        logger.info("Created index on analyses.survey_id")
-
+        await ensure_indexes(db.db)
+        await index_report(db.db)
     except Exception as e:
         logger.warning(f"Error creating indexes: {e}")
 
@@ -1,7 +1,7 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
-from app.services.auth_service import decode_token, get_user_by_email
+from app.services.auth_service import decode_token, get_cached_user
 from app.models.user import User
 
 security = HTTPBearer()
@@ -11,7 +11,33 @@ async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> User:
     """Get current authenticated user from JWT token"""
-    token = credentials.credentials
+    return await authenticate_token(credentials.credentials)
+
+
+async def get_stream_user(
+    token: Optional[str] = Query(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(
+        HTTPBearer(auto_error=False)
+    ),
+) -> User:
+    """Get current user of an event stream
+
+    Browsers cannot set headers on EventSource requests, so the access token
+    may also be passed as the ``token`` query parameter.
+    """
+    if credentials:
+        token = credentials.credentials
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await authenticate_token(token)
+
+
+async def authenticate_token(token: str) -> User:
+    """Resolve an access token to its active user"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -33,7 +59,7 @@ async def get_current_user(
     if email is None:
         raise credentials_exception
 
-    user = await get_user_by_email(email)
+    user = await get_cached_user(email)
     if user is None:
         raise credentials_exception
 
@@ -42,13 +68,7 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user"
         )
 
-    return User(
-        id=user.id,
-        email=user.email,
-        full_name=user.full_name,
-        is_active=user.is_active,
-        created_at=user.created_at,
-    )
+    return user
 
 
 async def get_current_active_user(
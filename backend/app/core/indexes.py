@@ -0,0 +1,189 @@
+"""
+MongoDB index registry
+
+Every index the application relies on is declared in ``INDEXES``. At
+startup ``ensure_indexes`` creates them and drops ``RETIRED_INDEXES``, but
+only when the registry version stored in the ``meta`` collection is older
+than ``INDEX_REGISTRY_VERSION``; bump the version whenever the declarations
+change. ``index_report`` then compares the declarations with the indexes
+that exist and with their usage counters (``$indexStats``, counted since the
+MongoDB server started) and logs missing and unused indexes; it is computed
+again for every GET /health/detailed, so usage reflects the current counters.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEX_REGISTRY_VERSION = 3
+
+# Document of the meta collection holding the applied registry version
+REGISTRY_META_ID = "index_registry"
+
+
+class IndexSpec:
+    """One declared index: collection, keys and create_index options"""
+
+    def __init__(
+        self,
+        collection: str,
+        keys: Sequence[Tuple[str, int]],
+        reason: str,
+        **options: Any,
+    ):
+        self.collection = collection
+        self.keys = list(keys)
+        self.reason = reason
+        self.options = options
+
+    @property
+    def name(self) -> str:
+        """Index name (MongoDB's default name for the keys)"""
+        return self.options.get("name") or "_".join(
+            f"{field}_{direction}" for field, direction in self.keys
+        )
+
+
+INDEXES: List[IndexSpec] = [
+    IndexSpec("users", [("email", 1)], "login and token lookups", unique=True),
+    IndexSpec(
+        "surveys",
+        [("user_id", 1), ("created_at", -1)],
+        "GET /surveys keyset pages, newest first",
+    ),
+    IndexSpec(
+        "surveys",
+        [("user_id", 1), ("content_hash", 1)],
+        "duplicate upload lookups",
+    ),
+    # Only the few surveys waiting for or under analysis are indexed; $in in
+    # partialFilterExpression needs MongoDB 6.0+
+    IndexSpec(
+        "surveys",
+        [("status", 1)],
+        "pending-survey pollers (SurveyProcessor, cron)",
+        name="status_active",
+        partialFilterExpression={"status": {"$in": ["pending", "processing"]}},
+    ),
+    IndexSpec(
+        "analyses",
+        [("survey_id", 1), ("created_at", -1)],
+        "latest analysis of a survey, analysis history",
+    ),
+    IndexSpec(
+        "responses",
+        [("survey_id", 1), ("question_id", 1), ("chunk_index", 1)],
+        "response store chunks, in order",
+    ),
+    IndexSpec(
+        "participant_columns",
+        [("survey_id", 1), ("question_id", 1), ("chunk_index", 1)],
+        "participant table columns, in order",
+    ),
+    IndexSpec(
+        "participant_bitmaps",
+        [("survey_id", 1), ("question_id", 1), ("value", 1)],
+        "segment filter bitmaps",
+    ),
+    IndexSpec(
+        "upload_sessions",
+        [("upload_id", 1)],
+        "resumable upload chunks",
+        unique=True,
+    ),
+    IndexSpec(
+        "upload_sessions",
+        [("expires_at", 1)],
+        "abandoned upload sessions expire (TTL)",
+        expireAfterSeconds=0,
+    ),
+]
+
+# Indexes of earlier registry versions, superseded by a compound index
+# starting with the same field
+RETIRED_INDEXES: List[Tuple[str, str]] = [
+    ("surveys", "user_id_1"),
+    ("analyses", "survey_id_1"),
+]
+
+
+async def ensure_indexes(db) -> bool:
+    """Create declared indexes and drop retired ones if the registry changed
+
+    Returns whether the registry was applied.
+    """
+    meta = await db.meta.find_one({"_id": REGISTRY_META_ID})
+    applied_version = meta.get("version", 0) if meta else 0
+    if applied_version >= INDEX_REGISTRY_VERSION:
+        return False
+
+    logger.info(
+        f"Applying index registry v{INDEX_REGISTRY_VERSION} "
+        f"(database has v{applied_version})"
+    )
+    failed = 0
+    for spec in INDEXES:
+        try:
+            await db[spec.collection].create_index(spec.keys, **spec.options)
+            logger.info(f"Index {spec.collection}.{spec.name}: {spec.reason}")
+        except OperationFailure as e:
+            failed += 1
+            logger.warning(f"Could not create index {spec.collection}.{spec.name}: {e}")
+
+    for collection, name in RETIRED_INDEXES:
+        try:
+            await db[collection].drop_index(name)
+            logger.info(f"Dropped retired index {collection}.{name}")
+        except OperationFailure:
+            pass  # never created or already dropped
+
+    # Retry failed indexes on the next startup
+    if not failed:
+        await db.meta.update_one(
+            {"_id": REGISTRY_META_ID},
+            {"$set": {"version": INDEX_REGISTRY_VERSION}},
+            upsert=True,
+        )
+    return True
+
+
+async def index_report(db, log: bool = True) -> Dict[str, Any]:
+    """Declared indexes that are missing and existing indexes never used
+
+    ``unused`` is None when the server does not support ``$indexStats``.
+    Missing and unused indexes are logged unless ``log`` is false.
+    """
+    missing = []
+    unused: Optional[List[str]] = []
+    declared = {}
+    for spec in INDEXES:
+        declared.setdefault(spec.collection, []).append(spec.name)
+
+    for collection, names in declared.items():
+        existing = {index["name"] async for index in db[collection].list_indexes()}
+        missing += [f"{collection}.{name}" for name in names if name not in existing]
+
+        if unused is None:
+            continue
+        try:
+            stats = db[collection].aggregate([{"$indexStats": {}}])
+            unused += [
+                f"{collection}.{stat['name']}"
+                async for stat in stats
+                if stat["name"] != "_id_" and not stat["accesses"]["ops"]
+            ]
+        except OperationFailure:
+            unused = None
+
+    if log and missing:
+        logger.warning(f"Missing indexes: {', '.join(missing)}")
+    if log and unused:
+        logger.info(f"Indexes unused since the server started: {', '.join(unused)}")
+    return {
+        "registry_version": INDEX_REGISTRY_VERSION,
+        "missing": missing,
+        "unused": unused,
+    }
@@ -0,0 +1,103 @@
+"""
+Fast JSON responses and compression
+
+``FastJSONResponse`` serializes with orjson, which encodes datetimes, UUIDs
+and NumPy values natively; ObjectIds are rendered as strings, so MongoDB
+documents can be returned as-is instead of being converted field by field.
+Endpoints that return a ``FastJSONResponse`` directly also skip FastAPI's
+``jsonable_encoder`` pass over the content. Without orjson installed the
+stdlib encoder is used.
+
+``add_compression`` negotiates brotli (when brotli-asgi is installed) or gzip
+for bodies larger than ``COMPRESSION_MIN_SIZE``. Event streams are sent
+uncompressed since the compressors buffer output until the stream ends.
+"""
+
+import json
+from typing import Any
+
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # falls back to the stdlib encoder
+    orjson = None
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # gzip only when brotli-asgi is not installed
+    BrotliMiddleware = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """Encode the types orjson does not handle natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content (which may hold ObjectIds and datetimes) to JSON"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(
+        jsonable_encoder(content, custom_encoder={ObjectId: str}),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, accepting ObjectIds and datetimes"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class CompressionMiddleware:
+    """Apply a compression middleware to every request but event streams"""
+
+    def __init__(self, app: ASGIApp, compressor: type, **options):
+        self.app = app
+        self.compressed_app = compressor(app, **options)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and not _accepts_event_stream(scope):
+            await self.compressed_app(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+
+def _accepts_event_stream(scope: Scope) -> bool:
+    return any(
+        name == b"accept" and b"text/event-stream" in value
+        for name, value in scope["headers"]
+    )
+
+
+def add_compression(app: FastAPI) -> None:
+    """Compress large responses with brotli or gzip, as the client accepts"""
+    if BrotliMiddleware is not None:
+        app.add_middleware(
+            CompressionMiddleware,
+            compressor=BrotliMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+            gzip_fallback=True,
+        )
+    else:
+        app.add_middleware(
+            CompressionMiddleware,
+            compressor=GZipMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+        )
@@ -5,6 +5,7 @@ from enum import Enum
 
 
 class SurveyStatus(str, Enum):
+    INGESTING = "ingesting"
     PENDING = "pending"
     PROCESSING = "processing"
     COMPLETED = "completed"
@@ -59,6 +60,41 @@ class SurveyUpload(BaseModel):
     )
 
 
+class UploadSessionCreate(BaseModel):
+    """Start a resumable chunked upload for one file"""
+
+    filename: str
+    total_size: int  # bytes
+    chunk_size: Optional[int] = None  # bytes, defaults to UPLOAD_CHUNK_SIZE
+
+
+class ResumableUploadFinalize(BaseModel):
+    """Combine completed schema and responses uploads into a two-file survey"""
+
+    schema_upload_id: str
+    responses_upload_id: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    tags: Optional[str] = None  # Comma-separated
+    allow_duplicate: bool = False  # Create a new survey even for identical files
+
+
+class SegmentQuery(BaseModel):
+    """Summarize the participants matching a segment filter"""
+
+    # {question_id: value or [values]}; all conditions must hold
+    segment: Dict[str, Any] = {}
+    question_ids: Optional[List[str]] = None  # Defaults to every question
+
+
+class CrosstabRequest(BaseModel):
+    """Cross-tabulate two categorical questions, optionally within a segment"""
+
+    row_question_id: str
+    column_question_id: str
+    segment: Dict[str, Any] = {}
+
+
 class SurveyDocument(BaseModel):
     """Survey document in database - supports both simple and multi-question surveys"""
 
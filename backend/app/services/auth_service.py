@@ -1,18 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+import asyncio
+import hashlib
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from bson import ObjectId
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.database import db
 from app.models.user import UserInDB, UserCreate, User
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# bcrypt releases the GIL, so hashing runs in its own bounded thread pool
+# instead of blocking the event loop (or filling the default executor)
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+
+# Hash verified against for unknown emails, so they cost as much as known
+# ones (computed once, see prepare_password_hashing)
+_dummy_hash: Optional[str] = None
 
 # Token settings
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
+# Email -> User of recently authenticated users. Per process: changes made
+# here invalidate their entry, changes made elsewhere show after the TTL.
+user_cache = TTLCache(ttl=settings.USER_CACHE_TTL, max_size=settings.AUTH_CACHE_SIZE)
+
+# SHA-256 of a token -> its verified payload, kept until the token expires
+token_cache = TTLCache(ttl=0, max_size=settings.AUTH_CACHE_SIZE)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
@@ -36,6 +60,27 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def hash_password_async(password: str) -> str:
+    """get_password_hash, run in the password thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password, run in the password thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_executor, verify_password, plain_password, hashed_password
+    )
+
+
+async def prepare_password_hashing() -> None:
+    """Compute the timing-equalization hash (called at startup)"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await hash_password_async("dummy")
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -65,15 +110,28 @@ def create_refresh_token(data: dict) -> str:
 
 
 def decode_token(token: str) -> dict:
-    """Decode and verify JWT token"""
+    """Decode and verify JWT token
+
+    Verified payloads are cached until the token expires, so repeated
+    requests with the same token skip the signature check.
+    """
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        return payload
     except JWTError:
         return None
 
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        token_cache.set(key, dict(payload), ttl=expires_in)
+    return payload
+
 
 async def get_user_by_email(email: str) -> Optional[UserInDB]:
     """Get user by email"""
@@ -84,6 +142,24 @@ async def get_user_by_email(email: str) -> Optional[UserInDB]:
     return None
 
 
+async def get_cached_user(email: str) -> Optional[User]:
+    """Get user by email through the user cache"""
+    user = user_cache.get(email)
+    if user is None:
+        user_in_db = await get_user_by_email(email)
+        if user_in_db is None:
+            return None
+        user = User(
+            id=user_in_db.id,
+            email=user_in_db.email,
+            full_name=user_in_db.full_name,
+            is_active=user_in_db.is_active,
+            created_at=user_in_db.created_at,
+        )
+        user_cache.set(email, user)
+    return user
+
+
 async def get_user_by_id(user_id: str) -> Optional[User]:
     """Get user by ID"""
     try:
@@ -104,9 +180,10 @@ async def authenticate_user(email: str, password: str) -> Optional[UserInDB]:
     user = await get_user_by_email(email)
     if not user:
         # Run password verification even if user doesn't exist to prevent timing attacks
-        pwd_context.verify(password, pwd_context.hash("dummy"))
+        await prepare_password_hashing()
+        await verify_password_async(password, _dummy_hash)
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
@@ -123,7 +200,7 @@ async def create_user(user_create: UserCreate) -> User:
     user_dict = {
         "email": user_create.email,
         "full_name": user_create.full_name,
-        "hashed_password": get_password_hash(user_create.password),
+        "hashed_password": await hash_password_async(user_create.password),
         "is_active": True,
         "created_at": now,
         "updated_at": now,
@@ -139,9 +216,23 @@ async def create_user(user_create: UserCreate) -> User:
 
 async def update_user_password(user_id: str, new_password: str) -> bool:
     """Update user password"""
-    hashed_password = get_password_hash(new_password)
-    result = await db.db.users.update_one(
+    hashed_password = await hash_password_async(new_password)
+    return await _update_user(user_id, {"hashed_password": hashed_password})
+
+
+async def set_user_active(user_id: str, is_active: bool) -> bool:
+    """Activate or deactivate a user"""
+    return await _update_user(user_id, {"is_active": is_active})
+
+
+async def _update_user(user_id: str, fields: dict) -> bool:
+    """Update a user and drop it from the user cache"""
+    user_data = await db.db.users.find_one_and_update(
         {"_id": ObjectId(user_id)},
-        {"$set": {"hashed_password": hashed_password, "updated_at": datetime.utcnow()}},
+        {"$set": {**fields, "updated_at": datetime.utcnow()}},
+        projection={"email": 1},
     )
-    return result.modified_count > 0
+    if user_data is None:
+        return False
+    user_cache.invalidate(user_data["email"])
+    return True
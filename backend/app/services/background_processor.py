@@ -6,11 +6,16 @@ import asyncio
 import logging
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
-from bson import ObjectId
 import time
 
 from app.core.config import settings
 from app.services.llm_service import LLMService
+from app.services.progress import ProgressReporter
+from app.services.response_store import (
+    get_simple_responses,
+    question_response_loader,
+)
+from app.services.upload_sessions import cleanup_expired_sessions
 
 logger = logging.getLogger(__name__)
 
@@ -41,27 +46,25 @@ class SurveyProcessor:
             for survey in pending_surveys:
                 survey_id = str(survey["_id"])
                 survey_type = survey.get("survey_type", "simple")
+                reporter = ProgressReporter(db, survey_id)
 
                 try:
                     # Update status to processing
-                    await db.surveys.update_one(
-                        {"_id": ObjectId(survey_id)},
+                    await reporter.update(
                         {
-                            "$set": {
-                                "status": "processing",
-                                "progress": {
-                                    "step": "initializing",
-                                    "message": "Starting automated analysis...",
-                                    "current_question": 0,
-                                    "total_questions": (
-                                        len(survey.get("questions", []))
-                                        if survey_type == "structured"
-                                        else 1
-                                    ),
-                                    "percentage": 0,
-                                    "last_updated": datetime.utcnow(),
-                                },
-                            }
+                            "status": "processing",
+                            "progress": {
+                                "step": "initializing",
+                                "message": "Starting automated analysis...",
+                                "current_question": 0,
+                                "total_questions": (
+                                    len(survey.get("questions", []))
+                                    if survey_type == "structured"
+                                    else 1
+                                ),
+                                "percentage": 0,
+                                "last_updated": datetime.utcnow(),
+                            },
                         },
                     )
 
@@ -87,23 +90,22 @@ class SurveyProcessor:
                                 if total_questions > 0
                                 else 10
                             )
-                            await db.surveys.update_one(
-                                {"_id": ObjectId(survey_id)},
+                            await reporter.update(
                                 {
-                                    "$set": {
-                                        "progress.step": step,
-                                        "progress.current_question": current_question,
-                                        "progress.total_questions": total_questions,
-                                        "progress.message": message,
-                                        "progress.percentage": percentage,
-                                        "progress.last_updated": datetime.utcnow(),
-                                    }
+                                    "progress.step": step,
+                                    "progress.current_question": current_question,
+                                    "progress.total_questions": total_questions,
+                                    "progress.message": message,
+                                    "progress.percentage": percentage,
+                                    "progress.last_updated": datetime.utcnow(),
                                 },
                             )
 
                         structured_result = (
                             await self.llm_service.analyze_structured_survey(
-                                processed_data, progress_callback=progress_callback
+                                processed_data,
+                                progress_callback=progress_callback,
+                                response_loader=question_response_loader(db, survey),
                             )
                         )
 
@@ -125,7 +127,7 @@ class SurveyProcessor:
                         )
 
                     else:
-                        responses = survey.get("responses", [])
+                        responses = await get_simple_responses(db, survey)
                         result_data["total_responses_analyzed"] = len(responses)
 
                         full_result = await self.llm_service.full_analysis(responses)
@@ -150,14 +152,11 @@ class SurveyProcessor:
                     analysis_result = await db.analyses.insert_one(result_data)
 
                     # Update survey status
-                    await db.surveys.update_one(
-                        {"_id": ObjectId(survey_id)},
+                    await reporter.update(
                         {
-                            "$set": {
-                                "status": "completed",
-                                "updated_at": datetime.utcnow(),
-                                "last_analysis_id": str(analysis_result.inserted_id),
-                            }
+                            "status": "completed",
+                            "updated_at": datetime.utcnow(),
+                            "last_analysis_id": str(analysis_result.inserted_id),
                         },
                     )
 
@@ -169,14 +168,11 @@ class SurveyProcessor:
                     logger.error(
                         f"❌ Error auto-processing survey {survey_id}: {str(e)}"
                     )
-                    await db.surveys.update_one(
-                        {"_id": ObjectId(survey_id)},
+                    await reporter.update(
                         {
-                            "$set": {
-                                "status": "failed",
-                                "error": str(e),
-                                "updated_at": datetime.utcnow(),
-                            }
+                            "status": "failed",
+                            "error": str(e),
+                            "updated_at": datetime.utcnow(),
                         },
                     )
 
@@ -194,6 +190,12 @@ class SurveyProcessor:
             except Exception as e:
                 logger.error(f"Error in periodic processor: {e}")
 
+            # Remove chunks of abandoned resumable uploads
+            try:
+                await cleanup_expired_sessions(db)
+            except Exception as e:
+                logger.error(f"Error cleaning up upload sessions: {e}")
+
             # Wait before next check
             await asyncio.sleep(interval)
 
@@ -0,0 +1,126 @@
+"""
+Columnar on-disk response cache
+
+Optional per-survey copy of the preprocessed responses, one Arrow IPC file per
+question under ``COLUMN_CACHE_DIR/<survey_id>/``. Reads memory-map only the
+file of the question requested instead of pulling the survey's response
+chunks from MongoDB. The mapped Arrow array is only converted to Python
+strings where they are needed: whole columns for analysis, a slice for a
+page of responses. MongoDB stays the source of truth: a missing or
+unreadable cache file falls back to the response store.
+
+Enabled when ``COLUMN_CACHE_DIR`` is set and pyarrow is installed; pyarrow
+is imported when the cache is first used, not at startup.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import shutil
+import uuid
+from typing import List, Optional
+from urllib.parse import quote
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Name of the single column stored in each question file
+COLUMN_NAME = "response"
+
+# The cache is disabled when pyarrow is not installed
+PYARROW_INSTALLED = importlib.util.find_spec("pyarrow") is not None
+
+
+def cache_enabled() -> bool:
+    """Whether the column cache is configured and usable"""
+    return bool(settings.COLUMN_CACHE_DIR) and PYARROW_INSTALLED
+
+
+def _survey_dir(survey_id: str) -> str:
+    return os.path.join(settings.COLUMN_CACHE_DIR, survey_id)
+
+
+def _column_path(survey_id: str, question_id: str) -> str:
+    return os.path.join(_survey_dir(survey_id), f"{quote(question_id, safe='')}.arrow")
+
+
+def write_column(survey_id: str, question_id: str, responses: List[str]):
+    """Write one question's responses as an Arrow IPC file"""
+    import pyarrow as pa
+
+    path = _column_path(survey_id, question_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    table = pa.table({COLUMN_NAME: pa.array(responses, type=pa.large_string())})
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_column(survey_id: str, question_id: str) -> Optional["pa.ChunkedArray"]:
+    """Memory-map one question's responses as an Arrow array, or None if not cached
+
+    The array's buffers point into the memory map, which stays open as long
+    as they are referenced: only the pages converted are read from disk.
+    """
+    import pyarrow as pa
+
+    path = _column_path(survey_id, question_id)
+    if not os.path.exists(path):
+        return None
+
+    source = pa.memory_map(path, "r")
+    return pa.ipc.open_file(source).read_all().column(COLUMN_NAME)
+
+
+async def cache_responses(survey_id: str, question_id: str, responses: List[str]):
+    """Write a question column in a worker thread; failures only skip the cache"""
+    if not cache_enabled():
+        return
+    import pyarrow as pa
+
+    try:
+        await asyncio.to_thread(write_column, survey_id, question_id, responses)
+    except (OSError, pa.ArrowException) as e:
+        logger.warning(f"Could not cache column {question_id} of {survey_id}: {e}")
+
+
+async def load_cached_column(
+    survey_id: str, question_id: str
+) -> Optional["pa.ChunkedArray"]:
+    """Memory-map a question column, or None to fall back to MongoDB"""
+    if not cache_enabled():
+        return None
+    import pyarrow as pa
+
+    try:
+        return await asyncio.to_thread(read_column, survey_id, question_id)
+    except (OSError, pa.ArrowException) as e:
+        logger.warning(
+            f"Could not read cached column {question_id} of {survey_id}: {e}"
+        )
+        return None
+
+
+async def load_cached_responses(
+    survey_id: str, question_id: str
+) -> Optional[List[str]]:
+    """Read a whole question column from the cache, or None to fall back to MongoDB"""
+    column = await load_cached_column(survey_id, question_id)
+    if column is None:
+        return None
+    return await asyncio.to_thread(column.to_pylist)
+
+
+def delete_survey_columns(survey_id: str):
+    """Remove every cached column of a survey"""
+    if settings.COLUMN_CACHE_DIR:
+        shutil.rmtree(_survey_dir(survey_id), ignore_errors=True)
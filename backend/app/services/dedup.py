@@ -0,0 +1,78 @@
+"""
+Upload deduplication
+
+Uploaded files are hashed as a stream before any parsing. The combined hash
+is stored on the survey as ``content_hash``; when the same user uploads
+identical files again, the upload routes link to the existing survey and its
+latest analysis instead of preprocessing and analyzing the data again.
+"""
+
+import hashlib
+from typing import Any, BinaryIO, Dict, Optional
+
+from app.models.schemas import SurveyStatus
+from app.services.ingestion import SPOOL_CHUNK_SIZE
+
+
+def hash_stream(stream: BinaryIO) -> str:
+    """SHA-256 of a seekable stream, read in chunks; rewinds the stream"""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    while True:
+        chunk = stream.read(SPOOL_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def content_hash(kind: str, *file_hashes: str) -> str:
+    """Combine per-file hashes into the survey's content hash
+
+    ``kind`` ("file" or "two-file") keeps single-file and two-file uploads of
+    the same bytes apart, since they produce different surveys.
+    """
+    digest = hashlib.sha256(kind.encode())
+    for file_hash in file_hashes:
+        digest.update(b"\0" + file_hash.encode())
+    return digest.hexdigest()
+
+
+async def find_duplicate(
+    db, user_id: str, survey_hash: str
+) -> Optional[Dict[str, Any]]:
+    """Find the user's latest survey with the same content hash
+
+    Returns the upload response linking to that survey and its latest
+    full-survey analysis, or None. Failed surveys are never reused.
+    """
+    survey = await db.surveys.find_one(
+        {
+            "user_id": user_id,
+            "content_hash": survey_hash,
+            "status": {"$ne": SurveyStatus.FAILED.value},
+        },
+        projection={"_id": 1, "title": 1, "status": 1, "survey_type": 1},
+        sort=[("created_at", -1)],
+    )
+    if not survey:
+        return None
+
+    survey_id = str(survey["_id"])
+    analysis = await db.analyses.find_one(
+        {"survey_id": survey_id, "segment": None},
+        projection={"_id": 1},
+        sort=[("created_at", -1)],
+    )
+
+    return {
+        "survey_id": survey_id,
+        "title": survey["title"],
+        "survey_type": survey.get("survey_type", "simple"),
+        "status": survey["status"],
+        "duplicate": True,
+        "analysis_id": str(analysis["_id"]) if analysis else None,
+        "message": "Identical files were already uploaded; linked to the existing survey. "
+        "Upload again with allow_duplicate=true to create a new copy.",
+    }
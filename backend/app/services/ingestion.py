@@ -0,0 +1,864 @@
+"""
+Survey ingestion pipeline
+
+Parses uploaded schema/responses files into questions and per-question
+processed data, and runs asynchronous ingest jobs for large uploads.
+"""
+
+import asyncio
+import bz2
+import csv
+import gzip
+import hashlib
+import importlib.util
+import io
+import json
+import logging
+import lzma
+import os
+import shutil
+import tempfile
+import uuid
+import zipfile
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import aiofiles
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.models.schemas import SurveyStatus
+from app.services.participants import ParticipantTable, answer_text
+from app.services.preprocessing import DataPreprocessor
+from app.services.progress import ProgressReporter
+from app.services.question_stats import describe_questions
+from app.services.response_store import delete_responses, store_survey_responses
+from app.services.statistics import is_closed_question
+
+try:
+    import zstandard
+except ImportError:  # zstd uploads are only accepted when zstandard is installed
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# How many response rows to parse between progress updates
+INGEST_PROGRESS_EVERY = 5000
+
+# Read size used when spooling uploads to disk
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+# Compressed upload formats, decompressed as a stream during parsing
+COMPRESSED_EXTENSIONS = ["gz", "bz2", "xz", "zip"] + (["zst"] if zstandard else [])
+
+# Newline-delimited JSON: one participant object per line
+NDJSON_EXTENSIONS = ["jsonl", "ndjson"]
+
+# Excel workbooks, read row by row in openpyxl's read-only mode
+SPREADSHEET_EXTENSIONS = ["xlsx"]
+
+# Parquet files, read in record batches of PARQUET_BATCH_SIZE rows; only
+# accepted when pyarrow is installed, which is imported on first use
+PARQUET_EXTENSIONS = ["parquet"] if importlib.util.find_spec("pyarrow") else []
+PARQUET_BATCH_SIZE = 10000
+
+# Formats accepted for two-file schema uploads
+SCHEMA_FILE_EXTENSIONS = ["csv", "json"] + SPREADSHEET_EXTENSIONS
+
+# Formats accepted for two-file responses uploads
+RESPONSE_FILE_EXTENSIONS = (
+    ["csv", "json"] + NDJSON_EXTENSIONS + SPREADSHEET_EXTENSIONS + PARQUET_EXTENSIONS
+)
+
+# Workbook sheet names mapped to the two-file format (matched case-insensitively)
+SCHEMA_SHEET = "schema"
+RESPONSES_SHEET = "responses"
+
+# Characters decoded per read by the incremental JSON parser
+JSON_READ_SIZE = 64 * 1024
+
+
+class IngestError(ValueError):
+    """Raised when an uploaded file cannot be ingested"""
+
+
+class CountingReader(io.RawIOBase):
+    """Wraps a binary stream and counts the bytes read through it
+
+    If ``limit`` is set, reading more than ``limit`` bytes raises IngestError
+    (guards against decompression bombs).
+    """
+
+    def __init__(self, stream: BinaryIO, limit: Optional[int] = None):
+        self.stream = stream
+        self.limit = limit
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self.stream.seekable()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self.stream.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self.stream.tell()
+
+    def readinto(self, buffer) -> int:
+        data = self.stream.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        self.bytes_read += n
+        if self.limit is not None and self.bytes_read > self.limit:
+            raise IngestError(
+                f"Decompressed file exceeds the maximum size of "
+                f"{self.limit / (1024*1024):.0f}MB"
+            )
+        return n
+
+
+def file_extension(filename: str) -> str:
+    """Get the lower-cased extension of a filename without the dot"""
+    return filename.lower().split(".")[-1]
+
+
+def strip_compression(filename: str) -> str:
+    """Remove a compression suffix: 'responses.csv.gz' -> 'responses.csv'"""
+    base, _, ext = filename.rpartition(".")
+    if base and ext.lower() in COMPRESSED_EXTENSIONS:
+        return base
+    return filename
+
+
+def data_extension(filename: str) -> str:
+    """Extension of the data format inside a possibly compressed file"""
+    return file_extension(strip_compression(filename))
+
+
+def open_decompressed(stream: BinaryIO, filename: str) -> Tuple[BinaryIO, str]:
+    """Wrap an uploaded file in a streaming decompressor based on its extension
+
+    Returns the decompressed binary stream and the filename of the data inside
+    (e.g. 'responses.csv' for 'responses.csv.gz'). Uncompressed files are
+    returned as is. ZIP archives must contain a single data file.
+    """
+    ext = file_extension(filename)
+
+    if ext not in COMPRESSED_EXTENSIONS:
+        return stream, filename
+
+    if ext == "gz":
+        decompressed = gzip.GzipFile(fileobj=stream, mode="rb")
+    elif ext == "bz2":
+        decompressed = bz2.BZ2File(stream, mode="rb")
+    elif ext == "xz":
+        decompressed = lzma.LZMAFile(stream, mode="rb")
+    elif ext == "zst":
+        decompressed = zstandard.ZstdDecompressor().stream_reader(stream)
+    else:
+        archive = zipfile.ZipFile(stream)
+        members = [
+            member
+            for member in archive.infolist()
+            if not member.is_dir() and not member.filename.startswith("__MACOSX/")
+        ]
+        if len(members) != 1:
+            raise IngestError(
+                f"{filename} must contain exactly one file, found {len(members)}"
+            )
+        filename = os.path.basename(members[0].filename)
+        return _limited(archive.open(members[0])), filename
+
+    return _limited(decompressed), strip_compression(filename)
+
+
+def _limited(stream: BinaryIO) -> BinaryIO:
+    """Buffer a decompressed stream and cap how much it may expand to"""
+    return io.BufferedReader(
+        CountingReader(stream, limit=settings.MAX_DECOMPRESSED_SIZE),
+        buffer_size=SPOOL_CHUNK_SIZE,
+    )
+
+
+def parse_schema(content: bytes, filename: str) -> List[Dict[str, Any]]:
+    """Parse a schema file (CSV, JSON or XLSX) into a list of question dicts"""
+    ext = file_extension(filename)
+    questions = []
+
+    if ext == "csv":
+        questions = schema_rows_to_questions(
+            csv.DictReader(io.StringIO(content.decode("utf-8")))
+        )
+    elif ext in SPREADSHEET_EXTENSIONS:
+        with open_workbook(io.BytesIO(content)) as workbook:
+            sheet = find_sheet(workbook, SCHEMA_SHEET) or workbook.worksheets[0]
+            questions = schema_rows_to_questions(iter_sheet_records(sheet))
+    elif ext == "json":
+        schema_json = json.loads(content.decode("utf-8"))
+        if isinstance(schema_json, list):
+            questions = schema_json
+        elif isinstance(schema_json, dict) and "questions" in schema_json:
+            questions = schema_json["questions"]
+    else:
+        raise IngestError("Schema file must be CSV, JSON or XLSX")
+
+    if not questions:
+        raise IngestError("No questions found in schema file")
+
+    return questions
+
+
+def schema_rows_to_questions(rows: Iterable[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """Map tabular schema rows (CSV or sheet) to question dicts"""
+    questions = []
+    for row in rows:
+        questions.append(
+            {
+                "question_id": row.get("question_id", row.get("id", "")),
+                "question_text": row.get(
+                    "question_text", row.get("text", row.get("question", ""))
+                ),
+                "question_type": row.get("question_type", row.get("type", "open_ended"))
+                or "open_ended",
+                "is_analyzed": str(row.get("is_analyzed", "true")).lower()
+                in ["true", "1", "yes"],
+            }
+        )
+    if not questions:
+        raise IngestError("Schema file is empty")
+    return questions
+
+
+def iter_response_rows(
+    stream: BinaryIO, filename: str, questions: List[Dict[str, Any]]
+) -> Iterator[Dict[str, str]]:
+    """Yield one {question_id: answer} dict per participant in a responses file"""
+    ext = file_extension(filename)
+
+    if ext == "csv":
+        text_stream = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        yield from _select_answers(csv.DictReader(text_stream), questions)
+    elif ext == "json":
+        yield from iter_json_records(stream, "responses")
+    elif ext in NDJSON_EXTENSIONS:
+        yield from iter_ndjson_records(stream)
+    elif ext in SPREADSHEET_EXTENSIONS:
+        with open_workbook(stream) as workbook:
+            sheet = find_sheet(workbook, RESPONSES_SHEET) or workbook.worksheets[0]
+            yield from _select_answers(iter_sheet_records(sheet), questions)
+    elif ext in PARQUET_EXTENSIONS:
+        # Only the schema's question columns are read from the file
+        question_ids = [question["question_id"] for question in questions]
+        yield from _select_answers(
+            iter_parquet_records(stream, columns=question_ids), questions
+        )
+    else:
+        raise IngestError("Responses file must be CSV, JSON, NDJSON, XLSX or Parquet")
+
+
+def _select_answers(
+    rows: Iterable[Dict[str, str]], questions: List[Dict[str, Any]]
+) -> Iterator[Dict[str, str]]:
+    """Keep the non-empty answers to schema questions from tabular rows"""
+    question_ids = [question["question_id"] for question in questions]
+    for row in rows:
+        response_dict = {}
+        for qid in question_ids:
+            if qid in row and row[qid]:
+                response_dict[qid] = str(row[qid]).strip()
+        if response_dict:
+            yield response_dict
+
+
+@contextmanager
+def seekable_stream(stream: BinaryIO) -> Iterator[BinaryIO]:
+    """Give random access to a stream
+
+    XLSX and Parquet readers seek around the file, so non-seekable streams
+    (e.g. a decompressing wrapper) are first copied to a temporary file.
+    """
+    if stream.seekable():
+        yield stream
+        return
+
+    os.makedirs(settings.INGEST_SPOOL_DIR, exist_ok=True)
+    with tempfile.TemporaryFile(dir=settings.INGEST_SPOOL_DIR) as spooled:
+        shutil.copyfileobj(stream, spooled, SPOOL_CHUNK_SIZE)
+        spooled.seek(0)
+        yield spooled
+
+
+@contextmanager
+def open_workbook(stream: BinaryIO) -> Iterator[Any]:
+    """Open an XLSX workbook in read-only mode
+
+    Read-only workbooks stream rows from the sheet XML instead of loading the
+    whole sheet, so memory stays bounded for very large sheets.
+    """
+    # openpyxl is slow to import and only needed for XLSX uploads
+    from openpyxl import load_workbook
+
+    with seekable_stream(stream) as stream:
+        try:
+            workbook = load_workbook(stream, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, KeyError) as e:
+            raise IngestError(f"Invalid XLSX file: {e}")
+
+        try:
+            yield workbook
+        finally:
+            workbook.close()
+
+
+def find_sheet(workbook, name: str):
+    """Find a worksheet by name, ignoring case and surrounding whitespace"""
+    for sheet_name in workbook.sheetnames:
+        if sheet_name.strip().lower() == name:
+            return workbook[sheet_name]
+    return None
+
+
+def iter_sheet_records(sheet) -> Iterator[Dict[str, str]]:
+    """Yield one {header: text} dict per non-empty row of a worksheet
+
+    Works like csv.DictReader: the first row is the header and every cell is
+    converted to text, with empty cells as "".
+    """
+    rows = sheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [
+        (index, cell_text(name))
+        for index, name in enumerate(header)
+        if name is not None
+    ]
+
+    for row in rows:
+        record = {
+            name: cell_text(row[index]) if index < len(row) else ""
+            for index, name in columns
+        }
+        if any(record.values()):
+            yield record
+
+
+def cell_text(value: Any) -> str:
+    """Convert a spreadsheet cell or Parquet value to the text a CSV export would contain"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def import_parquet():
+    """pyarrow and pyarrow.parquet, imported when a Parquet file is read"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    return pa, pq
+
+
+def iter_parquet_records(
+    stream: BinaryIO, columns: Optional[List[str]] = None
+) -> Iterator[Dict[str, str]]:
+    """Yield one {column: text} dict per row of a Parquet file
+
+    Rows are decoded one record batch at a time, and only ``columns`` (those
+    present in the file) are read when given.
+    """
+    pa, pq = import_parquet()
+    with seekable_stream(stream) as stream:
+        try:
+            parquet_file = pq.ParquetFile(stream)
+        except pa.ArrowException as e:
+            raise IngestError(f"Invalid Parquet file: {e}")
+
+        if columns is not None:
+            available = set(parquet_file.schema_arrow.names)
+            columns = [column for column in columns if column in available]
+
+        for batch in parquet_file.iter_batches(
+            batch_size=PARQUET_BATCH_SIZE, columns=columns
+        ):
+            for row in batch.to_pylist():
+                yield {name: cell_text(value) for name, value in row.items()}
+
+
+@contextmanager
+def open_workbook_rows(
+    stream: BinaryIO,
+) -> Iterator[Tuple[Optional[List[Dict[str, Any]]], Iterator[Dict[str, str]]]]:
+    """Open a single-file XLSX upload and read its rows lazily
+
+    Workbooks with "schema" and "responses" sheets map like the two-file
+    format and give ``(questions, response_rows)``. Otherwise the first
+    sheet is read like a CSV file and ``(None, rows)`` is given. Rows are
+    read from the workbook while the block iterates them.
+    """
+    with open_workbook(stream) as workbook:
+        schema_sheet = find_sheet(workbook, SCHEMA_SHEET)
+        if schema_sheet is None:
+            yield None, iter_sheet_records(workbook.worksheets[0])
+            return
+
+        responses_sheet = find_sheet(workbook, RESPONSES_SHEET)
+        if responses_sheet is None:
+            raise IngestError("Workbook has a 'schema' sheet but no 'responses' sheet")
+
+        questions = schema_rows_to_questions(iter_sheet_records(schema_sheet))
+        yield questions, _select_answers(iter_sheet_records(responses_sheet), questions)
+
+
+def iter_ndjson_records(stream: BinaryIO) -> Iterator[Any]:
+    """Yield one decoded value per non-blank line of an NDJSON file"""
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8")
+    for line_number, line in enumerate(text_stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise IngestError(f"Invalid JSON on line {line_number}: {e.msg}")
+
+
+def iter_json_records(stream: BinaryIO, wrapper_key: str) -> Iterator[Any]:
+    """Incrementally yield the elements of a top-level JSON array
+
+    Accepts either ``[...]`` or an object holding the array under
+    ``wrapper_key`` (e.g. ``{"responses": [...]}``). Only one element is
+    decoded at a time, so the parser's memory does not grow with file size;
+    other keys of a wrapper object are decoded and discarded.
+    """
+    reader = _JSONStreamReader(io.TextIOWrapper(stream, encoding="utf-8-sig"))
+
+    first = reader.next_char()
+    if first == "[":
+        reader.pos += 1
+        yield from reader.iter_array()
+    elif first == "{":
+        reader.pos += 1
+        while True:
+            char = reader.next_char()
+            if char == "}":
+                return
+            if char == ",":
+                reader.pos += 1
+                continue
+            key = reader.decode_value()
+            reader.expect(":")
+            if key == wrapper_key and reader.next_char() == "[":
+                reader.pos += 1
+                yield from reader.iter_array()
+                return
+            reader.decode_value()
+    elif first is not None:
+        raise IngestError(
+            f"JSON must be an array or an object with a '{wrapper_key}' array"
+        )
+
+
+class _JSONStreamReader:
+    """Minimal pull parser over a text stream, built on JSONDecoder.raw_decode"""
+
+    def __init__(self, text_stream: io.TextIOBase):
+        self.text_stream = text_stream
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Read more text, dropping the consumed part of the buffer"""
+        if self.eof:
+            return False
+        chunk = self.text_stream.read(JSON_READ_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def next_char(self) -> Optional[str]:
+        """Skip whitespace and peek at the next character (None at end of input)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return None
+
+    def expect(self, char: str):
+        if self.next_char() != char:
+            raise IngestError(f"Invalid JSON: expected '{char}'")
+        self.pos += 1
+
+    def decode_value(self) -> Any:
+        """Decode the next complete JSON value, reading more input as needed"""
+        self.next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number at the very end of the buffer may continue in the
+                # next chunk, so only accept it once more input is available
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise IngestError(f"Invalid JSON: {e.msg}")
+            if not self._fill():
+                self.eof = True
+
+    def iter_array(self) -> Iterator[Any]:
+        """Yield array elements until the closing bracket"""
+        if self.next_char() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.decode_value()
+            char = self.next_char()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise IngestError("Invalid JSON: expected ',' or ']' in array")
+
+
+def preprocess_answers(
+    question_type: Optional[str], answers: List[str], preprocessor: DataPreprocessor
+) -> List[str]:
+    """Prepare one question's answers for analysis
+
+    Closed-ended answers (multiple choice, rating) are kept raw, only
+    stripped: text cleaning, deduplication and the minimum word count would
+    destroy them, and they are summarized locally rather than by the LLM.
+    """
+    if is_closed_question(question_type):
+        return [answer.strip() for answer in answers]
+    return preprocessor.preprocess_batch(answers)
+
+
+class ResponseColumns:
+    """Answers of parsed participant rows, collected column by column
+
+    Rows are added one at a time as they are parsed and are not kept: only
+    their answers to the schema questions are, in two per-question lists
+    sharing the answer strings. ``answers`` holds the non-empty answers of
+    analyzed questions (the input of preprocessing) and ``answer_texts``
+    every participant's ``answer_text``, aligned by participant (the input of
+    the participant table). Memory still grows with the number of answers:
+    deduplication and categorical encoding need whole columns.
+    """
+
+    def __init__(self, questions: List[Dict[str, Any]]):
+        self.questions = questions
+        self.participants = 0
+        self.answers: Dict[str, List[str]] = {
+            question["question_id"]: []
+            for question in questions
+            if question.get("is_analyzed", True)
+        }
+        self.answer_texts: Dict[str, List[str]] = {
+            question["question_id"]: [] for question in questions
+        }
+
+    def add(self, row: Dict[str, Any]):
+        """Add one participant's {question_id: answer} row"""
+        if not isinstance(row, dict):
+            raise IngestError("Each participant response must be an object")
+        for question_id, texts in self.answer_texts.items():
+            answer = row.get(question_id)
+            texts.append(answer_text(answer))
+            if question_id not in self.answers:
+                continue
+            if isinstance(answer, (int, float)) and not isinstance(answer, bool):
+                answer = str(answer)
+            if answer and isinstance(answer, str) and answer.strip():
+                self.answers[question_id].append(answer)
+        self.participants += 1
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> "ResponseColumns":
+        for row in rows:
+            self.add(row)
+        return self
+
+
+def build_processed_data(
+    questions: List[Dict[str, Any]],
+    columns: ResponseColumns,
+    preprocessor: DataPreprocessor,
+) -> Dict[str, Dict[str, Any]]:
+    """Preprocess each analyzed question's responses
+
+    One clean_text memo is shared by all questions of the ingest. Each
+    question's raw answers are released once preprocessed.
+    """
+    preprocessor = preprocessor.memoized()
+    processed_data = {}
+    for question in questions:
+        if question.get("is_analyzed", True):
+            question_responses = columns.answers.pop(question["question_id"], [])
+            if question_responses:
+                cleaned = preprocess_answers(
+                    question.get("question_type"), question_responses, preprocessor
+                )
+                processed_data[question["question_id"]] = {
+                    "question_text": question["question_text"],
+                    "question_type": question.get("question_type", "open_ended"),
+                    "responses": cleaned,
+                    "response_count": len(cleaned),
+                }
+
+    memo = preprocessor.memo_stats()
+    logger.info(
+        f"clean_text memo: {memo['hits']} hits, {memo['misses']} misses "
+        f"({memo['hit_rate']:.1%} hit rate, {memo['size']} entries)"
+    )
+    return processed_data
+
+
+def build_participant_data(
+    questions: List[Dict[str, Any]], columns: ResponseColumns
+) -> Dict[str, Any]:
+    """Participant table and per-question statistics of a structured survey
+
+    Returns survey document fields: ``participant_table`` (moved to the
+    participant store on insert) and ``question_stats``. The answer texts
+    not kept by the table (categorical columns) are released.
+    """
+    answer_texts, columns.answer_texts = columns.answer_texts, {}
+    table = ParticipantTable.from_columns(questions, columns.participants, answer_texts)
+    return {"participant_table": table, "question_stats": describe_questions(table)}
+
+
+async def spool_upload(upload: UploadFile, directory: str) -> Tuple[str, int, str]:
+    """Stream an uploaded file to the spool directory
+
+    Returns the spooled file path, its size in bytes and its SHA-256 hex digest.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(
+        directory, f"{uuid.uuid4().hex}.{file_extension(upload.filename)}"
+    )
+    size = 0
+    digest = hashlib.sha256()
+
+    try:
+        async with aiofiles.open(path, "wb") as out:
+            while True:
+                chunk = await upload.read(SPOOL_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_SIZE:
+                    raise IngestError(
+                        f"{upload.filename} is too large. Maximum size is "
+                        f"{settings.MAX_UPLOAD_SIZE / (1024*1024):.0f}MB"
+                    )
+                digest.update(chunk)
+                await out.write(chunk)
+    except Exception:
+        _remove_quietly(path)
+        raise
+
+    return path, size, digest.hexdigest()
+
+
+def _remove_quietly(path: str):
+    """Delete a spooled file, ignoring errors"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def parse_spooled_files(
+    schema_path: str,
+    schema_filename: str,
+    responses_path: str,
+    responses_filename: str,
+    report_progress: Callable[[int, int], None],
+) -> Tuple[List[Dict[str, Any]], ResponseColumns]:
+    """Parse spooled schema and responses files (blocking)
+
+    Returns the questions and the answers of the response rows.
+    ``report_progress`` is called with the rows parsed and raw bytes read
+    every ``INGEST_PROGRESS_EVERY`` rows.
+    """
+    with open(schema_path, "rb") as schema_stream:
+        stream, filename = open_decompressed(schema_stream, schema_filename)
+        questions = parse_schema(stream.read(), filename)
+
+    columns = ResponseColumns(questions)
+    with open(responses_path, "rb") as raw_stream:
+        counter = CountingReader(raw_stream)
+        stream, filename = open_decompressed(
+            io.BufferedReader(counter, buffer_size=SPOOL_CHUNK_SIZE),
+            responses_filename,
+        )
+        for response_dict in iter_response_rows(stream, filename, questions):
+            columns.add(response_dict)
+            if columns.participants % INGEST_PROGRESS_EVERY == 0:
+                report_progress(columns.participants, counter.bytes_read)
+
+    return questions, columns
+
+
+async def run_ingest_job(
+    db,
+    survey_id: str,
+    schema_path: str,
+    schema_filename: str,
+    responses_path: str,
+    responses_filename: str,
+    generate_description: bool = False,
+):
+    """Background ingest stage for asynchronous two-file uploads
+
+    Parses the spooled files, reports rows parsed and bytes read through the
+    survey's ``progress`` field, then flips the survey to ``pending`` so it is
+    picked up for analysis.
+    """
+    reporter = ProgressReporter(db, survey_id)
+    preprocessor = DataPreprocessor()
+    loop = asyncio.get_running_loop()
+
+    def report_progress(rows_parsed: int, bytes_read: int):
+        """Report progress from the parsing thread through the event loop"""
+        asyncio.run_coroutine_threadsafe(
+            _report_ingest_progress(reporter, rows_parsed, bytes_read, total_bytes),
+            loop,
+        ).result()
+
+    try:
+        # bytes_read counts compressed bytes, so progress matches the spooled size
+        total_bytes = os.path.getsize(responses_path)
+
+        # Decompressing and parsing (openpyxl and pyarrow row iteration
+        # included) runs in a thread so other requests are served meanwhile
+        questions, columns = await asyncio.to_thread(
+            parse_spooled_files,
+            schema_path,
+            schema_filename,
+            responses_path,
+            responses_filename,
+            report_progress,
+        )
+
+        if not columns.participants:
+            raise IngestError("No responses found in responses file")
+
+        await _report_ingest_progress(
+            reporter,
+            columns.participants,
+            total_bytes,
+            total_bytes,
+            message="Preprocessing responses...",
+        )
+
+        processed_data = await asyncio.to_thread(
+            build_processed_data, questions, columns, preprocessor
+        )
+        if not processed_data:
+            raise IngestError("No valid responses after preprocessing")
+        participant_data = await asyncio.to_thread(
+            build_participant_data, questions, columns
+        )
+
+        update = {
+            "questions": questions,
+            "total_participants": columns.participants,
+            "processed_data": processed_data,
+            **participant_data,
+            "total_responses": sum(
+                data["response_count"] for data in processed_data.values()
+            ),
+        }
+        # Responses go to the response store; the survey keeps metadata only
+        await store_survey_responses(db, survey_id, update)
+
+        update.update(
+            {
+                "status": SurveyStatus.PENDING.value,
+                "ingest_job.completed_at": datetime.utcnow(),
+                "progress.step": "ingested",
+                "progress.message": "Upload processed, waiting for analysis...",
+                "progress.percentage": 0,
+                "progress.last_updated": datetime.utcnow(),
+                "updated_at": datetime.utcnow(),
+            }
+        )
+        if generate_description:
+            update["description"] = (
+                f"Two-file survey with {len(questions)} questions and "
+                f"{columns.participants} participant responses"
+            )
+
+        await reporter.update(update)
+        logger.info(
+            f"Ingested survey {survey_id}: {columns.participants} participants, "
+            f"{len(processed_data)} analyzed questions"
+        )
+
+    except Exception as e:
+        logger.error(f"Ingest failed for survey {survey_id}: {str(e)}", exc_info=True)
+        await delete_responses(db, survey_id)
+        await reporter.update(
+            {
+                "status": SurveyStatus.FAILED.value,
+                "error": str(e),
+                "ingest_job.completed_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow(),
+            }
+        )
+
+    finally:
+        _remove_quietly(schema_path)
+        _remove_quietly(responses_path)
+
+
+async def _report_ingest_progress(
+    reporter: ProgressReporter,
+    rows_parsed: int,
+    bytes_read: int,
+    total_bytes: int,
+    message: Optional[str] = None,
+):
+    """Report ingest progress (rows parsed / bytes read) of the survey"""
+    percentage = (
+        min(100, int((bytes_read / total_bytes) * 100)) if total_bytes > 0 else 0
+    )
+    await reporter.update(
+        {
+            "progress.step": "ingesting",
+            "progress.message": message
+            or f"Parsed {rows_parsed} participant responses...",
+            "progress.rows_parsed": rows_parsed,
+            "progress.bytes_read": bytes_read,
+            "progress.total_bytes": total_bytes,
+            "progress.percentage": percentage,
+            "progress.last_updated": datetime.utcnow(),
+        }
+    )
@@ -1,4 +1,4 @@
-from openai import OpenAI
+from functools import cached_property
 from typing import List, Dict, Any
 import logging
 import json
@@ -6,6 +6,7 @@ import random
 import asyncio
 from app.core.config import settings
 from app.models.schemas import SentimentResult, TopicResult, OpenProblem, AnalysisType
+from app.services.statistics import analyze_closed_question, is_closed_question
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +15,6 @@ class LLMService:
     """Service for interacting with OpenAI LLM"""
 
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = settings.OPENAI_MODEL
         self.max_tokens = settings.OPENAI_MAX_TOKENS
         self.temperature = settings.OPENAI_TEMPERATURE
@@ -23,6 +23,13 @@ class LLMService:
         # For very large datasets, use stratified sampling
         self.sample_size_large_dataset = 500
 
+    @cached_property
+    def client(self):
+        """OpenAI client, created on first use (openai is slow to import)"""
+        from openai import OpenAI
+
+        return OpenAI(api_key=settings.OPENAI_API_KEY)
+
     def _sample_responses(
         self, responses: List[str], max_samples: int = None
     ) -> List[str]:
@@ -540,9 +547,19 @@ CRITICAL INSTRUCTIONS:
         }
 
     async def analyze_structured_survey(
-        self, processed_data: Dict[str, Dict], progress_callback=None
+        self,
+        processed_data: Dict[str, Dict],
+        progress_callback=None,
+        response_loader=None,
     ) -> Dict[str, Any]:
-        """Analyze a structured multi-question survey (like Stack Overflow Developer Survey)"""
+        """Analyze a structured multi-question survey (like Stack Overflow Developer Survey)
+
+        If processed_data entries carry no "responses" list, they are fetched one
+        question at a time with ``await response_loader(question_id)``.
+
+        Closed-ended questions (multiple_choice, rating) are summarized locally
+        with exact statistics; only open-ended questions are sent to the LLM.
+        """
 
         logger.info(
             f"Starting structured survey analysis with {len(processed_data)} questions"
@@ -556,9 +573,11 @@ CRITICAL INSTRUCTIONS:
         for question_id, data in processed_data.items():
             current_question += 1
             question_text = data["question_text"]
-            responses = data["responses"]
+            closed = is_closed_question(data.get("question_type"))
 
-            if len(responses) < 3:
+            if data.get("response_count", len(data.get("responses", []))) < (
+                1 if closed else 3
+            ):
                 # Skip questions with too few responses
                 logger.info(
                     f"Skipping question '{question_text}' - insufficient responses"
@@ -574,7 +593,19 @@ CRITICAL INSTRUCTIONS:
                     total_questions=total_questions,
                 )
 
-            analysis = await self.analyze_question(question_text, responses)
+            responses = data.get("responses")
+            if responses is None and response_loader:
+                responses = await response_loader(question_id)
+
+            if closed:
+                analysis = await asyncio.to_thread(
+                    analyze_closed_question,
+                    question_text,
+                    data["question_type"],
+                    responses or [],
+                )
+            else:
+                analysis = await self.analyze_question(question_text, responses or [])
             analysis["question_id"] = question_id
             question_analyses.append(analysis)
 
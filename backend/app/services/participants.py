@@ -0,0 +1,520 @@
+"""
+Participant-level columnar store
+
+``processed_data`` keeps each question's answers as a separate list, which
+loses which participant gave which answer. The participant table keeps one
+column per schema question, aligned by participant index, so answers can be
+related across questions ("CI answers of respondents who chose Python"):
+
+- categorical columns (multiple choice, rating, and any column with a small
+  set of repeated answers) are dictionary-encoded: the distinct answers plus
+  an int32 code per participant, -1 for no answer
+- text columns keep the raw answer of each participant, "" for no answer
+
+Segments resolve to boolean masks over participants (bitmaps) that combine
+with ``&`` and select a column's answers by indexing, so cross-tabs and
+segment summaries run on NumPy arrays without touching the raw responses.
+NumPy is imported by the functions using it, so that importing the
+application does not load it.
+
+Column metadata (kind, categories) is stored on the survey as
+``participant_index``; the arrays live in the ``participant_columns``
+collection::
+
+    {"survey_id", "question_id", "chunk_index", "codes": <int32 bytes>}
+    {"survey_id", "question_id", "chunk_index", "values": ["...", ...]}
+
+Categorical columns with up to MAX_BITMAP_OPTIONS options also get a bitmap
+index at ingest, one packed bitmap of matching participants per option, in
+``participant_bitmaps``::
+
+    {"survey_id", "question_id", "value", "bitmap": <np.packbits bytes>}
+
+so a segment filter is resolved by OR-ing / AND-ing the bitmaps of the
+requested values only, without loading any column.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from bson import Binary
+
+from app.services.statistics import MULTI_SELECT_SEPARATOR, is_closed_question
+
+# Participants per stored chunk of a text column / of a categorical column
+TEXT_CHUNK_SIZE = 1000
+CODES_CHUNK_SIZE = 1000000
+
+# Closed questions with more distinct answers than this are stored as text
+MAX_CATEGORIES = 1000
+
+# Other columns are categorical when answers repeat among at most this many values
+MAX_AUTO_CATEGORIES = 50
+
+# Columns with at most this many options get a per-option bitmap index
+MAX_BITMAP_OPTIONS = 100
+
+# Options (rows / columns) returned per side of a cross-tab
+MAX_CROSSTAB_OPTIONS = 50
+
+CATEGORICAL = "categorical"
+TEXT = "text"
+
+# Segment filter: {question_id: value or [values]}
+Segment = Dict[str, Union[str, List[str]]]
+
+
+class SegmentError(ValueError):
+    """Raised when a segment filter or cross-tab refers to unusable columns"""
+
+
+def answer_text(answer: Any) -> str:
+    """Normalize one raw answer to the text stored in the participant table"""
+    if answer is None or isinstance(answer, (dict, list)):
+        return ""
+    if isinstance(answer, bool):
+        return "true" if answer else "false"
+    return str(answer).strip()
+
+
+def encode_categorical(values: List[str]) -> Tuple[List[str], "np.ndarray"]:
+    """Dictionary-encode answers: sorted distinct values and int32 codes (-1 = empty)"""
+    import numpy as np
+
+    array = np.asarray(values, dtype=object)
+    categories, codes = np.unique(array, return_inverse=True)
+    codes = codes.astype(np.int32)
+
+    # "" sorts first; drop it from the dictionary and map it to -1
+    if len(categories) and categories[0] == "":
+        categories = categories[1:]
+        codes -= 1
+    return [str(category) for category in categories], codes
+
+
+def column_options(column: Dict[str, Any]) -> Tuple[List[str], List[List[str]]]:
+    """Option names of a categorical column and the options of each category
+
+    Multi-select answers ("Python;Go") belong to each of their options.
+    """
+    split = column["question_type"] == "multiple_choice"
+    category_options = [
+        (
+            [
+                option.strip()
+                for option in category.split(MULTI_SELECT_SEPARATOR)
+                if option.strip()
+            ]
+            if split
+            else [category]
+        )
+        for category in column["categories"]
+    ]
+    names = list(
+        dict.fromkeys(option for options in category_options for option in options)
+    )
+    return names, category_options
+
+
+def segment_options(index: Optional[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Values each categorical question of a ``participant_index`` can be filtered by"""
+    if not index:
+        return {}
+    return {
+        question_id: column_options(column)[0]
+        for question_id, column in index["columns"].items()
+        if column["kind"] == CATEGORICAL
+    }
+
+
+def _segment_values(values: Union[str, List[str]]) -> List[str]:
+    """Accepted values of one segment condition, as strings"""
+    if isinstance(values, (list, tuple, set)):
+        return [str(value) for value in values]
+    return [str(values)]
+
+
+def _check_condition(
+    columns: Dict[str, Dict[str, Any]], question_id: str, values: List[str]
+) -> List[str]:
+    """Validate one segment condition; returns the option names of its question"""
+    column = columns.get(question_id)
+    if column is None:
+        raise SegmentError(f"Unknown question: {question_id}")
+    if column["kind"] != CATEGORICAL:
+        raise SegmentError(f"Question {question_id} is not categorical")
+
+    names = column_options(column)[0]
+    unknown = [value for value in values if value not in names]
+    if unknown:
+        raise SegmentError(
+            f"Unknown value(s) for question {question_id}: {', '.join(unknown)}"
+        )
+    return names
+
+
+class ParticipantTable:
+    """Participant-aligned answer columns of one structured survey"""
+
+    def __init__(
+        self,
+        participants: int,
+        columns: Dict[str, Dict[str, Any]],
+        codes: Dict[str, "np.ndarray"],
+        texts: Dict[str, List[str]],
+    ):
+        self.participants = participants
+        # {question_id: {"kind", "question_type", "categories"?}}
+        self.columns = columns
+        self.codes = codes
+        self.texts = texts
+
+    @classmethod
+    def from_columns(
+        cls,
+        questions: List[Dict[str, Any]],
+        participants: int,
+        answer_texts: Dict[str, List[str]],
+    ) -> "ParticipantTable":
+        """Build the table from each question's ``answer_text`` per participant"""
+        import numpy as np
+
+        columns, codes, texts = {}, {}, {}
+        for question in questions:
+            question_id = question["question_id"]
+            question_type = question.get("question_type", "open_ended")
+            values = answer_texts[question_id]
+
+            categories, column_codes = encode_categorical(values)
+            answered = int(np.count_nonzero(column_codes >= 0))
+            if is_closed_question(question_type):
+                categorical = len(categories) <= MAX_CATEGORIES
+            else:
+                categorical = len(
+                    categories
+                ) <= MAX_AUTO_CATEGORIES and answered >= 2 * len(categories)
+
+            if categorical:
+                column = {
+                    "kind": CATEGORICAL,
+                    "question_type": question_type,
+                    "categories": categories,
+                }
+                column["bitmap_index"] = (
+                    len(column_options(column)[0]) <= MAX_BITMAP_OPTIONS
+                )
+                columns[question_id] = column
+                codes[question_id] = column_codes
+            else:
+                columns[question_id] = {"kind": TEXT, "question_type": question_type}
+                texts[question_id] = values
+
+        return cls(participants, columns, codes, texts)
+
+    def index_metadata(self) -> Dict[str, Any]:
+        """Column metadata stored on the survey document"""
+        return {"participants": self.participants, "columns": self.columns}
+
+    def _column(self, question_id: str) -> Dict[str, Any]:
+        if question_id not in self.columns:
+            raise SegmentError(f"Unknown question: {question_id}")
+        return self.columns[question_id]
+
+    def options(self, question_id: str) -> Tuple[List[str], "np.ndarray"]:
+        """Answer options of a categorical column and their membership matrix
+
+        Row ``c`` of the boolean matrix tells which options category ``c``
+        contains; an extra last row (all False) serves code -1.
+        """
+        import numpy as np
+
+        column = self._column(question_id)
+        if column["kind"] != CATEGORICAL:
+            raise SegmentError(f"Question {question_id} is not categorical")
+
+        names, category_options = column_options(column)
+        position = {name: i for i, name in enumerate(names)}
+
+        matrix = np.zeros((len(category_options) + 1, len(names)), dtype=bool)
+        for c, options in enumerate(category_options):
+            for option in options:
+                matrix[c, position[option]] = True
+        return names, matrix
+
+    def value_mask(self, question_id: str, values: List[str]) -> "np.ndarray":
+        """Participants whose answer to a question is (or includes) any of ``values``"""
+        _check_condition(self.columns, question_id, values)
+        names, matrix = self.options(question_id)
+        position = {name: i for i, name in enumerate(names)}
+        wanted = [position[value] for value in values]
+        lookup = matrix[:, wanted].any(axis=1)
+        # Code -1 indexes the last (all False) row
+        return lookup[self.codes[question_id]]
+
+    def segment_mask(self, segment: Optional[Segment]) -> "np.ndarray":
+        """Participants matching a segment filter
+
+        Conditions on different questions must all hold; any of the listed
+        values satisfies a question's condition.
+        """
+        import numpy as np
+
+        mask = np.ones(self.participants, dtype=bool)
+        for question_id, values in (segment or {}).items():
+            mask &= self.value_mask(question_id, _segment_values(values))
+        return mask
+
+    def value_bitmaps(self) -> Iterator[Tuple[str, str, bytes]]:
+        """Packed bitmap of each option of the categorical columns to index
+
+        Yields ``(question_id, option, bitmap)`` for columns with at most
+        MAX_BITMAP_OPTIONS options; bit ``i`` is set when participant ``i``
+        chose the option.
+        """
+        import numpy as np
+
+        for question_id, column in self.columns.items():
+            if not column.get("bitmap_index"):
+                continue
+            names, matrix = self.options(question_id)
+            codes = self.codes[question_id]
+            for i, name in enumerate(names):
+                yield question_id, name, np.packbits(matrix[:, i][codes]).tobytes()
+
+    def answers(
+        self, question_id: str, mask: Optional["np.ndarray"] = None
+    ) -> List[str]:
+        """Non-empty answers to a question of the participants in ``mask``"""
+        import numpy as np
+
+        column = self._column(question_id)
+        if column["kind"] == CATEGORICAL:
+            codes = self.codes[question_id]
+            if mask is not None:
+                codes = codes[mask]
+            categories = np.asarray(column["categories"], dtype=object)
+            return categories[codes[codes >= 0]].tolist()
+
+        values = self.texts[question_id]
+        if mask is not None:
+            values = [value for value, keep in zip(values, mask) if keep]
+        return [value for value in values if value]
+
+    def crosstab(
+        self,
+        row_question_id: str,
+        column_question_id: str,
+        mask: Optional["np.ndarray"] = None,
+    ) -> Dict[str, Any]:
+        """Participant counts for every (row option, column option) pair
+
+        Codes are counted pairwise with a single bincount, then mapped to
+        options through the membership matrices, so the cost is one pass
+        over the participants regardless of the number of options.
+        """
+        import numpy as np
+
+        row_names, row_matrix = self.options(row_question_id)
+        column_names, column_matrix = self.options(column_question_id)
+
+        row_codes = self.codes[row_question_id]
+        column_codes = self.codes[column_question_id]
+        if mask is not None:
+            row_codes, column_codes = row_codes[mask], column_codes[mask]
+
+        # Code -1 maps to the extra last row of each matrix
+        row_size, column_size = row_matrix.shape[0], column_matrix.shape[0]
+        pairs = np.bincount(
+            (row_codes % row_size).astype(np.int64) * column_size
+            + column_codes % column_size,
+            minlength=row_size * column_size,
+        ).reshape(row_size, column_size)
+        counts = row_matrix.T.astype(np.int64) @ pairs @ column_matrix.astype(np.int64)
+
+        row_order = _option_order(row_names, counts.sum(axis=1))
+        column_order = _option_order(column_names, counts.sum(axis=0))
+        counts = counts[np.ix_(row_order, column_order)]
+
+        return {
+            "row_question_id": row_question_id,
+            "column_question_id": column_question_id,
+            "participants": int(len(row_codes)),
+            "rows": [row_names[i] for i in row_order],
+            "columns": [column_names[i] for i in column_order],
+            "counts": counts.tolist(),
+            "row_totals": counts.sum(axis=1).tolist(),
+            "column_totals": counts.sum(axis=0).tolist(),
+        }
+
+
+def _option_order(names: List[str], totals: "np.ndarray") -> List[int]:
+    """Numeric options in scale order, others most frequent first (capped)"""
+    import numpy as np
+
+    try:
+        order = sorted(range(len(names)), key=lambda i: float(names[i]))
+    except ValueError:
+        order = list(np.argsort(-totals, kind="stable"))
+    return [int(i) for i in order[:MAX_CROSSTAB_OPTIONS]]
+
+
+async def store_participant_table(
+    db, survey_id: str, table: ParticipantTable
+) -> Dict[str, Any]:
+    """Write a table's arrays to ``participant_columns``; returns its metadata"""
+    documents = []
+    for question_id, codes in table.codes.items():
+        for index, start in enumerate(range(0, len(codes), CODES_CHUNK_SIZE)):
+            documents.append(
+                {
+                    "survey_id": survey_id,
+                    "question_id": question_id,
+                    "chunk_index": index,
+                    "codes": Binary(
+                        codes[start : start + CODES_CHUNK_SIZE].astype("<i4").tobytes()
+                    ),
+                }
+            )
+    for question_id, values in table.texts.items():
+        for index, start in enumerate(range(0, len(values), TEXT_CHUNK_SIZE)):
+            documents.append(
+                {
+                    "survey_id": survey_id,
+                    "question_id": question_id,
+                    "chunk_index": index,
+                    "values": values[start : start + TEXT_CHUNK_SIZE],
+                }
+            )
+
+    if documents:
+        await db.participant_columns.insert_many(documents, ordered=False)
+
+    bitmaps = [
+        {
+            "survey_id": survey_id,
+            "question_id": question_id,
+            "value": value,
+            "bitmap": Binary(bitmap),
+        }
+        for question_id, value, bitmap in table.value_bitmaps()
+    ]
+    if bitmaps:
+        await db.participant_bitmaps.insert_many(bitmaps, ordered=False)
+    return table.index_metadata()
+
+
+def participant_index(survey: Dict[str, Any]) -> Dict[str, Any]:
+    """A survey's participant table metadata
+
+    Raises SegmentError for surveys stored without one (simple surveys and
+    surveys uploaded before participant-level storage).
+    """
+    index = survey.get("participant_index")
+    if not index:
+        raise SegmentError(
+            "This survey has no participant-level data; re-upload it to use "
+            "segments and cross-tabs"
+        )
+    return index
+
+
+async def resolve_segment(
+    db, survey: Dict[str, Any], segment: Optional[Segment]
+) -> "np.ndarray":
+    """Mask of the participants of a survey matching a segment filter
+
+    Conditions on bitmap-indexed questions are resolved from the stored
+    bitmaps of the requested values; others from the question's codes.
+    """
+    import numpy as np
+
+    index = participant_index(survey)
+    columns = index["columns"]
+    participants = index["participants"]
+    mask = np.ones(participants, dtype=bool)
+    unindexed = {}
+
+    for question_id, values in (segment or {}).items():
+        values = _segment_values(values)
+        _check_condition(columns, question_id, values)
+        if not columns[question_id].get("bitmap_index"):
+            unindexed[question_id] = values
+            continue
+
+        question_mask = np.zeros(participants, dtype=bool)
+        cursor = db.participant_bitmaps.find(
+            {
+                "survey_id": str(survey["_id"]),
+                "question_id": question_id,
+                "value": {"$in": values},
+            },
+            projection={"_id": 0, "bitmap": 1},
+        )
+        async for document in cursor:
+            question_mask |= np.unpackbits(
+                np.frombuffer(document["bitmap"], dtype=np.uint8), count=participants
+            ).view(bool)
+        mask &= question_mask
+
+    if unindexed:
+        table = await load_participant_table(db, survey, unindexed)
+        mask &= table.segment_mask(unindexed)
+    return mask
+
+
+async def load_participant_table(
+    db, survey: Dict[str, Any], question_ids: Optional[Iterable[str]] = None
+) -> ParticipantTable:
+    """Load a survey's participant table (only ``question_ids`` when given)"""
+    import numpy as np
+
+    index = participant_index(survey)
+    columns = index["columns"]
+    wanted = (
+        list(columns) if question_ids is None else list(dict.fromkeys(question_ids))
+    )
+    for question_id in wanted:
+        if question_id not in columns:
+            raise SegmentError(f"Unknown question: {question_id}")
+
+    codes = {
+        question_id: []
+        for question_id in wanted
+        if columns[question_id]["kind"] == CATEGORICAL
+    }
+    texts = {
+        question_id: []
+        for question_id in wanted
+        if columns[question_id]["kind"] == TEXT
+    }
+
+    cursor = db.participant_columns.find(
+        {"survey_id": str(survey["_id"]), "question_id": {"$in": wanted}},
+        projection={"_id": 0, "survey_id": 0},
+    ).sort([("question_id", 1), ("chunk_index", 1)])
+    async for chunk in cursor:
+        if "codes" in chunk:
+            codes[chunk["question_id"]].append(
+                np.frombuffer(chunk["codes"], dtype="<i4")
+            )
+        else:
+            texts[chunk["question_id"]].extend(chunk["values"])
+
+    return ParticipantTable(
+        index["participants"],
+        {question_id: columns[question_id] for question_id in wanted},
+        {
+            question_id: (
+                np.concatenate(parts).astype(np.int32)
+                if parts
+                else np.empty(0, dtype=np.int32)
+            )
+            for question_id, parts in codes.items()
+        },
+        texts,
+    )
+
+
+async def delete_participant_table(db, survey_id: str):
+    """Delete a survey's participant columns and bitmap indexes"""
+    await db.participant_columns.delete_many({"survey_id": survey_id})
+    await db.participant_bitmaps.delete_many({"survey_id": survey_id})
@@ -1,37 +1,85 @@
+import copy
+import logging
 import re
 import string
-from typing import List
-import pandas as pd
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-import logging
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services.stopwords import ENGLISH_STOPWORDS
 
 logger = logging.getLogger(__name__)
 
-# Download required NLTK data
-try:
-    nltk.data.find("tokenizers/punkt")
-except LookupError:
-    nltk.download("punkt", quiet=True)
+# Regex tokenizer used when NLTK's punkt data is not installed: words (with
+# inner apostrophes or hyphens) and single punctuation marks
+TOKEN_PATTERN = re.compile(r"\w+(?:['-]\w+)*|[^\w\s]")
+
+
+@lru_cache(maxsize=1)
+def nltk_word_tokenize() -> Optional[Callable[[str], List[str]]]:
+    """NLTK's word_tokenize, or None if NLTK or its punkt data is not installed
+
+    NLTK is imported on first use rather than at startup, and its data is
+    never downloaded: deployments without it use the regex tokenizer.
+    """
+    try:
+        from nltk.tokenize import word_tokenize
+
+        word_tokenize("probe")
+    except (ImportError, LookupError):
+        logger.info("NLTK punkt data not installed; using the regex tokenizer")
+        return None
+    return word_tokenize
 
-try:
-    nltk.data.find("corpora/stopwords")
-except LookupError:
-    nltk.download("stopwords", quiet=True)
+
+# Entries kept by a memoized preprocessor (see DataPreprocessor.memoized)
+CLEAN_TEXT_MEMO_SIZE = 50000
+
+# Longer answers are rarely repeated, so they are cleaned without the memo
+CLEAN_TEXT_MEMO_MAX_LENGTH = 200
 
 
 class DataPreprocessor:
     """Handles data cleaning and preprocessing for survey responses"""
 
     def __init__(self):
-        self.stop_words = set(stopwords.words("english"))
+        self.stop_words = ENGLISH_STOPWORDS
+        self._memo = None
+
+    def memoized(self, max_size: int = CLEAN_TEXT_MEMO_SIZE) -> "DataPreprocessor":
+        """Copy of this preprocessor that memoizes clean_text on the raw string
+
+        Use one copy per ingest: answers repeated across participants and
+        questions ("n/a", tool names) are then cleaned once. The memo is an
+        LRU bounded to ``max_size`` entries.
+        """
+        memoized = copy.copy(self)
+        memoized._memo = lru_cache(maxsize=max_size)(memoized._clean_text)
+        return memoized
+
+    def memo_stats(self) -> Dict[str, Any]:
+        """Hits, misses, size and hit rate of the clean_text memo"""
+        if self._memo is None:
+            return {}
+        info = self._memo.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "hit_rate": info.hits / lookups if lookups else 0.0,
+        }
 
     def clean_text(self, text: str) -> str:
         """Clean a single text response"""
         if not text or not isinstance(text, str):
             return ""
 
+        if self._memo is not None and len(text) <= CLEAN_TEXT_MEMO_MAX_LENGTH:
+            return self._memo(text)
+        return self._clean_text(text)
+
+    def _clean_text(self, text: str) -> str:
         # Convert to lowercase
         text = text.lower()
 
@@ -77,6 +125,9 @@ class DataPreprocessor:
 
     def tokenize(self, text: str) -> List[str]:
         """Tokenize text into words"""
+        word_tokenize = nltk_word_tokenize()
+        if word_tokenize is None:
+            return TOKEN_PATTERN.findall(text)
         return word_tokenize(text)
 
     def remove_stopwords(self, tokens: List[str]) -> List[str]:
@@ -133,8 +184,6 @@ class DataPreprocessor:
         tokens = [t for t in tokens if t not in string.punctuation]
 
         # Count frequency
-        from collections import Counter
-
         word_freq = Counter(tokens)
 
         # Get top N keywords
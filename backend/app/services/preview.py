@@ -0,0 +1,420 @@
+"""
+Upload preview
+
+Samples the head of a schema/responses file pair so users can check the
+column to question mapping before uploading and parsing a large file. Only
+the first ``sample_bytes`` of each (decompressed) file are read, so the cost
+does not depend on file size. XLSX and Parquet keep their row index at the
+end of the file; for those the workbook dimension / Parquet footer is used
+instead of a head sample.
+"""
+
+import bz2
+import codecs
+import csv
+import io
+import json
+import lzma
+import zlib
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from app.services.ingestion import (
+    NDJSON_EXTENSIONS,
+    PARQUET_EXTENSIONS,
+    RESPONSES_SHEET,
+    SPREADSHEET_EXTENSIONS,
+    CountingReader,
+    IngestError,
+    cell_text,
+    data_extension,
+    file_extension,
+    find_sheet,
+    import_parquet,
+    iter_json_records,
+    iter_sheet_records,
+    open_decompressed,
+    open_workbook,
+    parse_schema,
+    seekable_stream,
+    zstandard,
+)
+
+# Default and maximum head sample per file
+PREVIEW_SAMPLE_BYTES = 64 * 1024
+PREVIEW_MAX_SAMPLE_BYTES = 1024 * 1024
+
+# Bytes read at a time while sampling
+PREVIEW_READ_SIZE = 16 * 1024
+
+# Errors of a decompressor fed a truncated or corrupt head
+HEAD_DECOMPRESSION_ERRORS = (EOFError, OSError, zlib.error, lzma.LZMAError) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+# Number of sample rows returned
+PREVIEW_SAMPLE_ROWS = 5
+
+# Candidate CSV delimiters
+CSV_DELIMITERS = ",;\t|"
+
+
+def _head_decompressor(filename: str):
+    """Incremental decompressor for the head of a file, or None
+
+    None for uncompressed files and ZIP archives (whose directory is at the
+    end of the file, so only a complete archive can be previewed).
+    """
+    ext = file_extension(filename)
+    if ext == "gz":
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    if ext == "bz2":
+        return bz2.BZ2Decompressor()
+    if ext == "xz":
+        return lzma.LZMADecompressor()
+    if ext == "zst" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj()
+    return None
+
+
+def read_head(stream: BinaryIO, filename: str, limit: int) -> Tuple[bytes, bool, int]:
+    """Read the first ``limit`` decompressed bytes of a possibly compressed file
+
+    Returns the sample, whether the file continues past it, and how many raw
+    (compressed) bytes were consumed to produce it. A compressed file that was
+    cut short (only its head was sent) yields whatever decompressed cleanly.
+    """
+    decompressor = _head_decompressor(filename)
+    if decompressor is None:
+        counter = CountingReader(stream)
+        decompressed, _ = open_decompressed(counter, filename)
+        head = b""
+        while len(head) <= limit:
+            data = decompressed.read(PREVIEW_READ_SIZE)
+            if not data:
+                return head, False, counter.bytes_read
+            head += data
+        return head[:limit], True, counter.bytes_read
+
+    # Feed the decompressor directly rather than through a buffered file
+    # object: a buffer reads ahead (inflating the raw byte count) and
+    # discards its output when the input is truncated
+    head = b""
+    raw_bytes = 0
+    # Raw bytes fed when output last came out: block compressors (bz2) hold
+    # back output until a block is complete
+    raw_bytes_out = 0
+    try:
+        while len(head) <= limit:
+            chunk = stream.read(PREVIEW_READ_SIZE)
+            if not chunk:
+                # Input ended before the compressed stream did: a head only
+                truncated = not getattr(decompressor, "eof", False)
+                return head, truncated, raw_bytes_out if truncated else raw_bytes
+            raw_bytes += len(chunk)
+            data = chunk
+            # Concatenated streams (e.g. multi-member gzip) start over
+            while data:
+                if getattr(decompressor, "eof", False):
+                    decompressor = _head_decompressor(filename)
+                output = decompressor.decompress(data)
+                data = getattr(decompressor, "unused_data", b"")
+                if output:
+                    head += output
+                    raw_bytes_out = raw_bytes
+    except HEAD_DECOMPRESSION_ERRORS:
+        # Corrupt data past the head: keep what decompressed cleanly
+        return head, True, raw_bytes_out
+
+    # Raw bytes in proportion to the part of the output kept
+    return head[:limit], True, raw_bytes_out * limit // len(head)
+
+
+def detect_encoding(head: bytes) -> str:
+    """Guess the text encoding of a sample from its BOM and UTF-8 validity"""
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # final=False: the sample may end in the middle of a character
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        head.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def detect_delimiter(text: str) -> str:
+    """Guess the CSV delimiter from the first lines of a sample"""
+    try:
+        return csv.Sniffer().sniff(text[:8192], delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        return ","
+
+
+def _complete_lines(head: bytes, truncated: bool) -> bytes:
+    """Drop the partial last line of a truncated sample"""
+    if not truncated:
+        return head
+    return head[: head.rfind(b"\n") + 1]
+
+
+def _estimate_rows(
+    sampled_rows: int, covered_bytes: int, total_bytes: int, truncated: bool
+) -> Tuple[int, bool]:
+    """Extrapolate the row count from the byte offset the sampled rows end at"""
+    if not truncated:
+        return sampled_rows, True
+    if sampled_rows == 0 or covered_bytes == 0:
+        return 0, False
+    return round(sampled_rows * total_bytes / covered_bytes), False
+
+
+def _record_columns(records: List[Any]) -> List[str]:
+    """Ordered union of the keys of JSON object records"""
+    columns = {}
+    for record in records:
+        if isinstance(record, dict):
+            columns.update(dict.fromkeys(record))
+    return list(columns)
+
+
+def preview_schema(
+    stream: BinaryIO, filename: str, sample_bytes: int
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Sample a schema file; returns its preview and the questions parsed"""
+    ext = data_extension(filename)
+    if ext in SPREADSHEET_EXTENSIONS:
+        decompressed, inner_name = open_decompressed(stream, filename)
+        questions = parse_schema(decompressed.read(), inner_name)
+        return {"filename": filename, "format": ext, "truncated": False}, questions
+
+    head, truncated, _ = read_head(stream, filename, sample_bytes)
+    encoding = detect_encoding(head)
+    if ext == "csv":
+        head = _complete_lines(head, truncated)
+    elif truncated:
+        raise IngestError(
+            f"Schema file {filename} is larger than the {sample_bytes // 1024}KB "
+            "preview sample"
+        )
+
+    text = head.decode(encoding, errors="replace")
+    questions = parse_schema(text.encode("utf-8"), f"schema.{ext}")
+    return {
+        "filename": filename,
+        "format": ext,
+        "encoding": encoding,
+        "truncated": truncated,
+    }, questions
+
+
+def preview_responses(
+    stream: BinaryIO,
+    filename: str,
+    total_bytes: int,
+    sample_bytes: int,
+    received_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Sample a responses file: format, encoding, columns, rows and row estimate
+
+    ``received_bytes`` is the size of ``stream`` when it only holds the head
+    of a file of ``total_bytes``.
+    """
+    ext = data_extension(filename)
+    compressed = ext != file_extension(filename)
+    preview = {
+        "filename": filename,
+        "format": ext,
+        "total_bytes": total_bytes,
+        "encoding": None,
+        "delimiter": None,
+    }
+
+    if ext in SPREADSHEET_EXTENSIONS + PARQUET_EXTENSIONS:
+        decompressed, _ = open_decompressed(stream, filename)
+        if ext in PARQUET_EXTENSIONS:
+            columns, rows, row_count = _preview_parquet(decompressed)
+        else:
+            columns, rows, row_count = _preview_workbook(decompressed)
+        preview.update(
+            {
+                "columns": columns,
+                "sample_rows": rows,
+                "estimated_rows": row_count,
+                "row_count_exact": ext in PARQUET_EXTENSIONS,
+                "sample_bytes": None,
+            }
+        )
+        return preview
+
+    head, truncated, raw_bytes = read_head(stream, filename, sample_bytes)
+    truncated = truncated or (received_bytes or total_bytes) < total_bytes
+    encoding = detect_encoding(head)
+    complete = _complete_lines(head, truncated)
+    text = complete.decode(encoding, errors="replace")
+    # File bytes covering the complete rows (pro rata for compressed files)
+    covered_bytes = (
+        int(raw_bytes * len(complete) / max(len(head), 1))
+        if compressed
+        else len(complete)
+    )
+
+    if ext == "csv":
+        delimiter = detect_delimiter(text)
+        reader = csv.reader(io.StringIO(text), delimiter=delimiter)
+        columns = next(reader, [])
+        records = [dict(zip(columns, row)) for row in reader if any(row)]
+        preview["delimiter"] = delimiter
+    elif ext in NDJSON_EXTENSIONS:
+        records = []
+        for line in text.splitlines():
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        columns = _record_columns(records)
+    elif ext == "json":
+        # The sample usually cuts an array element in half; keep what parsed
+        records = []
+        try:
+            for record in iter_json_records(io.BytesIO(head), "responses"):
+                records.append(record)
+        except (IngestError, UnicodeDecodeError):
+            pass
+        columns = _record_columns(records)
+        covered_bytes = raw_bytes if compressed else len(head)
+    else:
+        raise IngestError(f"Cannot preview {filename}")
+
+    estimated_rows, exact = _estimate_rows(
+        len(records), covered_bytes, total_bytes, truncated
+    )
+    preview.update(
+        {
+            "encoding": encoding,
+            "columns": columns,
+            "sample_rows": records[:PREVIEW_SAMPLE_ROWS],
+            "estimated_rows": estimated_rows,
+            "row_count_exact": exact,
+            "sample_bytes": len(head),
+        }
+    )
+    return preview
+
+
+def _preview_parquet(stream: BinaryIO) -> Tuple[List[str], List[Dict[str, str]], int]:
+    """Columns, first rows and exact row count (from the footer) of a Parquet file"""
+    pa, pq = import_parquet()
+    with seekable_stream(stream) as seekable:
+        try:
+            parquet_file = pq.ParquetFile(seekable)
+            batch = next(
+                parquet_file.iter_batches(batch_size=PREVIEW_SAMPLE_ROWS), None
+            )
+        except pa.ArrowException as e:
+            raise IngestError(f"Invalid Parquet file: {e}")
+
+        rows = [
+            {name: cell_text(value) for name, value in row.items()}
+            for row in (batch.to_pylist() if batch else [])
+        ]
+        return parquet_file.schema_arrow.names, rows, parquet_file.metadata.num_rows
+
+
+def _preview_workbook(
+    stream: BinaryIO,
+) -> Tuple[List[str], List[Dict[str, str]], Optional[int]]:
+    """Columns, first rows and row count (from the sheet dimension) of a workbook"""
+    with open_workbook(stream) as workbook:
+        sheet = find_sheet(workbook, RESPONSES_SHEET) or workbook.worksheets[0]
+        header = next(sheet.iter_rows(max_row=1, values_only=True), ())
+        columns = [cell_text(name) for name in header if name is not None]
+
+        rows = []
+        for row in iter_sheet_records(sheet):
+            rows.append(row)
+            if len(rows) >= PREVIEW_SAMPLE_ROWS:
+                break
+
+        # Read-only sheets report the dimension stored in the file, if any
+        max_row = sheet.max_row
+        return columns, rows, max_row - 1 if max_row else None
+
+
+def map_columns(columns: List[str], questions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Match responses columns to schema question IDs"""
+    by_id = {question["question_id"]: question for question in questions}
+    mapping = [
+        {
+            "column": column,
+            "question_id": column if column in by_id else None,
+            "question_text": (
+                by_id[column].get("question_text") if column in by_id else None
+            ),
+            "question_type": (
+                by_id[column].get("question_type") if column in by_id else None
+            ),
+        }
+        for column in columns
+    ]
+    column_set = set(columns)
+    return {
+        "mapping": mapping,
+        "unmapped_columns": [column for column in columns if column not in by_id],
+        "missing_questions": [qid for qid in by_id if qid not in column_set],
+    }
+
+
+def preview_upload(
+    schema_stream: Optional[BinaryIO],
+    schema_filename: Optional[str],
+    responses_stream: BinaryIO,
+    responses_filename: str,
+    responses_size: int,
+    sample_bytes: int = PREVIEW_SAMPLE_BYTES,
+    received_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Preview a two-file upload (the schema file is optional)
+
+    ``responses_size`` is the full size of the responses file; the stream may
+    hold only its first ``received_size`` bytes.
+    """
+    warnings = []
+    responses = preview_responses(
+        responses_stream,
+        responses_filename,
+        responses_size,
+        sample_bytes,
+        received_size,
+    )
+    result = {"responses": responses, "schema": None}
+
+    if responses["delimiter"] not in (None, ","):
+        warnings.append(
+            f"Responses file uses {responses['delimiter']!r} as delimiter; "
+            "only comma-separated CSV files can be uploaded"
+        )
+    if responses["encoding"] not in (None, "utf-8", "utf-8-sig"):
+        warnings.append(
+            f"Responses file looks {responses['encoding']} encoded; "
+            "uploads must be UTF-8"
+        )
+
+    if schema_stream is not None:
+        schema, questions = preview_schema(schema_stream, schema_filename, sample_bytes)
+        schema["questions"] = len(questions)
+        result["schema"] = schema
+        result.update(map_columns(responses["columns"], questions))
+        if questions and not any(entry["question_id"] for entry in result["mapping"]):
+            warnings.append(
+                "None of the schema question IDs appear in the responses columns"
+            )
+
+    result["warnings"] = warnings
+    return result
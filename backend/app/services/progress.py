@@ -0,0 +1,234 @@
+"""
+Analysis progress reporting and events
+
+Pipelines report status and progress changes of a survey through a
+``ProgressReporter``. Every change is published at once to an in-process
+broker, from which GET /analysis/{id}/events streams them to the browser
+(Server-Sent Events) instead of the browser polling /status. Updates are
+published as ``$set`` fields (dotted keys such as ``progress.percentage``),
+so subscribers merge them into the status they loaded when subscribing.
+
+Writes to MongoDB are coalesced: progress updates within
+``PROGRESS_WRITE_INTERVAL`` seconds are merged into one write with a relaxed
+write concern, while status changes (processing, completed, failed, ...)
+are written through immediately with the default one.
+
+Analyses run by another process (cron_process_surveys.py, other workers) do
+not reach this broker; streams re-read the status from MongoDB whenever no
+event arrived for ``PROGRESS_FALLBACK_INTERVAL`` seconds.
+
+Status reads (``load_status``) fetch only the status fields and are cached
+for ``STATUS_CACHE_TTL`` seconds. Reporters of this process apply their
+updates to the cached status, statuses loaded while a reporter holds
+progress include it, and the cache is invalidated once held updates are
+written.
+"""
+
+import asyncio
+import copy
+import logging
+import time
+import weakref
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+
+from bson import ObjectId
+from pymongo import WriteConcern
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which no more progress is reported
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Survey fields making up its status
+STATUS_FIELDS = ("status", "progress", "updated_at", "error")
+
+# Progress writes are acknowledged by the primary without waiting for the
+# journal or replication: a lost one is superseded by the next
+PROGRESS_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+# Updates buffered per subscriber; a slow subscriber drops the oldest ones
+SUBSCRIBER_QUEUE_SIZE = 64
+
+
+class ProgressBroker:
+    """In-process publish/subscribe of status updates, by survey ID"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, survey_id: str) -> asyncio.Queue:
+        """Queue receiving the status updates of a survey"""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers[survey_id].add(queue)
+        return queue
+
+    def unsubscribe(self, survey_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(survey_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[survey_id]
+
+    def publish(self, survey_id: str, update: Dict[str, Any]) -> None:
+        """Send a ``$set`` update of a survey's status to its subscribers"""
+        for queue in self._subscribers.get(survey_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(update)
+
+
+progress_broker = ProgressBroker()
+
+# Survey ID -> owner and status fields, as read by load_status
+status_cache = TTLCache(ttl=settings.STATUS_CACHE_TTL)
+
+# Survey ID -> reporter of this process, whose held updates load_status adds
+_reporters: "weakref.WeakValueDictionary[str, ProgressReporter]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def apply_update(status: Dict[str, Any], update: Dict[str, Any]) -> None:
+    """Merge a ``$set`` update (with dotted keys) into a status dict"""
+    for key, value in update.items():
+        target = status
+        *parents, field = key.split(".")
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[field] = copy.deepcopy(value)
+
+
+def _merge_update(pending: Dict[str, Any], update: Dict[str, Any]) -> None:
+    """Merge a ``$set`` update into pending ones without conflicting paths
+
+    MongoDB rejects a ``$set`` of both ``progress`` and ``progress.step``, so
+    a field under a pending parent is merged into the parent's value, and a
+    parent replaces its pending fields.
+    """
+    for key, value in update.items():
+        parts = key.split(".")
+        parent = next(
+            (
+                ".".join(parts[:i])
+                for i in range(1, len(parts))
+                if ".".join(parts[:i]) in pending
+            ),
+            None,
+        )
+        if parent is not None:
+            pending[parent] = copy.deepcopy(pending[parent])
+            apply_update(pending[parent], {key[len(parent) + 1 :]: value})
+            continue
+        for pending_key in [k for k in pending if k.startswith(key + ".")]:
+            del pending[pending_key]
+        pending[key] = value
+
+
+class ProgressReporter:
+    """Status and progress of one survey, written to MongoDB coalesced
+
+    ``update`` publishes a ``$set`` update to event stream subscribers right
+    away. Updates changing ``status`` are written through (with any pending
+    ones) before ``update`` returns; progress-only updates are held and
+    written together at most every ``interval`` seconds.
+    """
+
+    def __init__(self, db, survey_id: str, interval: Optional[float] = None):
+        self.db = db
+        self.survey_id = survey_id
+        self.interval = (
+            settings.PROGRESS_WRITE_INTERVAL if interval is None else interval
+        )
+        self._filter = {"_id": ObjectId(survey_id)}
+        self._pending: Dict[str, Any] = {}
+        self._last_write = 0.0
+        self._lock = asyncio.Lock()
+        self._delayed_flush: Optional[asyncio.Task] = None
+        _reporters[survey_id] = self
+
+    async def update(self, update: Dict[str, Any]) -> None:
+        """Report a ``$set`` update of the survey's status and progress"""
+        status_update = {
+            key: value
+            for key, value in update.items()
+            if key.split(".")[0] in STATUS_FIELDS
+        }
+        if status_update:
+            progress_broker.publish(self.survey_id, status_update)
+            cached = status_cache.get(self.survey_id)
+            if cached is not None:
+                apply_update(cached, status_update)
+        _merge_update(self._pending, update)
+
+        if "status" in update:
+            await self.flush(write_concern=None)
+        elif time.monotonic() - self._last_write >= self.interval:
+            await self.flush()
+        elif self._delayed_flush is None:
+            self._delayed_flush = asyncio.create_task(self._flush_later())
+
+    def held_status(self) -> Dict[str, Any]:
+        """Status fields of the updates not written yet, as ``$set`` fields"""
+        return {
+            key: value
+            for key, value in self._pending.items()
+            if key.split(".")[0] in STATUS_FIELDS
+        }
+
+    async def flush(
+        self, write_concern: Optional[WriteConcern] = PROGRESS_WRITE_CONCERN
+    ):
+        """Write pending updates (with the default write concern if None)"""
+        async with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            surveys = self.db.surveys
+            if write_concern is not None:
+                surveys = surveys.with_options(write_concern=write_concern)
+            await surveys.update_one(self._filter, {"$set": pending})
+            self._last_write = time.monotonic()
+            # Cached reads in between may predate the write
+            status_cache.invalidate(self.survey_id)
+
+    async def _flush_later(self):
+        """Write held progress once the interval has passed"""
+        await asyncio.sleep(
+            max(0.0, self.interval - (time.monotonic() - self._last_write))
+        )
+        self._delayed_flush = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"Progress write failed for survey {self.survey_id}: {e}")
+
+
+async def load_status(
+    db, survey_id: str, user_id: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """Status, progress and error of a survey (optionally only if owned by a user)
+
+    Reads only the status fields, through the status cache.
+    """
+    survey = status_cache.get(survey_id)
+    if survey is None:
+        survey = await db.surveys.find_one(
+            {"_id": ObjectId(survey_id)},
+            projection={"user_id": 1, **{field: 1 for field in STATUS_FIELDS}},
+        )
+        if survey is None:
+            return None
+        reporter = _reporters.get(survey_id)
+        if reporter is not None:
+            apply_update(survey, reporter.held_status())
+        status_cache.set(survey_id, survey)
+
+    if user_id is not None and survey.get("user_id") != user_id:
+        return None
+    # Copies, since callers merge updates into the status
+    return {field: copy.deepcopy(survey.get(field)) for field in STATUS_FIELDS}
@@ -0,0 +1,116 @@
+"""
+Per-question descriptive statistics
+
+Computed once at ingest from the participant table and stored on the survey
+as ``question_stats``, so the survey overview can show response counts,
+empty-answer rates, answer lengths and top keywords without loading any
+responses. Keywords come from one scikit-learn CountVectorizer pass over
+each open-ended question's answers; scikit-learn is imported on first use
+since it is slow to import.
+"""
+
+from typing import Any, Dict, List
+
+from app.services.participants import CATEGORICAL, ParticipantTable
+from app.services.statistics import is_closed_question
+
+TOP_KEYWORDS = 10
+
+# Answer length bins, in words: 1, 2-5, 6-10, 11-20, 21-50, 51+
+LENGTH_BIN_EDGES = [1, 2, 6, 11, 21, 51]
+
+
+def answer_lengths(table: ParticipantTable, question_id: str) -> "np.ndarray":
+    """Word count of each non-empty answer to a question"""
+    import numpy as np
+
+    column = table.columns[question_id]
+    if column["kind"] == CATEGORICAL:
+        # Count words once per distinct answer, then expand by code
+        category_lengths = np.array(
+            [len(category.split()) for category in column["categories"]],
+            dtype=np.int64,
+        )
+        codes = table.codes[question_id]
+        return category_lengths[codes[codes >= 0]]
+
+    return np.fromiter(
+        (len(answer.split()) for answer in table.texts[question_id] if answer),
+        dtype=np.int64,
+    )
+
+
+def length_distribution(lengths: "np.ndarray") -> Dict[str, Any]:
+    """Mean, median, p90 and binned histogram of answer lengths in words"""
+    import numpy as np
+
+    if not lengths.size:
+        return {"mean_words": 0.0, "median_words": 0.0, "p90_words": 0.0, "bins": []}
+
+    edges = LENGTH_BIN_EDGES + [max(int(lengths.max()), LENGTH_BIN_EDGES[-1]) + 1]
+    counts, _ = np.histogram(lengths, bins=edges)
+    labels = [
+        str(low) if high - low == 1 else f"{low}-{high - 1}"
+        for low, high in zip(LENGTH_BIN_EDGES, LENGTH_BIN_EDGES[1:])
+    ] + [f"{LENGTH_BIN_EDGES[-1]}+"]
+
+    return {
+        "mean_words": round(float(lengths.mean()), 2),
+        "median_words": float(np.median(lengths)),
+        "p90_words": float(np.percentile(lengths, 90)),
+        "bins": [
+            {"words": label, "count": int(count)}
+            for label, count in zip(labels, counts)
+        ],
+    }
+
+
+def top_keywords(answers: List[str], top_n: int = TOP_KEYWORDS) -> List[Dict[str, Any]]:
+    """Most frequent non-stopword terms across a question's answers"""
+    if not answers:
+        return []
+
+    import numpy as np
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    vectorizer = CountVectorizer(stop_words="english", lowercase=True)
+    try:
+        term_counts = vectorizer.fit_transform(answers)
+    except ValueError:  # only stopwords / no tokens
+        return []
+
+    totals = np.asarray(term_counts.sum(axis=0)).ravel()
+    terms = vectorizer.get_feature_names_out()
+    order = np.argsort(-totals, kind="stable")[:top_n]
+    return [{"keyword": str(terms[i]), "count": int(totals[i])} for i in order]
+
+
+def describe_question(table: ParticipantTable, question_id: str) -> Dict[str, Any]:
+    """Descriptive statistics of one question's answers"""
+    lengths = answer_lengths(table, question_id)
+    response_count = int(lengths.size)
+    empty_count = table.participants - response_count
+    question_type = table.columns[question_id]["question_type"]
+
+    return {
+        "response_count": response_count,
+        "empty_count": empty_count,
+        "empty_rate": (
+            round(empty_count / table.participants, 4) if table.participants else 0.0
+        ),
+        "length": length_distribution(lengths),
+        # Keywords are meaningless for fixed answer options
+        "top_keywords": (
+            []
+            if is_closed_question(question_type)
+            else top_keywords(table.answers(question_id))
+        ),
+    }
+
+
+def describe_questions(table: ParticipantTable) -> Dict[str, Dict[str, Any]]:
+    """Descriptive statistics of every question of a participant table"""
+    return {
+        question_id: describe_question(table, question_id)
+        for question_id in table.columns
+    }
@@ -0,0 +1,236 @@
+"""
+Out-of-document response storage
+
+Survey responses are stored in the ``responses`` collection, chunked by
+question, instead of being embedded in the survey document. This keeps
+survey documents well under MongoDB's 16 MB limit and keeps reads of
+survey metadata (status polls, listings) small. When the column cache is
+enabled (see ``column_cache``), each question is also written to an Arrow
+file and loads and pages are served from it.
+
+Chunk document layout::
+
+    {
+        "survey_id": "<survey id>",
+        "question_id": "<question id>",   # SIMPLE_QUESTION_ID for simple surveys
+        "chunk_index": 0,
+        "responses": ["...", ...],
+        "count": 1000,
+    }
+"""
+
+import logging
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from bson import ObjectId
+
+from app.services import column_cache, participants
+
+logger = logging.getLogger(__name__)
+
+# Number of responses stored per chunk document
+RESPONSE_CHUNK_SIZE = 1000
+
+# Question ID used for the single response list of simple surveys
+SIMPLE_QUESTION_ID = "_responses"
+
+# Value of survey["response_storage"] for surveys using this store
+EXTERNAL_STORAGE = "collection"
+
+
+async def store_responses(
+    db, survey_id: str, question_id: str, responses: List[str]
+) -> int:
+    """Bulk-insert one question's responses as chunk documents"""
+    chunks = [
+        {
+            "survey_id": survey_id,
+            "question_id": question_id,
+            "chunk_index": index,
+            "responses": responses[start : start + RESPONSE_CHUNK_SIZE],
+            "count": len(responses[start : start + RESPONSE_CHUNK_SIZE]),
+        }
+        for index, start in enumerate(range(0, len(responses), RESPONSE_CHUNK_SIZE))
+    ]
+    if chunks:
+        await db.responses.insert_many(chunks, ordered=False)
+        await column_cache.cache_responses(survey_id, question_id, responses)
+    return len(chunks)
+
+
+async def iter_response_chunks(
+    db, survey_id: str, question_id: str
+) -> AsyncIterator[List[str]]:
+    """Stream one question's responses chunk by chunk"""
+    cursor = db.responses.find(
+        {"survey_id": survey_id, "question_id": question_id},
+        projection={"responses": 1, "_id": 0},
+    ).sort("chunk_index", 1)
+    async for chunk in cursor:
+        yield chunk["responses"]
+
+
+async def load_responses(db, survey_id: str, question_id: str) -> List[str]:
+    """Load all responses for one question"""
+    cached = await column_cache.load_cached_responses(survey_id, question_id)
+    if cached is not None:
+        return cached
+
+    responses = []
+    async for chunk in iter_response_chunks(db, survey_id, question_id):
+        responses.extend(chunk)
+    return responses
+
+
+async def delete_responses(db, survey_id: str):
+    """Delete every stored response of a survey"""
+    await db.responses.delete_many({"survey_id": survey_id})
+    await participants.delete_participant_table(db, survey_id)
+    column_cache.delete_survey_columns(survey_id)
+
+
+async def store_survey_responses(db, survey_id: str, survey_doc: Dict[str, Any]):
+    """Move responses out of a survey document into the response store
+
+    Removes ``responses`` / ``processed_data[qid].responses`` from
+    ``survey_doc`` in place and marks the document as externally stored. A
+    ``participant_table`` (see ``participants``) is stored as well and
+    replaced by its ``participant_index`` metadata.
+    """
+    if "responses" in survey_doc:
+        await store_responses(
+            db, survey_id, SIMPLE_QUESTION_ID, survey_doc.pop("responses")
+        )
+
+    for question_id, data in survey_doc.get("processed_data", {}).items():
+        if "responses" in data:
+            await store_responses(db, survey_id, question_id, data.pop("responses"))
+
+    if "participant_table" in survey_doc:
+        survey_doc["participant_index"] = await participants.store_participant_table(
+            db, survey_id, survey_doc.pop("participant_table")
+        )
+
+    survey_doc["response_storage"] = EXTERNAL_STORAGE
+
+
+async def insert_survey(db, survey_doc: Dict[str, Any]) -> str:
+    """Insert a survey document, storing its responses out of document
+
+    Returns the new survey ID.
+    """
+    survey_doc["_id"] = ObjectId()
+    survey_id = str(survey_doc["_id"])
+
+    try:
+        await store_survey_responses(db, survey_id, survey_doc)
+        await db.surveys.insert_one(survey_doc)
+    except Exception:
+        await delete_responses(db, survey_id)
+        raise
+
+    return survey_id
+
+
+def uses_response_store(survey: Dict[str, Any]) -> bool:
+    """Whether a survey keeps its responses in the response store"""
+    return survey.get("response_storage") == EXTERNAL_STORAGE
+
+
+async def get_question_responses(
+    db, survey: Dict[str, Any], question_id: str
+) -> List[str]:
+    """Get one question's responses, whether embedded or stored externally"""
+    if uses_response_store(survey):
+        return await load_responses(db, str(survey["_id"]), question_id)
+    return survey.get("processed_data", {}).get(question_id, {}).get("responses", [])
+
+
+async def get_simple_responses(db, survey: Dict[str, Any]) -> List[str]:
+    """Get the responses of a simple survey, whether embedded or stored externally"""
+    if uses_response_store(survey):
+        return await load_responses(db, str(survey["_id"]), SIMPLE_QUESTION_ID)
+    return survey.get("responses", [])
+
+
+def _embedded_responses(survey: Dict[str, Any], question_id: str) -> List[str]:
+    """Responses of one question of a survey that stores them in its document"""
+    if question_id == SIMPLE_QUESTION_ID:
+        return survey.get("responses", [])
+    return survey.get("processed_data", {}).get(question_id, {}).get("responses", [])
+
+
+async def read_response_page(
+    db, survey: Dict[str, Any], question_id: str, start: int, limit: int
+) -> List[str]:
+    """Responses ``start`` to ``start + limit`` of one question
+
+    Only the chunk documents (or the cached column slice) holding the page
+    are read.
+    """
+    if not uses_response_store(survey):
+        return _embedded_responses(survey, question_id)[start : start + limit]
+
+    column = await column_cache.load_cached_column(str(survey["_id"]), question_id)
+    if column is not None:
+        return column.slice(start, limit).to_pylist()
+
+    first_chunk = start // RESPONSE_CHUNK_SIZE
+    last_chunk = (start + limit - 1) // RESPONSE_CHUNK_SIZE
+    cursor = db.responses.find(
+        {
+            "survey_id": str(survey["_id"]),
+            "question_id": question_id,
+            "chunk_index": {"$gte": first_chunk, "$lte": last_chunk},
+        },
+        projection={"responses": 1, "_id": 0},
+    ).sort("chunk_index", 1)
+
+    responses = []
+    async for chunk in cursor:
+        responses.extend(chunk["responses"])
+    offset = start - first_chunk * RESPONSE_CHUNK_SIZE
+    return responses[offset : offset + limit]
+
+
+async def iter_responses_from(
+    db, survey: Dict[str, Any], question_id: str, start: int = 0
+) -> AsyncIterator[Tuple[int, str]]:
+    """Stream ``(index, response)`` pairs of one question from ``start`` on"""
+    if not uses_response_store(survey):
+        responses = _embedded_responses(survey, question_id)[start:]
+        for index, response in enumerate(responses, start):
+            yield index, response
+        return
+
+    column = await column_cache.load_cached_column(str(survey["_id"]), question_id)
+    if column is not None:
+        # Converted one chunk's worth at a time
+        for first in range(start, len(column), RESPONSE_CHUNK_SIZE):
+            page = column.slice(first, RESPONSE_CHUNK_SIZE).to_pylist()
+            for index, response in enumerate(page, first):
+                yield index, response
+        return
+
+    cursor = db.responses.find(
+        {
+            "survey_id": str(survey["_id"]),
+            "question_id": question_id,
+            "chunk_index": {"$gte": start // RESPONSE_CHUNK_SIZE},
+        },
+        projection={"responses": 1, "chunk_index": 1, "_id": 0},
+    ).sort("chunk_index", 1)
+    async for chunk in cursor:
+        first = chunk["chunk_index"] * RESPONSE_CHUNK_SIZE
+        for index, response in enumerate(chunk["responses"], first):
+            if index >= start:
+                yield index, response
+
+
+def question_response_loader(db, survey: Dict[str, Any]):
+    """Build a per-question response loader for LLMService.analyze_structured_survey"""
+
+    async def loader(question_id: str) -> List[str]:
+        return await get_question_responses(db, survey, question_id)
+
+    return loader
@@ -0,0 +1,196 @@
+"""
+Local statistics for closed-ended questions
+
+Multiple choice and rating answers have a fixed vocabulary, so they are
+summarized exactly with NumPy (frequency tables, means, medians, histograms,
+percentiles) instead of being sent to the LLM. Only open-ended questions cost
+tokens. NumPy is imported when a question is summarized, not at startup.
+"""
+
+from typing import Any, Dict, List, Optional
+
+# Question types analyzed locally; everything else goes to the LLM
+CLOSED_QUESTION_TYPES = ["multiple_choice", "rating"]
+
+# Separator of multi-select answers (e.g. "Python;Go;Rust")
+MULTI_SELECT_SEPARATOR = ";"
+
+# Frequency table rows returned (the rest is counted as "other")
+MAX_FREQUENCY_ROWS = 50
+
+# Numeric answers with at most this many distinct values get one bin per value
+MAX_DISCRETE_VALUES = 20
+HISTOGRAM_BINS = 10
+
+PERCENTILES = [10, 25, 50, 75, 90]
+
+
+def is_closed_question(question_type: Optional[str]) -> bool:
+    """Whether a question type is analyzed locally instead of by the LLM"""
+    return (question_type or "").lower() in CLOSED_QUESTION_TYPES
+
+
+def frequency_table(values: "np.ndarray", total: int) -> Dict[str, Any]:
+    """Counts and percentages of each distinct value, most frequent first"""
+    import numpy as np
+
+    options, counts = np.unique(values, return_counts=True)
+    order = np.argsort(-counts, kind="stable")
+    rows = [
+        {
+            "value": str(options[i]),
+            "count": int(counts[i]),
+            "percentage": round(100 * float(counts[i]) / total, 2) if total else 0.0,
+        }
+        for i in order[:MAX_FREQUENCY_ROWS]
+    ]
+    return {
+        "rows": rows,
+        "distinct_values": int(len(options)),
+        "other_count": int(counts[order[MAX_FREQUENCY_ROWS:]].sum()),
+    }
+
+
+def numeric_summary(numbers: "np.ndarray") -> Dict[str, Any]:
+    """Mean, median, spread, percentiles and histogram of numeric answers"""
+    import numpy as np
+
+    distinct = np.unique(numbers)
+    if len(distinct) <= MAX_DISCRETE_VALUES:
+        # Ratings: one bin per scale point
+        counts = [int(np.count_nonzero(numbers == value)) for value in distinct]
+        histogram = [
+            {"bin": _format_number(value), "count": count}
+            for value, count in zip(distinct, counts)
+        ]
+    else:
+        counts, edges = np.histogram(numbers, bins=HISTOGRAM_BINS)
+        histogram = [
+            {
+                "bin": f"{_format_number(edges[i])}-{_format_number(edges[i + 1])}",
+                "count": int(counts[i]),
+            }
+            for i in range(len(counts))
+        ]
+
+    return {
+        "count": int(numbers.size),
+        "mean": round(float(np.mean(numbers)), 4),
+        "median": float(np.median(numbers)),
+        "std": round(float(np.std(numbers)), 4),
+        "min": float(np.min(numbers)),
+        "max": float(np.max(numbers)),
+        "percentiles": {
+            f"p{p}": float(value)
+            for p, value in zip(PERCENTILES, np.percentile(numbers, PERCENTILES))
+        },
+        "histogram": histogram,
+    }
+
+
+def _format_number(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else f"{value:.2f}"
+
+
+def _parse_numbers(answers: List[str]) -> "np.ndarray":
+    """Numeric values among the answers (non-numeric answers are dropped)"""
+    import numpy as np
+
+    numbers = []
+    for answer in answers:
+        try:
+            numbers.append(float(answer))
+        except (TypeError, ValueError):
+            continue
+    array = np.asarray(numbers, dtype=np.float64)
+    return array[np.isfinite(array)]
+
+
+def analyze_closed_question(
+    question_text: str, question_type: str, answers: List[str]
+) -> Dict[str, Any]:
+    """Summarize a closed-ended question over all of its raw answers
+
+    Returns a dict shaped like LLMService.analyze_question results (summary,
+    key_findings, ...) plus a ``statistics`` block with the exact figures.
+    """
+    import numpy as np
+
+    answers = [str(answer).strip() for answer in answers if str(answer).strip()]
+    question_type = question_type.lower()
+
+    # Multi-select answers count once per selected option
+    if question_type == "multiple_choice" and any(
+        MULTI_SELECT_SEPARATOR in answer for answer in answers
+    ):
+        selections = [
+            option.strip()
+            for answer in answers
+            for option in answer.split(MULTI_SELECT_SEPARATOR)
+            if option.strip()
+        ]
+    else:
+        selections = answers
+
+    statistics = {
+        "respondents": len(answers),
+        "frequencies": frequency_table(
+            np.asarray(selections, dtype=object), len(answers)
+        ),
+    }
+
+    numbers = _parse_numbers(answers) if question_type == "rating" else np.empty(0)
+    if numbers.size:
+        statistics["numeric"] = numeric_summary(numbers)
+        statistics["non_numeric_count"] = len(answers) - int(numbers.size)
+
+    summary, key_findings = _describe(statistics)
+
+    return {
+        "question_text": question_text,
+        "question_type": question_type,
+        "analysis_method": "local_statistics",
+        "summary": summary,
+        "key_findings": key_findings,
+        "sentiment": None,
+        "topics": [],
+        "open_problems": [],
+        "statistics": statistics,
+        "response_count": len(answers),
+    }
+
+
+def _describe(statistics: Dict[str, Any]):
+    """Plain-language summary and findings derived from the statistics"""
+    respondents = statistics["respondents"]
+    rows = statistics["frequencies"]["rows"]
+    numeric = statistics.get("numeric")
+
+    if not respondents:
+        return "No answers were given to this question.", []
+
+    if numeric:
+        summary = (
+            f"{respondents} respondents answered. Mean rating {numeric['mean']:.2f} "
+            f"(median {_format_number(numeric['median'])}, range "
+            f"{_format_number(numeric['min'])}-{_format_number(numeric['max'])})."
+        )
+        key_findings = [
+            f"Half of the ratings fall between {_format_number(numeric['percentiles']['p25'])} "
+            f"and {_format_number(numeric['percentiles']['p75'])}",
+            f"Standard deviation is {numeric['std']:.2f}",
+        ]
+    else:
+        top = rows[0]
+        summary = (
+            f"{respondents} respondents answered. The most common answer is "
+            f"'{top['value']}' ({top['percentage']:.1f}%)."
+        )
+        key_findings = []
+
+    key_findings += [
+        f"'{row['value']}': {row['count']} ({row['percentage']:.1f}%)"
+        for row in rows[:5]
+    ]
+    return summary, key_findings
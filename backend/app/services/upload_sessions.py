@@ -0,0 +1,396 @@
+"""
+Resumable chunked uploads
+
+An upload session is created per file. Clients PUT numbered chunks with a
+SHA-256 checksum; chunks are written to a per-session spool directory, so a
+dropped connection only costs the chunk in flight. Finalize assembles the
+chunks into one spooled file that is handed to the regular ingest pipeline;
+the chunks are kept until the files are accepted, so a failed finalize can be
+retried without uploading again.
+
+Rows are only parsed by the ingest job, after finalize. While chunks arrive,
+the contiguous prefix received so far of an uncompressed CSV or NDJSON file
+is scanned for a cheap pre-check: its lines are counted and, for CSV, the
+header row is read, which lets finalize reject a responses file whose header
+names none of the schema's questions before the ingest job starts. Other
+formats (compressed files, JSON, XLSX, Parquet) are not scanned.
+
+Sessions expire ``SESSION_TTL_HOURS`` after creation: expired sessions are
+no longer served, MongoDB removes them (TTL index on ``expires_at``) and
+``cleanup_expired_sessions`` removes their chunks.
+"""
+
+import csv
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiofiles
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.services.ingestion import (
+    NDJSON_EXTENSIONS,
+    SPOOL_CHUNK_SIZE,
+    IngestError,
+    file_extension,
+)
+
+logger = logging.getLogger(__name__)
+
+# Upload sessions that are not finalized within this window are abandoned
+SESSION_TTL_HOURS = 24
+
+
+# Formats whose received prefix is scanned (line count; header row for CSV)
+SCANNED_EXTENSIONS = ["csv"] + NDJSON_EXTENSIONS
+
+
+def _session_dir(upload_id: str) -> str:
+    return os.path.join(settings.INGEST_SPOOL_DIR, "sessions", upload_id)
+
+
+def _chunk_path(upload_id: str, chunk_index: int) -> str:
+    return os.path.join(_session_dir(upload_id), f"{chunk_index:06d}.part")
+
+
+def expected_chunk_size(session: Dict[str, Any], chunk_index: int) -> int:
+    """Size in bytes the given chunk must have"""
+    if chunk_index == session["total_chunks"] - 1:
+        return session["total_size"] - chunk_index * session["chunk_size"]
+    return session["chunk_size"]
+
+
+def missing_chunks(session: Dict[str, Any]) -> List[int]:
+    """Chunk indexes not yet received"""
+    received = set(session.get("received_chunks", []))
+    return [i for i in range(session["total_chunks"]) if i not in received]
+
+
+async def create_session(
+    db, user_id: str, filename: str, total_size: int, chunk_size: Optional[int]
+) -> Dict[str, Any]:
+    """Create an upload session for one file"""
+    if total_size <= 0:
+        raise IngestError("total_size must be positive")
+    if total_size > settings.MAX_UPLOAD_SIZE:
+        raise IngestError(
+            f"{filename} is too large. Maximum size is "
+            f"{settings.MAX_UPLOAD_SIZE / (1024*1024):.0f}MB"
+        )
+
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    if chunk_size <= 0 or chunk_size > settings.UPLOAD_MAX_CHUNK_SIZE:
+        raise IngestError(
+            f"chunk_size must be between 1 and {settings.UPLOAD_MAX_CHUNK_SIZE} bytes"
+        )
+
+    upload_id = uuid.uuid4().hex
+    now = datetime.utcnow()
+    session = {
+        "upload_id": upload_id,
+        "user_id": user_id,
+        "filename": filename,
+        "total_size": total_size,
+        "chunk_size": chunk_size,
+        "total_chunks": (total_size + chunk_size - 1) // chunk_size,
+        "received_chunks": [],
+        "status": "open",
+        # lines_seen stays None for formats that are not scanned
+        "scan": {
+            "scanned_through": -1,
+            "lines_seen": 0 if file_extension(filename) in SCANNED_EXTENSIONS else None,
+            "header": None,
+        },
+        "created_at": now,
+        "expires_at": now + timedelta(hours=SESSION_TTL_HOURS),
+    }
+    await db.upload_sessions.insert_one(dict(session))
+    # Created after the session, so cleanup never sees a directory without one
+    os.makedirs(_session_dir(upload_id), exist_ok=True)
+    return session
+
+
+async def get_session(db, upload_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """Look up an upload session owned by the user (None once it has expired)"""
+    session = await db.upload_sessions.find_one(
+        {"upload_id": upload_id, "user_id": user_id}
+    )
+    if session and session["expires_at"] <= datetime.utcnow():
+        await delete_session(db, session)
+        return None
+    return session
+
+
+async def write_chunk(
+    db,
+    session: Dict[str, Any],
+    chunk_index: int,
+    body: AsyncIterator[bytes],
+    checksum: str,
+) -> Dict[str, Any]:
+    """Stream one chunk to the spool directory and verify its checksum
+
+    Re-sending an already received chunk overwrites it, so clients can retry
+    blindly after a dropped connection.
+    """
+    upload_id = session["upload_id"]
+    if session["status"] != "open":
+        raise IngestError("Upload session is already finalized")
+    if not 0 <= chunk_index < session["total_chunks"]:
+        raise IngestError(
+            f"chunk_index must be between 0 and {session['total_chunks'] - 1}"
+        )
+
+    expected_size = expected_chunk_size(session, chunk_index)
+    final_path = _chunk_path(upload_id, chunk_index)
+    tmp_path = f"{final_path}.{uuid.uuid4().hex}.tmp"
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out:
+            async for data in body:
+                size += len(data)
+                if size > expected_size:
+                    raise IngestError(
+                        f"Chunk {chunk_index} is larger than {expected_size} bytes"
+                    )
+                digest.update(data)
+                await out.write(data)
+
+        if size != expected_size:
+            raise IngestError(
+                f"Chunk {chunk_index} has {size} bytes, expected {expected_size}"
+            )
+        if digest.hexdigest() != checksum.lower():
+            raise IngestError(f"Checksum mismatch for chunk {chunk_index}")
+
+        os.replace(tmp_path, final_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    session = await db.upload_sessions.find_one_and_update(
+        {"upload_id": upload_id},
+        {"$addToSet": {"received_chunks": chunk_index}},
+        return_document=ReturnDocument.AFTER,
+    )
+    return await scan_received_prefix(db, session)
+
+
+async def scan_received_prefix(db, session: Dict[str, Any]) -> Dict[str, Any]:
+    """Incrementally scan chunks that form a contiguous prefix of the file
+
+    Only uncompressed CSV and NDJSON files are scanned: lines are counted as
+    new chunks arrive, and the CSV header is read from the first one. Chunks
+    are read in blocks of ``SPOOL_CHUNK_SIZE`` bytes. Scan state is advanced
+    with a compare-and-set on ``scan.scanned_through`` so concurrent chunk
+    uploads never double count.
+    """
+    ext = file_extension(session["filename"])
+    if ext not in SCANNED_EXTENSIONS:
+        return session
+
+    scan = session["scan"]
+    received = set(session["received_chunks"])
+    start = scan["scanned_through"] + 1
+    end = start
+    while end in received:
+        end += 1
+    if end == start:
+        return session
+
+    lines_seen = scan["lines_seen"]
+    for chunk_index in range(start, end):
+        async for block in _read_blocks(session["upload_id"], chunk_index):
+            lines_seen += block.count(b"\n")
+
+    header = scan["header"]
+    if ext == "csv" and header is None:
+        header = await _read_csv_header(session, end)
+
+    updated = await db.upload_sessions.find_one_and_update(
+        {"upload_id": session["upload_id"], "scan.scanned_through": start - 1},
+        {
+            "$set": {
+                "scan.scanned_through": end - 1,
+                "scan.lines_seen": lines_seen,
+                "scan.header": header,
+            }
+        },
+        return_document=ReturnDocument.AFTER,
+    )
+    # Another request advanced the scan first; its result is just as good
+    return updated or await db.upload_sessions.find_one(
+        {"upload_id": session["upload_id"]}
+    )
+
+
+async def _read_blocks(upload_id: str, chunk_index: int) -> AsyncIterator[bytes]:
+    """Read a received chunk in blocks of ``SPOOL_CHUNK_SIZE`` bytes"""
+    async with aiofiles.open(_chunk_path(upload_id, chunk_index), "rb") as f:
+        while True:
+            block = await f.read(SPOOL_CHUNK_SIZE)
+            if not block:
+                return
+            yield block
+
+
+async def _read_csv_header(
+    session: Dict[str, Any], received_through: int
+) -> Optional[List[str]]:
+    """Column names of a CSV file's first line, read from the first chunks
+
+    At most ``SPOOL_CHUNK_SIZE`` bytes are read. None while the first
+    ``received_through`` chunks hold no complete line and more are to come.
+    """
+    head = b""
+    for chunk_index in range(received_through):
+        async with aiofiles.open(
+            _chunk_path(session["upload_id"], chunk_index), "rb"
+        ) as f:
+            while b"\n" not in head and len(head) < SPOOL_CHUNK_SIZE:
+                block = await f.read(SPOOL_CHUNK_SIZE - len(head))
+                if not block:
+                    break
+                head += block
+        if b"\n" in head or len(head) >= SPOOL_CHUNK_SIZE:
+            break
+    else:
+        if received_through < session["total_chunks"]:
+            return None
+
+    first_line = head.split(b"\n", 1)[0].decode("utf-8-sig", errors="replace")
+    return [column.strip() for column in next(csv.reader([first_line]), [])]
+
+
+async def assemble(db, session: Dict[str, Any]) -> Tuple[str, int, str]:
+    """Concatenate all chunks into a single spooled file
+
+    Returns the spooled file path, its size and its SHA-256 hex digest. The
+    session is marked "finalizing" and keeps its chunks: call
+    ``complete_session`` once the file is accepted, or ``release_session`` to
+    let the client finalize again.
+    """
+    missing = missing_chunks(session)
+    if missing:
+        raise IngestError(
+            f"Upload {session['upload_id']} is missing {len(missing)} chunk(s), "
+            f"first missing chunk is {missing[0]}"
+        )
+
+    claimed = await db.upload_sessions.update_one(
+        {"upload_id": session["upload_id"], "status": "open"},
+        {"$set": {"status": "finalizing"}},
+    )
+    if claimed.modified_count == 0:
+        raise IngestError("Upload session is already finalized")
+
+    os.makedirs(settings.INGEST_SPOOL_DIR, exist_ok=True)
+    path = os.path.join(
+        settings.INGEST_SPOOL_DIR,
+        f"{uuid.uuid4().hex}.{file_extension(session['filename'])}",
+    )
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(path, "wb") as out:
+            for chunk_index in range(session["total_chunks"]):
+                async with aiofiles.open(
+                    _chunk_path(session["upload_id"], chunk_index), "rb"
+                ) as part:
+                    while True:
+                        data = await part.read(SPOOL_CHUNK_SIZE)
+                        if not data:
+                            break
+                        size += len(data)
+                        digest.update(data)
+                        await out.write(data)
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        await release_session(db, session)
+        raise
+
+    return path, size, digest.hexdigest()
+
+
+async def complete_session(db, session: Dict[str, Any]):
+    """Mark an assembled session finalized and remove its chunks"""
+    await db.upload_sessions.update_one(
+        {"upload_id": session["upload_id"]},
+        {"$set": {"status": "finalized", "finalized_at": datetime.utcnow()}},
+    )
+    shutil.rmtree(_session_dir(session["upload_id"]), ignore_errors=True)
+
+
+async def release_session(db, session: Dict[str, Any]):
+    """Reopen a session whose assembled file was rejected"""
+    await db.upload_sessions.update_one(
+        {"upload_id": session["upload_id"], "status": "finalizing"},
+        {"$set": {"status": "open"}},
+    )
+
+
+async def delete_session(db, session: Dict[str, Any]):
+    """Abort an upload session and remove its chunks"""
+    await db.upload_sessions.delete_one({"upload_id": session["upload_id"]})
+    shutil.rmtree(_session_dir(session["upload_id"]), ignore_errors=True)
+
+
+async def cleanup_expired_sessions(db) -> int:
+    """Delete expired sessions and chunk directories without a live session
+
+    Returns the number of chunk directories removed.
+    """
+    now = datetime.utcnow()
+    await db.upload_sessions.delete_many({"expires_at": {"$lte": now}})
+
+    sessions_dir = os.path.join(settings.INGEST_SPOOL_DIR, "sessions")
+    try:
+        upload_ids = os.listdir(sessions_dir)
+    except FileNotFoundError:
+        return 0
+    if not upload_ids:
+        return 0
+
+    # Listed before the lookup: directories are created after their session
+    live = {
+        session["upload_id"]
+        async for session in db.upload_sessions.find(
+            {"upload_id": {"$in": upload_ids}, "expires_at": {"$gt": now}},
+            projection={"upload_id": 1},
+        )
+    }
+    removed = 0
+    for upload_id in upload_ids:
+        if upload_id not in live:
+            shutil.rmtree(os.path.join(sessions_dir, upload_id), ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info(f"Removed chunks of {removed} expired upload session(s)")
+    return removed
+
+
+def session_status(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Client-facing view of an upload session"""
+    missing = missing_chunks(session)
+    return {
+        "upload_id": session["upload_id"],
+        "filename": session["filename"],
+        "total_size": session["total_size"],
+        "chunk_size": session["chunk_size"],
+        "total_chunks": session["total_chunks"],
+        "received_chunks": session["total_chunks"] - len(missing),
+        "missing_chunks": missing,
+        "status": session["status"],
+        "lines_seen": session["scan"]["lines_seen"],
+        "header": session["scan"]["header"],
+        "expires_at": session["expires_at"].isoformat(),
+    }
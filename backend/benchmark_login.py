@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark login throughput of a running API server
+
+Sends concurrent POST /api/v1/auth/login requests (half with a wrong email,
+which takes the timing-equalization path) while probing GET /api/v1/health,
+and reports logins per second and the probe latency: while bcrypt blocked the
+event loop, every other request waited for the logins in flight.
+
+Usage:
+  python benchmark_login.py --email user@example.com --password secret \\
+      [--url http://localhost:8000] [--requests 200] [--concurrency 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> float:
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    if response.status_code not in (200, 401):
+        raise RuntimeError(f"Login failed: {response.status_code} {response.text}")
+    return time.perf_counter() - started
+
+
+async def probe(client: httpx.AsyncClient, latencies: list, done: asyncio.Event):
+    """Time health checks while the logins run"""
+    while not done.is_set():
+        started = time.perf_counter()
+        await client.get("/api/v1/health")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=120
+    ) as client:
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def limited(i: int) -> float:
+            # Every other login uses an unknown email
+            email = args.email if i % 2 == 0 else f"unknown-{i}@example.com"
+            async with semaphore:
+                return await login(client, email, args.password)
+
+        probe_latencies = []
+        done = asyncio.Event()
+        prober = asyncio.create_task(probe(client, probe_latencies, done))
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(limited(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    print("=" * 60)
+    print(f"{args.requests} logins, concurrency {args.concurrency}, {args.url}")
+    print("=" * 60)
+    print(f"Throughput:      {args.requests / elapsed:8.1f} logins/s")
+    print(
+        f"Login latency:   p50 {statistics.median(latencies) * 1000:7.1f}ms  "
+        f"p99 {percentile(latencies, 99) * 1000:7.1f}ms"
+    )
+    if probe_latencies:
+        print(
+            f"Health latency:  p50 {statistics.median(probe_latencies) * 1000:7.1f}ms  "
+            f"p99 {percentile(probe_latencies, 99) * 1000:7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON serialization of analysis results
+
+Compares the previous path (str()/isoformat() conversions, jsonable_encoder,
+stdlib json) with FastJSONResponse on a synthetic structured-survey analysis,
+and reports gzip sizes. Usage: python benchmark_serialization.py [questions]
+"""
+
+import gzip
+import sys
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+load_dotenv()
+
+from app.core.responses import FastJSONResponse, orjson
+
+ROUNDS = 20
+
+
+def build_analysis(questions: int) -> dict:
+    """An analysis document shaped like the ones perform_analysis_task stores"""
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "survey_id": str(ObjectId()),
+        "survey_type": "structured",
+        "created_at": now,
+        "question_analyses": [
+            {
+                "question_id": f"q{q}",
+                "question_text": f"What do you think about topic {q}?",
+                "summary": "Respondents mostly agree that the build is slow. " * 10,
+                "key_findings": [f"Finding {i} of question {q}" * 3 for i in range(20)],
+                "sentiment": {
+                    "positive": 0.31,
+                    "neutral": 0.42,
+                    "negative": 0.27,
+                    "examples": [f"Example answer {i}" * 5 for i in range(30)],
+                },
+                "topics": [
+                    {
+                        "topic": f"Topic {t}",
+                        "count": t * 7,
+                        "keywords": [f"kw{t}_{k}" for k in range(15)],
+                        "sample_responses": [f"Sample {s} " * 12 for s in range(10)],
+                    }
+                    for t in range(15)
+                ],
+                "statistics": {
+                    "frequencies": {
+                        "rows": [
+                            {"value": f"Option {r}", "count": r, "percentage": 1.5}
+                            for r in range(50)
+                        ]
+                    }
+                },
+                "analyzed_at": now,
+            }
+            for q in range(questions)
+        ],
+    }
+
+
+def old_render(analysis: dict) -> bytes:
+    analysis = dict(analysis)
+    analysis["_id"] = str(analysis["_id"])
+    analysis["created_at"] = analysis["created_at"].isoformat()
+    return JSONResponse(jsonable_encoder(analysis)).body
+
+
+def new_render(analysis: dict) -> bytes:
+    return FastJSONResponse(analysis).body
+
+
+def timed(render, analysis: dict) -> float:
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        render(analysis)
+    return (time.perf_counter() - started) / ROUNDS
+
+
+def main():
+    questions = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    analysis = build_analysis(questions)
+    body = new_render(analysis)
+
+    print("=" * 60)
+    print(f"Analysis with {questions} questions: {len(body) / 1024:.0f}KB of JSON")
+    print(f"orjson installed: {orjson is not None}")
+    print("=" * 60)
+
+    old = timed(old_render, analysis)
+    new = timed(new_render, analysis)
+    print(f"jsonable_encoder + json: {old * 1000:8.2f}ms")
+    print(f"FastJSONResponse:        {new * 1000:8.2f}ms  ({old / new:.1f}x faster)")
+
+    started = time.perf_counter()
+    compressed = gzip.compress(body, compresslevel=9)
+    print(
+        f"gzip: {len(compressed) / 1024:.0f}KB "
+        f"({100 * len(compressed) / len(body):.0f}% of the body) "
+        f"in {(time.perf_counter() - started) * 1000:.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
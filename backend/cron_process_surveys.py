@@ -13,7 +13,6 @@ import asyncio
 import os
 import sys
 from motor.motor_asyncio import AsyncIOMotorClient
-from bson import ObjectId
 from dotenv import load_dotenv
 import logging
 from datetime import datetime
@@ -29,6 +28,11 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 from app.services.llm_service import LLMService
+from app.services.progress import ProgressReporter
+from app.services.response_store import (
+    get_simple_responses,
+    question_response_loader,
+)
 
 
 async def process_pending_surveys():
@@ -66,6 +70,7 @@ async def process_pending_surveys():
             survey_id = str(survey["_id"])
             survey_title = survey.get("title", "Untitled")
             survey_type = survey.get("survey_type", "simple")
+            reporter = ProgressReporter(db, survey_id)
 
             logger.info(f"\n{'='*80}")
             logger.info(f"🚀 Processing: {survey_title} (ID: {survey_id})")
@@ -74,25 +79,22 @@ async def process_pending_surveys():
 
             try:
                 # Update status to processing
-                await db.surveys.update_one(
-                    {"_id": ObjectId(survey_id)},
+                await reporter.update(
                     {
-                        "$set": {
-                            "status": "processing",
-                            "progress": {
-                                "step": "initializing",
-                                "message": "Starting automated analysis...",
-                                "current_question": 0,
-                                "total_questions": (
-                                    len(survey.get("questions", []))
-                                    if survey_type == "structured"
-                                    else 1
-                                ),
-                                "percentage": 0,
-                                "last_updated": datetime.utcnow(),
-                            },
-                        }
-                    },
+                        "status": "processing",
+                        "progress": {
+                            "step": "initializing",
+                            "message": "Starting automated analysis...",
+                            "current_question": 0,
+                            "total_questions": (
+                                len(survey.get("questions", []))
+                                if survey_type == "structured"
+                                else 1
+                            ),
+                            "percentage": 0,
+                            "last_updated": datetime.utcnow(),
+                        },
+                    }
                 )
 
                 start_time = time.time()
@@ -111,14 +113,11 @@ async def process_pending_surveys():
                         logger.error(
                             f"❌ No processed data found for survey {survey_id}"
                         )
-                        await db.surveys.update_one(
-                            {"_id": ObjectId(survey_id)},
+                        await reporter.update(
                             {
-                                "$set": {
-                                    "status": "failed",
-                                    "error": "No processed data",
-                                }
-                            },
+                                "status": "failed",
+                                "error": "No processed data",
+                            }
                         )
                         continue
 
@@ -135,23 +134,22 @@ async def process_pending_surveys():
                             else 10
                         )
                         logger.info(f"      {percentage}% - {message}")
-                        await db.surveys.update_one(
-                            {"_id": ObjectId(survey_id)},
+                        await reporter.update(
                             {
-                                "$set": {
-                                    "progress.step": step,
-                                    "progress.current_question": current_question,
-                                    "progress.total_questions": total_questions,
-                                    "progress.message": message,
-                                    "progress.percentage": percentage,
-                                    "progress.last_updated": datetime.utcnow(),
-                                }
-                            },
+                                "progress.step": step,
+                                "progress.current_question": current_question,
+                                "progress.total_questions": total_questions,
+                                "progress.message": message,
+                                "progress.percentage": percentage,
+                                "progress.last_updated": datetime.utcnow(),
+                            }
                         )
 
                     # Analyze structured survey
                     structured_result = await llm_service.analyze_structured_survey(
-                        processed_data, progress_callback=progress_callback
+                        processed_data,
+                        progress_callback=progress_callback,
+                        response_loader=question_response_loader(db, survey),
                     )
 
                     result_data.update(
@@ -177,22 +175,19 @@ async def process_pending_surveys():
 
                 # Handle simple surveys
                 else:
-                    responses = survey.get("responses", [])
+                    responses = await get_simple_responses(db, survey)
                     logger.info(f"   📊 Analyzing {len(responses)} responses...")
 
                     result_data["total_responses_analyzed"] = len(responses)
 
                     # Progress update
-                    await db.surveys.update_one(
-                        {"_id": ObjectId(survey_id)},
+                    await reporter.update(
                         {
-                            "$set": {
-                                "progress.step": "analyzing",
-                                "progress.message": f"Analyzing {len(responses)} responses...",
-                                "progress.percentage": 20,
-                                "progress.last_updated": datetime.utcnow(),
-                            }
-                        },
+                            "progress.step": "analyzing",
+                            "progress.message": f"Analyzing {len(responses)} responses...",
+                            "progress.percentage": 20,
+                            "progress.last_updated": datetime.utcnow(),
+                        }
                     )
 
                     # Full analysis
@@ -218,30 +213,24 @@ async def process_pending_surveys():
                 result_data["processing_time"] = processing_time
 
                 # Save analysis
-                await db.surveys.update_one(
-                    {"_id": ObjectId(survey_id)},
+                await reporter.update(
                     {
-                        "$set": {
-                            "progress.step": "finalizing",
-                            "progress.message": "Saving results...",
-                            "progress.percentage": 95,
-                            "progress.last_updated": datetime.utcnow(),
-                        }
-                    },
+                        "progress.step": "finalizing",
+                        "progress.message": "Saving results...",
+                        "progress.percentage": 95,
+                        "progress.last_updated": datetime.utcnow(),
+                    }
                 )
 
                 analysis_result = await db.analyses.insert_one(result_data)
 
                 # Update survey status to completed
-                await db.surveys.update_one(
-                    {"_id": ObjectId(survey_id)},
+                await reporter.update(
                     {
-                        "$set": {
-                            "status": "completed",
-                            "updated_at": datetime.utcnow(),
-                            "last_analysis_id": str(analysis_result.inserted_id),
-                        }
-                    },
+                        "status": "completed",
+                        "updated_at": datetime.utcnow(),
+                        "last_analysis_id": str(analysis_result.inserted_id),
+                    }
                 )
 
                 logger.info(
@@ -255,15 +244,12 @@ async def process_pending_surveys():
                 )
 
                 # Update survey status to failed
-                await db.surveys.update_one(
-                    {"_id": ObjectId(survey_id)},
+                await reporter.update(
                     {
-                        "$set": {
-                            "status": "failed",
-                            "error": str(e),
-                            "updated_at": datetime.utcnow(),
-                        }
-                    },
+                        "status": "failed",
+                        "error": str(e),
+                        "updated_at": datetime.utcnow(),
+                    }
                 )
 
         logger.info(f"\n{'='*80}")
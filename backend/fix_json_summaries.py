@@ -51,7 +51,12 @@ async def fix_malformed():
 
         if needs_update:
             result = await db.analyses.update_one(
-                {"_id": analysis_id}, {"$set": {"question_analyses": updated_questions}}
+                {"_id": analysis_id},
+                {
+                    "$set": {"question_analyses": updated_questions},
+                    # Invalidates cached results (see analysis_etag)
+                    "$inc": {"version": 1},
+                },
             )
             analyses_updated += 1
             print(f"   📝 Updated analysis {analysis_id}")
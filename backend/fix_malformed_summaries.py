@@ -72,7 +72,12 @@ async def find_and_fix_malformed_summaries():
         # Update the database if needed
         if needs_update:
             await db.analyses.update_one(
-                {"_id": analysis_id}, {"$set": {"question_analyses": updated_questions}}
+                {"_id": analysis_id},
+                {
+                    "$set": {"question_analyses": updated_questions},
+                    # Invalidates cached results (see analysis_etag)
+                    "$inc": {"version": 1},
+                },
             )
             fixed_count += 1
             print(f"✅ Fixed analysis {analysis_id}")
@@ -1,3 +1,8 @@
+import time
+
+# Start of the import timer reported at startup
+IMPORT_STARTED = time.perf_counter()
+
 from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -6,7 +11,9 @@ import logging
 
 from app.core.config import settings
 from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.core.responses import FastJSONResponse, add_compression
 from app.api.routes import analysis, surveys, health, auth
+from app.services.auth_service import password_executor, prepare_password_hashing
 from app.services.background_processor import survey_processor
 
 # Configure logging
@@ -20,6 +27,8 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     logger.info("Starting up application...")
+    startup_started = time.perf_counter()
+    await prepare_password_hashing()
     try:
         await connect_to_mongo()
         logger.info("MongoDB connection successful")
@@ -34,6 +43,15 @@ async def lifespan(app: FastAPI):
         logger.warning("Application will start but database operations will fail")
         # Don't crash the app - let it start and health check will still work
 
+    app.state.startup_timings = {
+        "import_ms": round(IMPORT_SECONDS * 1000),
+        "startup_ms": round((time.perf_counter() - startup_started) * 1000),
+    }
+    logger.info(
+        f"⏱️ Imports took {app.state.startup_timings['import_ms']}ms, "
+        f"startup {app.state.startup_timings['startup_ms']}ms"
+    )
+
     yield
 
     logger.info("Shutting down application...")
@@ -41,6 +59,7 @@ async def lifespan(app: FastAPI):
         # Stop background processor
         await survey_processor.stop()
         await close_mongo_connection()
+        password_executor.shutdown(wait=False)
     except Exception as e:
         logger.error(f"Error closing MongoDB connection: {e}")
 
@@ -53,6 +72,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # CORS middleware
@@ -64,6 +84,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Brotli/gzip for large bodies (analysis results, survey details)
+add_compression(app)
+
 
 # Include routers
 app.include_router(health.router, prefix="/api/v1", tags=["Health"])
@@ -71,6 +94,9 @@ app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(surveys.router, prefix="/api/v1/surveys", tags=["Surveys"])
 app.include_router(analysis.router, prefix="/api/v1/analysis", tags=["Analysis"])
 
+# Time to import the application and its dependencies
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
 
 @app.get("/")
 async def root():
@@ -0,0 +1,110 @@
+"""
+Test that segment analyses do not replace a survey's full analysis
+
+Runs the API against an in-memory MongoDB (mongomock-motor):
+  pip install pytest mongomock-motor && pytest test_analysis_segments.py
+"""
+
+import asyncio
+import os
+from datetime import datetime
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-local-test-runs")
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+import main
+from app.api.routes import analysis
+from app.core.database import get_database
+from app.core.deps import get_current_active_user
+from app.models.user import User
+from app.services.dedup import find_duplicate
+
+SAMPLE_DATA = os.path.join(os.path.dirname(__file__), "..", "sample-data")
+
+db = mongomock_motor.AsyncMongoMockClient()["test"]
+# mongomock-motor's with_options returns a synchronous collection
+type(db.surveys).with_options = lambda collection, **options: collection
+
+user = User(
+    id="user-1",
+    email="user@example.com",
+    full_name="Test User",
+    is_active=True,
+    created_at=datetime.utcnow(),
+)
+client = TestClient(main.app)
+
+
+@pytest.fixture(autouse=True)
+def overrides(monkeypatch):
+    """Serve this module's database and user, leaving other modules' in place"""
+    monkeypatch.setitem(main.app.dependency_overrides, get_database, lambda: db)
+    monkeypatch.setitem(
+        main.app.dependency_overrides, get_current_active_user, lambda: user
+    )
+
+
+async def analyze_structured_survey(processed_data, progress_callback, response_loader):
+    """Stands in for the LLM: reports how many responses it was given"""
+    return {
+        "question_analyses": [
+            {"question_id": question_id, "response_count": data["response_count"]}
+            for question_id, data in processed_data.items()
+        ],
+        "cross_question_insights": {},
+        "total_questions_analyzed": len(processed_data),
+    }
+
+
+def analyze(survey_id: str, segment=None) -> None:
+    response = client.post(
+        "/api/v1/analysis/analyze",
+        json={
+            "survey_id": survey_id,
+            "analysis_types": ["full_analysis"],
+            "options": {"segment": segment} if segment else {},
+        },
+    )
+    assert response.status_code == 200, response.text
+
+
+def test_segment_analysis_keeps_latest_full_analysis(monkeypatch):
+    """The latest full-survey analysis is still served after a segment run"""
+    monkeypatch.setattr(
+        analysis.llm_service, "analyze_structured_survey", analyze_structured_survey
+    )
+    with open(os.path.join(SAMPLE_DATA, "survey-schema.csv"), "rb") as schema, open(
+        os.path.join(SAMPLE_DATA, "two-file-responses.csv"), "rb"
+    ) as responses:
+        response = client.post(
+            "/api/v1/surveys/upload-two-file",
+            files={"schema_file": schema, "responses_file": responses},
+            data={"allow_duplicate": "true"},
+        )
+    assert response.status_code == 200, response.text
+    survey_id = response.json()["survey_id"]
+
+    analyze(survey_id)
+    full = client.get(f"/api/v1/analysis/{survey_id}/results").json()
+    assert "segment" not in full
+
+    analyze(survey_id, segment={"q5": "8"})
+    assert len(client.get(f"/api/v1/analysis/{survey_id}/all-results").json()) == 2
+
+    latest = client.get(f"/api/v1/analysis/{survey_id}/results").json()
+    assert latest["_id"] == full["_id"]
+    survey = asyncio.run(db.surveys.find_one({"_id": ObjectId(survey_id)}))
+    assert survey["last_analysis_id"] == full["_id"]
+    duplicate = asyncio.run(find_duplicate(db, user.id, survey["content_hash"]))
+    assert duplicate["analysis_id"] == full["_id"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,80 @@
+"""
+Test upload previews of compressed response files
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-local-test-runs")
+
+from app.services.preview import preview_responses, read_head
+
+ROWS = 400000
+CSV = (
+    "id,feedback,rating\n"
+    + "".join(
+        f"{i:06d},answer {i:06d} with some text {i * 7919 % 1000},{i % 5}\n"
+        for i in range(ROWS)
+    )
+).encode()
+
+# Head slice the frontend sends for compressed files
+HEAD_BYTES = 128 * 1024
+
+
+def test_compressed_head_preview():
+    """A head of a compressed file yields columns, rows and a close estimate"""
+    for filename, compress in [
+        ("responses.csv.gz", gzip.compress),
+        ("responses.csv.bz2", bz2.compress),
+        ("responses.csv.xz", lzma.compress),
+    ]:
+        compressed = compress(CSV)
+        preview = preview_responses(
+            io.BytesIO(compressed[:HEAD_BYTES]),
+            filename,
+            total_bytes=len(compressed),
+            sample_bytes=1024 * 1024,
+            received_bytes=HEAD_BYTES,
+        )
+        print(f"{filename}: {preview['estimated_rows']} rows estimated ({ROWS} real)")
+        assert preview["columns"] == ["id", "feedback", "rating"]
+        assert preview["sample_rows"][0]["id"] == "000000"
+        assert not preview["row_count_exact"]
+        assert abs(preview["estimated_rows"] - ROWS) < ROWS * 0.1
+
+
+def test_truncated_head_keeps_output():
+    """A compressed stream cut short keeps what was decompressed"""
+    compressed = gzip.compress(CSV)
+    head, truncated, raw_bytes = read_head(
+        io.BytesIO(compressed[:HEAD_BYTES]), "responses.csv.gz", len(CSV)
+    )
+    assert truncated
+    assert raw_bytes <= HEAD_BYTES
+    assert CSV.startswith(head) and len(head) > HEAD_BYTES
+
+
+def test_small_compressed_file_is_exact():
+    """A whole compressed file within the sample is counted exactly"""
+    small = CSV[: CSV.index(b"\n020000,") + 1]
+    compressed = gzip.compress(small[:1000]) + gzip.compress(small[1000:])
+    preview = preview_responses(
+        io.BytesIO(compressed),
+        "responses.csv.gz",
+        total_bytes=len(compressed),
+        sample_bytes=1024 * 1024,
+    )
+    assert preview["estimated_rows"] == 20000
+    assert preview["row_count_exact"]
+
+
+if __name__ == "__main__":
+    test_compressed_head_preview()
+    test_truncated_head_keeps_output()
+    test_small_compressed_file_is_exact()
+    print("✅ All preview tests passed!")
@@ -590,6 +590,34 @@ export default function AnalysisResults({ results }) {
                             </div>
                         )}
 
+                        {/* Answer Distribution (closed-ended questions, computed locally) */}
+                        {qa.statistics?.frequencies?.rows?.length > 0 && (
+                            <div className="bg-accent p-4 rounded-lg border">
+                                <h4 className="font-semibold mb-3">Answer Distribution</h4>
+                                <div className="space-y-2">
+                                    {qa.statistics.frequencies.rows.slice(0, 10).map((row) => (
+                                        <div key={row.value} className="text-sm">
+                                            <div className="flex justify-between text-muted-foreground">
+                                                <span>{row.value}</span>
+                                                <span>{formatNumber(row.count)} ({row.percentage.toFixed(1)}%)</span>
+                                            </div>
+                                            <div className="h-2 bg-muted rounded">
+                                                <div
+                                                    className="h-2 bg-primary rounded"
+                                                    style={{ width: `${Math.min(row.percentage, 100)}%` }}
+                                                />
+                                            </div>
+                                        </div>
+                                    ))}
+                                </div>
+                                {qa.statistics.numeric && (
+                                    <p className="text-xs text-muted-foreground mt-3">
+                                        Mean {qa.statistics.numeric.mean.toFixed(2)} · Median {qa.statistics.numeric.median} · P10-P90 {qa.statistics.numeric.percentiles.p10}-{qa.statistics.numeric.percentiles.p90}
+                                    </p>
+                                )}
+                            </div>
+                        )}
+
                         {/* Sentiment */}
                         {qa.sentiment && (
                             <div className="bg-accent p-4 rounded-lg border">
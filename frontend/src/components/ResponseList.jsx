@@ -0,0 +1,67 @@
+import React, { useEffect, useState } from 'react'
+import { Loader2 } from 'lucide-react'
+import toast from 'react-hot-toast'
+import { Button } from '@/components/ui/button'
+import { getSurveyResponses } from '@/services/api'
+import { formatNumber } from '@/lib/utils'
+
+// Responses of one question, fetched a page at a time
+export default function ResponseList({
+    surveyId,
+    questionId,
+    total,
+    pageSize = 10,
+    itemClassName,
+    numberClassName,
+    textClassName,
+}) {
+    const [responses, setResponses] = useState([])
+    const [nextCursor, setNextCursor] = useState(null)
+    const [loading, setLoading] = useState(true)
+
+    const loadPage = async (cursor) => {
+        setLoading(true)
+        try {
+            const data = await getSurveyResponses(surveyId, { questionId, cursor, limit: pageSize })
+            setResponses((current) => (cursor ? [...current, ...data.responses] : data.responses))
+            setNextCursor(data.next_cursor)
+        } catch (error) {
+            toast.error('Failed to load responses')
+        } finally {
+            setLoading(false)
+        }
+    }
+
+    useEffect(() => {
+        loadPage(null)
+    }, [surveyId, questionId])
+
+    return (
+        <div className="space-y-2 sm:space-y-3">
+            {responses.map((response, idx) => (
+                <div key={idx} className={itemClassName}>
+                    <span className={numberClassName}>
+                        {idx + 1}.
+                    </span>
+                    <span className={textClassName}>{response}</span>
+                </div>
+            ))}
+            {loading ? (
+                <div className="flex justify-center py-2">
+                    <Loader2 className="h-4 w-4 animate-spin text-muted-foreground" />
+                </div>
+            ) : (
+                nextCursor && (
+                    <div className="flex items-center justify-center gap-3">
+                        <Button variant="outline" size="sm" onClick={() => loadPage(nextCursor)}>
+                            Load More
+                        </Button>
+                        <span className="text-xs text-muted-foreground">
+                            {formatNumber(responses.length)} of {formatNumber(total)} responses
+                        </span>
+                    </div>
+                )
+            )}
+        </div>
+    )
+}
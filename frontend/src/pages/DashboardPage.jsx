@@ -12,6 +12,9 @@ import { formatDate, formatNumber, getStatusColor } from '@/lib/utils'
 
 export default function DashboardPage() {
     const [surveys, setSurveys] = useState([])
+    const [totalSurveys, setTotalSurveys] = useState(0)
+    const [nextCursor, setNextCursor] = useState(null)
+    const [loadingMore, setLoadingMore] = useState(false)
     const [loading, setLoading] = useState(true)
     const [deleteDialog, setDeleteDialog] = useState({ isOpen: false, surveyId: null, surveyTitle: '' })
 
@@ -19,6 +22,8 @@ export default function DashboardPage() {
         try {
             const data = await getSurveys()
             setSurveys(data.surveys)
+            setTotalSurveys(data.total)
+            setNextCursor(data.next_cursor)
         } catch (error) {
             toast.error('Failed to load surveys')
         } finally {
@@ -26,6 +31,20 @@ export default function DashboardPage() {
         }
     }
 
+    const loadMoreSurveys = async () => {
+        setLoadingMore(true)
+        try {
+            const data = await getSurveys({ cursor: nextCursor })
+            setSurveys((current) => [...current, ...data.surveys])
+            setTotalSurveys(data.total)
+            setNextCursor(data.next_cursor)
+        } catch (error) {
+            toast.error('Failed to load surveys')
+        } finally {
+            setLoadingMore(false)
+        }
+    }
+
     useEffect(() => {
         loadSurveys()
     }, [])
@@ -117,7 +136,7 @@ export default function DashboardPage() {
                                 <TrendingUp className="w-4 h-4 text-muted-foreground" />
                             </div>
                             <p className="text-xs font-medium text-muted-foreground mb-1 uppercase tracking-wider">Total Surveys</p>
-                            <p className="text-3xl font-black">{formatNumber(surveys.length)}</p>
+                            <p className="text-3xl font-black">{formatNumber(totalSurveys)}</p>
                         </CardContent>
                     </Card>
 
@@ -184,7 +203,7 @@ export default function DashboardPage() {
                                 <div>
                                     <CardTitle className="text-xl sm:text-2xl font-black">Your Surveys</CardTitle>
                                     <CardDescription className="text-sm">
-                                        {surveys.length} {surveys.length === 1 ? 'survey' : 'surveys'} • {completedSurveys} completed
+                                        {totalSurveys} {totalSurveys === 1 ? 'survey' : 'surveys'} • {completedSurveys} completed{nextCursor ? ` of the ${surveys.length} loaded` : ''}
                                     </CardDescription>
                                 </div>
                                 <Button
@@ -269,7 +288,7 @@ export default function DashboardPage() {
                                                                     <>
                                                                         <span>{formatNumber(survey.total_participants || 0)} participants</span>
                                                                         <span>•</span>
-                                                                        <span>{survey.questions?.length || 0} questions</span>
+                                                                        <span>{survey.question_count || 0} questions</span>
                                                                     </>
                                                                 ) : (
                                                                     <span>{formatNumber(survey.total_responses)} responses</span>
@@ -301,6 +320,17 @@ export default function DashboardPage() {
                                             </Card>
                                         </motion.div>
                                     ))}
+                                    {nextCursor && (
+                                        <div className="flex justify-center pt-3">
+                                            <Button
+                                                variant="outline"
+                                                onClick={loadMoreSurveys}
+                                                disabled={loadingMore}
+                                            >
+                                                {loadingMore ? 'Loading...' : 'Load More Surveys'}
+                                            </Button>
+                                        </div>
+                                    )}
                                 </div>
                             )}
                         </CardContent>
@@ -6,9 +6,10 @@ import { motion } from 'framer-motion'
 import { Button } from '@/components/ui/button'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card'
 import { Badge } from '@/components/ui/badge'
-import { getSurvey, startAnalysis, getAnalysisStatus, getAnalysisResults } from '@/services/api'
+import { getSurvey, startAnalysis, getAnalysisStatus, getAnalysisResults, getAnalysisEventsUrl } from '@/services/api'
 import { formatDate, formatNumber, getStatusColor, downloadPDFReport } from '@/lib/utils'
 import AnalysisResults from '@/components/AnalysisResults'
+import ResponseList from '@/components/ResponseList'
 
 export default function SurveyDetailPage() {
     const { surveyId } = useParams()
@@ -53,41 +54,59 @@ export default function SurveyDetailPage() {
         loadSurvey()
     }, [surveyId])
 
-    // Poll for status when processing
+    // Follow status while processing: pushed over Server-Sent Events, with
+    // polling as the fallback when the stream cannot be opened
     useEffect(() => {
         if (survey?.status === 'processing') {
-            console.log('🔄 Starting polling for survey:', surveyId)
-
-            const interval = setInterval(async () => {
-                try {
-                    console.log('📡 Polling status for survey:', surveyId)
-                    const status = await getAnalysisStatus(surveyId)
-                    console.log('✅ Status received:', status)
-
-                    // Update progress if available
-                    if (status.progress) {
-                        setProgress(status.progress)
-                        console.log('📊 Progress updated:', status.progress)
-                    }
+            let events = null
+            let interval = null
+            let finished = false
+
+            const handleStatus = (status) => {
+                // Update progress if available
+                if (status.progress) {
+                    setProgress(status.progress)
+                }
 
+                if (status.status === 'completed' || status.status === 'failed') {
+                    finished = true
+                    events?.close()
+                    clearInterval(interval)
+                    setProgress(null)
+                    loadSurvey()
                     if (status.status === 'completed') {
-                        console.log('🎉 Analysis completed!')
-                        setProgress(null)
-                        loadSurvey()
                         toast.success('Analysis completed!')
-                    } else if (status.status === 'failed') {
-                        console.log('❌ Analysis failed!')
-                        setProgress(null)
-                        loadSurvey()
+                    } else {
                         toast.error('Analysis failed')
                     }
-                } catch (err) {
-                    console.error('❌ Status check failed:', err)
                 }
-            }, 2000) // Poll every 2 seconds for more responsive updates
+            }
+
+            const startPolling = () => {
+                console.log('🔄 Falling back to polling for survey:', surveyId)
+                interval = setInterval(async () => {
+                    try {
+                        handleStatus(await getAnalysisStatus(surveyId))
+                    } catch (err) {
+                        console.error('❌ Status check failed:', err)
+                    }
+                }, 3000)
+            }
+
+            if (typeof EventSource === 'undefined') {
+                startPolling()
+            } else {
+                events = new EventSource(getAnalysisEventsUrl(surveyId))
+                events.onmessage = (event) => handleStatus(JSON.parse(event.data))
+                events.onerror = () => {
+                    events.close()
+                    if (!finished) startPolling()
+                }
+            }
 
             return () => {
-                console.log('🛑 Stopping polling for survey:', surveyId)
+                finished = true
+                events?.close()
                 clearInterval(interval)
             }
         }
@@ -280,6 +299,25 @@ export default function SurveyDetailPage() {
                                                             </Badge>
                                                         )}
                                                     </div>
+                                                    {survey.question_stats?.[question.question_id] && (() => {
+                                                        const stats = survey.question_stats[question.question_id]
+                                                        return (
+                                                            <div className="mt-2 space-y-1">
+                                                                <p className="text-xs text-muted-foreground">
+                                                                    {stats.response_count} answers · {(stats.empty_rate * 100).toFixed(1)}% empty · avg {stats.length.mean_words} words
+                                                                </p>
+                                                                {stats.top_keywords.length > 0 && (
+                                                                    <div className="flex flex-wrap gap-1">
+                                                                        {stats.top_keywords.map((kw) => (
+                                                                            <Badge key={kw.keyword} variant="outline" className="text-xs">
+                                                                                {kw.keyword} ({kw.count})
+                                                                            </Badge>
+                                                                        ))}
+                                                                    </div>
+                                                                )}
+                                                            </div>
+                                                        )
+                                                    })()}
                                                 </div>
                                             </div>
                                         </div>
@@ -543,7 +581,7 @@ export default function SurveyDetailPage() {
                             <CardHeader>
                                 <CardTitle>Sample Responses by Question</CardTitle>
                                 <CardDescription>
-                                    Preview of responses for each question (showing first 5 per question)
+                                    Responses for each question (5 at a time)
                                 </CardDescription>
                             </CardHeader>
                             <CardContent>
@@ -558,20 +596,16 @@ export default function SurveyDetailPage() {
                                                     {data.response_count} total responses
                                                 </p>
                                             </div>
-                                            <div className="space-y-2 ml-4">
-                                                {data.responses?.slice(0, 5).map((response, idx) => (
-                                                    <div key={idx} className="p-2 bg-gray-50 dark:bg-gray-800/50 rounded-md border-l-2 border-blue-400 dark:border-blue-500">
-                                                        <span className="text-xs font-mono text-muted-foreground mr-2">
-                                                            {idx + 1}.
-                                                        </span>
-                                                        <span className="text-sm text-foreground">{response}</span>
-                                                    </div>
-                                                ))}
-                                                {data.responses?.length > 5 && (
-                                                    <p className="text-xs text-muted-foreground ml-2">
-                                                        ...and {data.responses.length - 5} more responses
-                                                    </p>
-                                                )}
+                                            <div className="ml-4">
+                                                <ResponseList
+                                                    surveyId={surveyId}
+                                                    questionId={questionId}
+                                                    total={data.response_count}
+                                                    pageSize={5}
+                                                    itemClassName="p-2 bg-gray-50 dark:bg-gray-800/50 rounded-md border-l-2 border-blue-400 dark:border-blue-500"
+                                                    numberClassName="text-xs font-mono text-muted-foreground mr-2"
+                                                    textClassName="text-sm text-foreground"
+                                                />
                                             </div>
                                         </div>
                                     ))}
@@ -581,30 +615,23 @@ export default function SurveyDetailPage() {
                     ) : null
                 ) : (
                     // Show simple responses for single-question surveys
-                    survey.responses && survey.responses.length > 0 && (
+                    survey.total_responses > 0 && (
                         <Card className="border-2 bg-background/80 backdrop-blur-sm">
                             <CardHeader className="space-y-2">
                                 <CardTitle className="text-xl sm:text-2xl font-black">Sample Responses</CardTitle>
                                 <CardDescription className="text-sm sm:text-base">
-                                    Preview of survey responses (showing first 10)
+                                    Survey responses (10 at a time)
                                 </CardDescription>
                             </CardHeader>
                             <CardContent>
-                                <div className="space-y-2 sm:space-y-3">
-                                    {survey.responses.slice(0, 10).map((response, idx) => (
-                                        <div key={idx} className="p-3 sm:p-4 bg-gray-50/50 dark:bg-gray-800/50 border-2 border-gray-200 dark:border-gray-700">
-                                            <span className="text-xs sm:text-sm font-mono text-muted-foreground mr-2 font-black">
-                                                {idx + 1}.
-                                            </span>
-                                            <span className="text-xs sm:text-sm text-foreground">{response}</span>
-                                        </div>
-                                    ))}
-                                </div>
-                                {survey.responses.length > 10 && (
-                                    <p className="text-xs sm:text-sm text-muted-foreground mt-3 sm:mt-4 text-center">
-                                        ...and {survey.responses.length - 10} more responses
-                                    </p>
-                                )}
+                                <ResponseList
+                                    surveyId={surveyId}
+                                    total={survey.total_responses}
+                                    pageSize={10}
+                                    itemClassName="p-3 sm:p-4 bg-gray-50/50 dark:bg-gray-800/50 border-2 border-gray-200 dark:border-gray-700"
+                                    numberClassName="text-xs sm:text-sm font-mono text-muted-foreground mr-2 font-black"
+                                    textClassName="text-xs sm:text-sm text-foreground"
+                                />
                             </CardContent>
                         </Card>
                     )
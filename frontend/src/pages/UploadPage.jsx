@@ -7,7 +7,7 @@ import { motion } from 'framer-motion'
 import { Button } from '@/components/ui/button'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card'
 import { Input } from '@/components/ui/input'
-import { uploadSurvey, uploadSurveyFile, uploadTwoFileSurvey } from '@/services/api'
+import { uploadSurvey, uploadSurveyFile, uploadTwoFileSurvey, previewTwoFileSurvey } from '@/services/api'
 
 export default function UploadPage() {
     const navigate = useNavigate()
@@ -17,6 +17,8 @@ export default function UploadPage() {
     const [twoFileMode, setTwoFileMode] = useState(false)
     const [schemaFile, setSchemaFile] = useState(null)
     const [responsesFile, setResponsesFile] = useState(null)
+    const [preview, setPreview] = useState(null)
+    const [previewLoading, setPreviewLoading] = useState(false)
     const [formData, setFormData] = useState({
         title: '',
         description: '',
@@ -41,7 +43,14 @@ export default function UploadPage() {
         accept: {
             'text/csv': ['.csv'],
             'text/plain': ['.txt'],
-            'application/json': ['.json']
+            'application/json': ['.json'],
+            'application/x-ndjson': ['.jsonl', '.ndjson'],
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': ['.xlsx'],
+            'application/vnd.apache.parquet': ['.parquet'],
+            'application/gzip': ['.gz'],
+            'application/x-bzip2': ['.bz2'],
+            'application/x-xz': ['.xz'],
+            'application/zip': ['.zip']
         },
         maxFiles: 1
     })
@@ -56,7 +65,11 @@ export default function UploadPage() {
         try {
             console.log('📤 Uploading file with metadata:', fileMetadata)
             const result = await uploadSurveyFile(uploadedFile, fileMetadata)
-            toast.success('Survey uploaded successfully!')
+            if (result.duplicate) {
+                toast.success('These files were already uploaded - opening the existing survey')
+            } else {
+                toast.success('Survey uploaded successfully!')
+            }
             navigate(`/survey/${result.survey_id}`)
         } catch (error) {
             toast.error(error.response?.data?.detail || 'Failed to upload survey')
@@ -74,7 +87,11 @@ export default function UploadPage() {
         setLoading(true)
         try {
             const result = await uploadTwoFileSurvey(schemaFile, responsesFile, fileMetadata)
-            toast.success('Two-file survey uploaded successfully!')
+            if (result.duplicate) {
+                toast.success('These files were already uploaded - opening the existing survey')
+            } else {
+                toast.success('Two-file survey uploaded successfully!')
+            }
             navigate(`/survey/${result.survey_id}`)
         } catch (error) {
             toast.error(error.response?.data?.detail || 'Failed to upload survey')
@@ -83,6 +100,23 @@ export default function UploadPage() {
         }
     }
 
+    const handlePreview = async () => {
+        if (!responsesFile) {
+            toast.error('Please select a responses file first')
+            return
+        }
+
+        setPreviewLoading(true)
+        try {
+            setPreview(await previewTwoFileSurvey(schemaFile, responsesFile))
+        } catch (error) {
+            setPreview(null)
+            toast.error(error.response?.data?.detail || 'Failed to preview files')
+        } finally {
+            setPreviewLoading(false)
+        }
+    }
+
     const handleManualSubmit = async (e) => {
         e.preventDefault()
 
@@ -334,10 +368,11 @@ export default function UploadPage() {
                                     <div className="border-2 border-dashed rounded-lg p-6 text-center">
                                         <input
                                             type="file"
-                                            accept=".csv,.json"
+                                            accept=".csv,.json,.xlsx,.gz,.bz2,.xz,.zip"
                                             onChange={(e) => {
                                                 if (e.target.files.length > 0) {
                                                     setSchemaFile(e.target.files[0])
+                                                    setPreview(null)
                                                     toast.success('Schema file selected')
                                                 }
                                             }}
@@ -382,10 +417,11 @@ export default function UploadPage() {
                                     <div className="border-2 border-dashed rounded-lg p-6 text-center">
                                         <input
                                             type="file"
-                                            accept=".csv,.json"
+                                            accept=".csv,.json,.jsonl,.ndjson,.xlsx,.parquet,.gz,.bz2,.xz,.zip"
                                             onChange={(e) => {
                                                 if (e.target.files.length > 0) {
                                                     setResponsesFile(e.target.files[0])
+                                                    setPreview(null)
                                                     toast.success('Responses file selected')
                                                 }
                                             }}
@@ -422,6 +458,46 @@ export default function UploadPage() {
                                     </p>
                                 </div>
 
+                                {/* Column Mapping Preview */}
+                                {responsesFile && (
+                                    <div className="space-y-2">
+                                        <Button
+                                            type="button"
+                                            variant="outline"
+                                            size="sm"
+                                            onClick={handlePreview}
+                                            disabled={previewLoading}
+                                        >
+                                            {previewLoading && <Loader2 className="w-4 h-4 mr-2 animate-spin" />}
+                                            Check Column Mapping
+                                        </Button>
+                                        {preview && (
+                                            <div className="text-xs space-y-1 p-3 border rounded-lg bg-muted/40">
+                                                <p>
+                                                    <strong>{preview.responses.format.toUpperCase()}</strong>
+                                                    {preview.responses.encoding && `, ${preview.responses.encoding}`}
+                                                    {preview.responses.delimiter && `, delimiter "${preview.responses.delimiter}"`}
+                                                    {preview.responses.estimated_rows !== null &&
+                                                        ` · ${preview.responses.row_count_exact ? '' : '~'}${preview.responses.estimated_rows.toLocaleString()} rows`}
+                                                </p>
+                                                {preview.mapping && (
+                                                    <p>
+                                                        Mapped: {preview.mapping.filter(m => m.question_id).map(m => m.column).join(', ') || 'none'}
+                                                    </p>
+                                                )}
+                                                {preview.missing_questions?.length > 0 && (
+                                                    <p className="text-amber-600">
+                                                        Questions without a column: {preview.missing_questions.join(', ')}
+                                                    </p>
+                                                )}
+                                                {preview.warnings.map((warning) => (
+                                                    <p key={warning} className="text-red-600">{warning}</p>
+                                                ))}
+                                            </div>
+                                        )}
+                                    </div>
+                                )}
+
                                 {/* Metadata Fields */}
                                 <div className="space-y-4 pt-4 border-t">
                                     <div className="space-y-2">
@@ -598,6 +674,7 @@ export default function UploadPage() {
                                 <li>• <strong className="text-foreground">Two-File Survey:</strong> Separate schema file (questions) + responses file (participant answers)</li>
                                 <li>• <strong className="text-foreground">TXT:</strong> One response per line</li>
                                 <li>• <strong className="text-foreground">JSON:</strong> Array of strings or objects with response fields</li>
+                                <li>• <strong className="text-foreground">XLSX:</strong> First sheet read like a CSV, or "schema" + "responses" sheets for a two-file survey</li>
                             </ul>
                             <div className="mt-3 sm:mt-4 p-3 sm:p-4 bg-white/80 dark:bg-gray-800/80 border-2 border-blue-300 dark:border-blue-600">
                                 <p className="text-xs sm:text-sm font-black text-blue-800 dark:text-blue-300 mb-2">✨ Multi-Question & Two-File Surveys</p>
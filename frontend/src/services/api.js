@@ -147,8 +147,42 @@ export const uploadTwoFileSurvey = async (
   return response.data;
 };
 
-export const getSurveys = async () => {
-  const response = await api.get("/api/v1/surveys/");
+// Formats whose head can be previewed without sending the whole file
+const HEAD_PREVIEW_EXTENSIONS = ["csv", "json", "jsonl", "ndjson", "gz", "bz2", "xz"];
+const PREVIEW_SAMPLE_BYTES = 64 * 1024;
+
+export const previewTwoFileSurvey = async (schemaFile, responsesFile) => {
+  const formData = new FormData();
+  if (schemaFile) {
+    formData.append("schema_file", schemaFile);
+  }
+
+  // Send only the head of large text files, plus the full size for the row estimate
+  const extension = responsesFile.name.toLowerCase().split(".").pop();
+  if (HEAD_PREVIEW_EXTENSIONS.includes(extension)) {
+    formData.append(
+      "responses_file",
+      responsesFile.slice(0, PREVIEW_SAMPLE_BYTES * 2),
+      responsesFile.name
+    );
+    formData.append("responses_total_size", responsesFile.size);
+  } else {
+    formData.append("responses_file", responsesFile);
+  }
+
+  const response = await api.post("/api/v1/surveys/preview", formData, {
+    headers: {
+      "Content-Type": "multipart/form-data",
+    },
+  });
+  return response.data;
+};
+
+export const getSurveys = async ({ cursor, limit } = {}) => {
+  const params = {};
+  if (cursor) params.cursor = cursor;
+  if (limit) params.limit = limit;
+  const response = await api.get("/api/v1/surveys/", { params });
   return response.data;
 };
 
@@ -157,6 +191,20 @@ export const getSurvey = async (surveyId) => {
   return response.data;
 };
 
+export const getSurveyResponses = async (
+  surveyId,
+  { questionId, cursor, limit } = {}
+) => {
+  const params = {};
+  if (questionId) params.question_id = questionId;
+  if (cursor) params.cursor = cursor;
+  if (limit) params.limit = limit;
+  const response = await api.get(`/api/v1/surveys/${surveyId}/responses`, {
+    params,
+  });
+  return response.data;
+};
+
 export const deleteSurvey = async (surveyId) => {
   const response = await api.delete(`/api/v1/surveys/${surveyId}`);
   return response.data;
@@ -178,6 +226,15 @@ export const getAnalysisStatus = async (surveyId) => {
   return response.data;
 };
 
+// Server-Sent Events URL of a survey's analysis progress (EventSource cannot
+// send headers, so the access token goes in the query string)
+export const getAnalysisEventsUrl = (surveyId) => {
+  const token = localStorage.getItem("access_token");
+  return `${API_URL}/api/v1/analysis/${surveyId}/events?token=${encodeURIComponent(
+    token || ""
+  )}`;
+};
+
 export const getAllAnalysisResults = async (surveyId) => {
   const response = await api.get(`/api/v1/analysis/${surveyId}/all-results`);
   return response.data;